@@ -0,0 +1,271 @@
+import asyncio
+import math
+import os
+import sqlite3
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional, Tuple
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted to the upstream LLM in time."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        """Retry-After value in whole seconds."""
+        return str(max(1, math.ceil(self.retry_after)))
+
+class TokenBucket:
+    """Token-bucket rate limiter allowing `rate` calls per second with bursts."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _take(self, tokens: float, max_wait: float) -> Tuple[float, Optional[float]]:
+        """(tokens left, delay) for a reservation from tokens; delay None if refused."""
+        if tokens >= 1:
+            return tokens - 1, 0.0
+        delay = (1 - tokens) / self.rate
+        if delay > max_wait:
+            return tokens, None
+        return tokens - 1, delay
+
+    def reserve(self, max_wait: float) -> Optional[float]:
+        """Reserve a token; return the delay before it may be used.
+
+        Returns None without reserving if the token would not be available
+        within max_wait seconds.
+        """
+        self._refill()
+        self._tokens, delay = self._take(self._tokens, max_wait)
+        return delay
+
+    def time_to_token(self) -> float:
+        """Seconds until the next token becomes available."""
+        self._refill()
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+    def close(self):
+        """Nothing to release for an in-process bucket."""
+
+class SharedTokenBucket(TokenBucket):
+    """TokenBucket kept in a SQLite file, shared by worker processes on one host.
+
+    The bucket is one row; each reservation refills and takes from it in a
+    short IMMEDIATE transaction, so all workers draw from the same budget.
+    The update runs synchronously: a single-row write on a local file is
+    cheaper than handing it to a thread.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        rate: float,
+        burst: Optional[float] = None,
+        name: str = "chat",
+        clock: Callable[[], float] = time.time
+    ):
+        # Wall-clock time by default: monotonic clocks differ between processes
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.path = path
+        self.name = name
+        self._clock = clock
+        self._db = sqlite3.connect(path, timeout=1.0, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+        self._db.execute(
+            "INSERT OR IGNORE INTO rate_buckets (name, tokens, updated) VALUES (?, ?, ?)",
+            (name, self.burst, clock())
+        )
+
+    def _update(self, take: Callable[[float], Tuple[float, object]]):
+        """Refill the shared row, apply take(tokens) -> (tokens, result), store it."""
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            tokens, updated = db.execute(
+                "SELECT tokens, updated FROM rate_buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+            now = self._clock()
+            tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+            tokens, result = take(tokens)
+            db.execute(
+                "UPDATE rate_buckets SET tokens = ?, updated = ? WHERE name = ?",
+                (tokens, now, self.name)
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return result
+
+    def reserve(self, max_wait: float) -> Optional[float]:
+        return self._update(lambda tokens: self._take(tokens, max_wait))
+
+    def time_to_token(self) -> float:
+        return self._update(lambda tokens: (tokens, max(0.0, (1 - tokens) / self.rate)))
+
+    def close(self):
+        self._db.close()
+
+class AdmissionController:
+    """Bounds concurrency, rate and queueing of upstream LLM calls.
+
+    At most max_concurrency calls run at once, and at most rate calls start per
+    second (when rate is set). Up to max_queue further requests wait, each for
+    at most queue_timeout seconds; beyond that they are rejected immediately
+    with AdmissionRejected so the API can answer 503 with Retry-After.
+
+    Concurrency and queue limits are per process. A rate limit can be shared
+    between processes by passing a SharedTokenBucket as bucket.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        rate: float = 0,
+        burst: Optional[float] = None,
+        max_queue: int = 100,
+        queue_timeout: float = 10.0,
+        bucket: Optional[TokenBucket] = None
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.bucket = bucket or (TokenBucket(rate, burst) if rate > 0 else None)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._waits: deque = deque(maxlen=1024)
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        """Build a controller from CHAT_* environment variables.
+
+        The limits are for the whole server: with WEB_CONCURRENCY workers,
+        each takes its share of the concurrency and queue limits, and the
+        rate limit is shared through SHARED_STATE_DB (or split evenly if
+        that is not set).
+        """
+        workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+        rate = float(os.getenv("CHAT_RATE_LIMIT", "0"))
+        burst = os.getenv("CHAT_RATE_BURST")
+        burst = float(burst) if burst else None
+        shared_path = os.getenv("SHARED_STATE_DB")
+        bucket = None
+        if rate > 0 and shared_path:
+            bucket = SharedTokenBucket(shared_path, rate, burst)
+        elif rate > 0 and workers > 1:
+            rate /= workers
+            burst = max(1.0, burst / workers) if burst else None
+        return cls(
+            max_concurrency=math.ceil(int(os.getenv("CHAT_MAX_CONCURRENCY", "16")) / workers),
+            rate=rate,
+            burst=burst,
+            max_queue=math.ceil(int(os.getenv("CHAT_MAX_QUEUE", "100")) / workers),
+            queue_timeout=float(os.getenv("CHAT_QUEUE_TIMEOUT", "10")),
+            bucket=bucket
+        )
+
+    def close(self):
+        """Release the rate limiter's shared state, if any."""
+        if self.bucket:
+            self.bucket.close()
+
+    def _reject(self, reason: str, retry_after: float):
+        self.rejected += 1
+        raise AdmissionRejected(reason, retry_after)
+
+    def _estimated_wait(self) -> float:
+        if self.bucket:
+            return self.bucket.time_to_token()
+        return sum(self._waits) / len(self._waits) if self._waits else 1.0
+
+    async def _acquire(self, timeout: float) -> bool:
+        """Acquire the semaphore within timeout without leaking a permit."""
+        if not self._semaphore.locked():
+            # Fast path: a free slot is taken without suspending
+            return await self._semaphore.acquire()
+        acquire = asyncio.ensure_future(self._semaphore.acquire())
+        done: set = set()
+        try:
+            done, _ = await asyncio.wait({acquire}, timeout=timeout)
+        finally:
+            if not done and not acquire.cancel():
+                # Acquired just as we gave up; hand the permit back
+                self._semaphore.release()
+        return bool(done)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold an upstream slot for the duration of the block."""
+        if self.queued >= self.max_queue:
+            self._reject("queue full", self._estimated_wait())
+
+        started = time.monotonic()
+        self.queued += 1
+        try:
+            if not await self._acquire(self.queue_timeout):
+                self._reject("queue timeout", self._estimated_wait())
+            try:
+                if self.bucket:
+                    remaining = self.queue_timeout - (time.monotonic() - started)
+                    delay = self.bucket.reserve(max(0.0, remaining))
+                    if delay is None:
+                        self._reject("rate limited", self.bucket.time_to_token())
+                    if delay:
+                        await asyncio.sleep(delay)
+            except BaseException:
+                self._semaphore.release()
+                raise
+        finally:
+            self.queued -= 1
+
+        self._waits.append(time.monotonic() - started)
+        self.admitted += 1
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        """Queue depth and wait times, for sizing the limits."""
+        waits = sorted(self._waits)
+        return {
+            "max_concurrency": self.max_concurrency,
+            "rate_limit": self.bucket.rate if self.bucket else None,
+            "rate_limit_shared": isinstance(self.bucket, SharedTokenBucket),
+            "active": self.active,
+            "queue_depth": self.queued,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "wait_ms_avg": round(sum(waits) / len(waits) * 1000, 2) if waits else 0.0,
+            "wait_ms_p95": round(waits[int(len(waits) * 0.95)] * 1000, 2) if waits else 0.0,
+            "wait_ms_max": round(waits[-1] * 1000, 2) if waits else 0.0
+        }
@@ -0,0 +1,168 @@
+import codecs
+import csv
+import io
+import json
+import time
+from typing import AsyncIterable, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from .database import bulk_add_custom_personas, iter_personas
+from .validation import persona_rejection
+
+FORMATS = ("jsonl", "csv")
+
+# Rejected rows listed individually in an import report
+MAX_REPORTED_ERRORS = 100
+
+async def iter_lines(chunks: Union[AsyncIterable[bytes], Iterable[bytes]]) -> AsyncIterator[str]:
+    """Split a stream of byte chunks into decoded lines, without buffering it whole."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+
+    async def chunk_iter():
+        if hasattr(chunks, "__aiter__"):
+            async for chunk in chunks:
+                yield chunk
+        else:
+            for chunk in chunks:
+                yield chunk
+
+    async for chunk in chunk_iter():
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+async def parse_jsonl(lines: AsyncIterable[str]) -> AsyncIterator[Tuple[int, Optional[str], str]]:
+    """Yield (line number, description, error) from JSONL lines.
+
+    Each line is an object with a "description" key or a bare JSON string.
+    """
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            value = json.loads(line)
+        except ValueError:
+            yield line_no, None, "invalid JSON"
+            continue
+        if isinstance(value, dict):
+            value = value.get("description")
+        if not isinstance(value, str):
+            yield line_no, None, "missing description"
+            continue
+        yield line_no, value, ""
+
+async def parse_csv(lines: AsyncIterable[str]) -> AsyncIterator[Tuple[int, Optional[str], str]]:
+    """Yield (line number, description, error) from CSV lines.
+
+    Uses the "description" column when the first row is a header naming it,
+    otherwise the first column. Quoted fields may span lines.
+    """
+    column = 0
+    line_no = 0
+    first = True
+    record = ""
+    record_start = 0
+    async for line in lines:
+        line_no += 1
+        if not record:
+            record_start = line_no
+        record += line if not record else "\n" + line
+        if record.count('"') % 2:
+            # Inside a quoted field that continues on the next line
+            continue
+        text, record = record, ""
+        if not text.strip():
+            continue
+        row = next(csv.reader([text]))
+        if first:
+            first = False
+            header = [name.strip().lower() for name in row]
+            if "description" in header:
+                column = header.index("description")
+                continue
+        if column >= len(row):
+            yield record_start, None, "missing description"
+        else:
+            yield record_start, row[column], ""
+    if record:
+        yield record_start, None, "unterminated quoted field"
+
+async def import_personas(
+    lines: AsyncIterable[str],
+    fmt: str = "jsonl",
+    batch_size: int = 500,
+    reject: Callable[[str], str] = persona_rejection
+) -> Dict:
+    """Validate, deduplicate and insert personas from lines in batched transactions.
+
+    Returns a report with inserted, duplicate and rejected counts, rows per
+    second and the first rejected rows with their reasons.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {FORMATS}")
+    rows = parse_jsonl(lines) if fmt == "jsonl" else parse_csv(lines)
+
+    started = time.perf_counter()
+    report = {"rows": 0, "inserted": 0, "duplicates": 0, "rejected": 0, "errors": []}
+    seen = set()
+    batch: List[str] = []
+
+    async def flush():
+        inserted = await bulk_add_custom_personas(batch)
+        report["inserted"] += inserted
+        report["duplicates"] += len(batch) - inserted
+        batch.clear()
+
+    async for line_no, description, error in rows:
+        report["rows"] += 1
+        if not error:
+            description = description.strip()
+            error = reject(description)
+        if not error and description in seen:
+            report["duplicates"] += 1
+            continue
+        if error:
+            report["rejected"] += 1
+            if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                report["errors"].append({"line": line_no, "reason": error})
+            continue
+        seen.add(description)
+        batch.append(description)
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+
+    elapsed = time.perf_counter() - started
+    report["seconds"] = round(elapsed, 3)
+    report["rows_per_second"] = round(report["rows"] / elapsed, 1) if elapsed else 0.0
+    return report
+
+async def export_personas(fmt: str = "jsonl", is_custom: Optional[bool] = None, chunk_rows: int = 500) -> AsyncIterator[bytes]:
+    """Stream personas as JSONL or CSV, a chunk of rows at a time."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {FORMATS}")
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n") if fmt == "csv" else None
+    if writer:
+        writer.writerow(["id", "description", "is_custom"])
+
+    count = 0
+    async for persona in iter_personas(is_custom=is_custom):
+        if writer:
+            writer.writerow([persona["id"], persona["description"], str(persona["is_custom"]).lower()])
+        else:
+            buffer.write(json.dumps(persona, ensure_ascii=False) + "\n")
+        count += 1
+        if count % chunk_rows == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
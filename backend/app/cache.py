@@ -0,0 +1,163 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+import aiosqlite
+
+# How often (in writes) the persisted table is pruned to max_entries
+PRUNE_EVERY = 100
+
+class ResponseCache:
+    """LRU + TTL cache of chat responses, optionally persisted to SQLite.
+
+    Entries map a hash of the exact messages sent to the model to the
+    (response_text, filtered) pair returned to the client. The in-memory LRU
+    is bounded by max_entries; with a persistence path, entries also survive
+    restarts and misses fall back to the SQLite table, which is also how
+    worker processes share responses.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 3600,
+        path: Optional[str] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self._clock = clock
+        self._entries: OrderedDict = OrderedDict()
+        self._db: Optional[aiosqlite.Connection] = None
+        self._open_lock = asyncio.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """Build a cache from RESPONSE_CACHE_* environment variables."""
+        return cls(
+            max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "1024")),
+            ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+            # Workers sharing SHARED_STATE_DB also share cached responses
+            path=os.getenv("RESPONSE_CACHE_DB") or os.getenv("SHARED_STATE_DB") or None
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def make_key(messages: List) -> str:
+        """Hash the rendered system prompt, trimmed history and user input."""
+        payload = json.dumps([(message.type, message.content) for message in messages])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def _connection(self) -> Optional[aiosqlite.Connection]:
+        if not self.path:
+            return None
+        async with self._open_lock:
+            if self._db is None:
+                db = await aiosqlite.connect(self.path)
+                await db.execute("PRAGMA journal_mode=WAL")
+                # Other worker processes may be writing the same file
+                await db.execute("PRAGMA busy_timeout=5000")
+                await db.execute("""
+                    CREATE TABLE IF NOT EXISTS response_cache (
+                        key TEXT PRIMARY KEY,
+                        response TEXT NOT NULL,
+                        filtered BOOLEAN NOT NULL,
+                        created_at REAL NOT NULL
+                    )
+                """)
+                await db.execute(
+                    "DELETE FROM response_cache WHERE created_at < ?",
+                    (self._clock() - self.ttl,)
+                )
+                await db.commit()
+                self._db = db
+        return self._db
+
+    async def get(self, key: str) -> Optional[tuple[str, bool]]:
+        """Return a fresh cached (response_text, filtered) pair, or None."""
+        if not self.enabled:
+            return None
+        now = self._clock()
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, created_at = entry
+            if now - created_at < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        db = await self._connection()
+        if db is not None:
+            async with db.execute(
+                "SELECT response, filtered, created_at FROM response_cache WHERE key = ?",
+                (key,)
+            ) as cursor:
+                row = await cursor.fetchone()
+            if row and now - row[2] < self.ttl:
+                value = (row[0], bool(row[1]))
+                self._remember(key, value, row[2])
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: tuple[str, bool]):
+        """Store a response, evicting the least recently used entries."""
+        if not self.enabled:
+            return
+        now = self._clock()
+        self._remember(key, value, now)
+
+        db = await self._connection()
+        if db is not None:
+            await db.execute(
+                "INSERT OR REPLACE INTO response_cache (key, response, filtered, created_at) VALUES (?, ?, ?, ?)",
+                (key, value[0], value[1], now)
+            )
+            self._writes += 1
+            if self._writes % PRUNE_EVERY == 0:
+                await db.execute(
+                    """DELETE FROM response_cache WHERE key NOT IN (
+                        SELECT key FROM response_cache ORDER BY created_at DESC LIMIT ?
+                    )""",
+                    (self.max_entries,)
+                )
+            await db.commit()
+
+    def _remember(self, key: str, value: tuple[str, bool], created_at: float):
+        self._entries[key] = (value, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and sizing, as reported on /health."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "persistent": bool(self.path)
+        }
+
+    async def close(self):
+        """Close the persistence connection if it was opened."""
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
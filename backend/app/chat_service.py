@@ -1,85 +1,178 @@
-import os
-import re
-from typing import List, Dict, Any
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
+import asyncio
+import time
+from typing import List, Dict, Any, AsyncIterator, Optional
+from langchain_core.messages import HumanMessage
+from .admission import AdmissionController, AdmissionRejected
+from .cache import ResponseCache
+from .history import HistoryWindow, estimate_tokens, message_tokens
+from .llm import create_llm
+from .metrics import LLM_COMPLETION_TOKENS, LLM_PROMPT_TOKENS, LLM_SECONDS, record, span
 from .models import ChatMode
-
-# Profanity filter for regular mode
-PROFANITY_WORDS = [
-    "damn", "hell", "shit", "fuck", "bitch", "ass", "bastard", "crap",
-    "piss", "cock", "dick", "pussy", "whore", "slut", "fag", "nigger",
-    "retard", "gay", "lesbian", "homo", "queer", "tranny"
-]
+from .prompts import SYSTEM_PROMPT_TEMPLATE, PromptCache
+from .resilience import UpstreamError, UpstreamPolicy
+from .semantic_cache import SemanticCache
+from .singleflight import SingleFlight
+from .warmup import OpeningPool
+from .validation import validate_persona
+from .profanity import PROFANITY_WORDS, StreamingProfanityFilter, profanity_filter
 
 class ChatService:
-    def __init__(self):
-        self.groq_api_key = os.getenv("GROQ_API_KEY")
-        if not self.groq_api_key:
-            raise ValueError("GROQ_API_KEY environment variable is required")
-        
-        self.llm = ChatGroq(
-            model="llama-3.1-8b-instant",
-            temperature=0.7,
-            groq_api_key=self.groq_api_key,
-            max_tokens=1024
-        )
+    def __init__(
+        self,
+        response_cache: Optional[ResponseCache] = None,
+        coalesce: bool = True,
+        admission: Optional[AdmissionController] = None,
+        llm: Any = None,
+        upstream: Optional[UpstreamPolicy] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        openings: Optional[OpeningPool] = None
+    ):
+        # Chat model from the LLM_BACKEND registry (Groq by default)
+        self.llm = llm if llm is not None else create_llm()
         
-        # Create prompt template
-        self.prompt_template = ChatPromptTemplate.from_messages([
-            ("system", self._get_system_prompt()),
-            ("human", "{user_input}")
-        ])
+        # Rendered system prompts per (persona, mode)
+        self.prompts = PromptCache()
         
-        self.chain = self.prompt_template | self.llm
-
-    def _get_system_prompt(self) -> str:
-        return """You are {persona}. 
+        # Token-budgeted conversation history
+        self.history = HistoryWindow.from_env()
+        
+        # Cache of responses to repeated persona/mode/history/message requests
+        self.response_cache = response_cache or ResponseCache.from_env()
+        
+        # Replies to near-identical opening messages per persona and mode
+        self.semantic_cache = semantic_cache or SemanticCache.from_env()
+        
+        # Pre-generated replies to greetings for the most used personas
+        self.openings = openings or OpeningPool.from_env(self.pregenerate, self.prompts.get)
+        
+        # Identical concurrent requests share one upstream call
+        self.inflight = SingleFlight() if coalesce else None
+        
+        # Bounds concurrency, rate and queueing of upstream calls
+        self.admission = admission or AdmissionController.from_env()
+        
+        # Timeouts, retries, hedging and circuit breaking of upstream calls
+        self.upstream = upstream or UpstreamPolicy.from_env()
 
-Mode: {mode}
+    async def close(self):
+        """Release resources held by the service"""
+        await self.response_cache.close()
+        self.admission.close()
 
-Instructions:
-- Stay completely in character as the persona described
-- Respond in a way that matches the persona's personality, speech patterns, and worldview
-- If in regular mode, keep responses family-friendly and appropriate
-- If in uncensored mode, you can be more creative and edgy while still being helpful
-- Make your responses engaging, entertaining, and true to the character
-- Don't break character or mention that you're an AI unless it's part of your persona
-- Keep responses conversational and not too long (2-3 sentences typically)
+    def _get_system_prompt(self) -> str:
+        return SYSTEM_PROMPT_TEMPLATE
 
-Remember: You ARE this persona, not an AI pretending to be them."""
+    def invalidate_persona(self, persona: str):
+        """Forget cached prompts for a persona that no longer exists"""
+        self.prompts.invalidate(persona)
+        self.semantic_cache.invalidate(persona)
+        self.openings.invalidate(persona)
 
     def _apply_profanity_filter(self, text: str) -> tuple[str, bool]:
         """Apply profanity filter to text. Returns (filtered_text, was_filtered)"""
-        original_text = text
-        filtered = False
-        
-        for word in PROFANITY_WORDS:
-            pattern = re.compile(re.escape(word), re.IGNORECASE)
-            if pattern.search(text):
-                filtered = True
-                # Replace with asterisks, keeping first and last letter
-                if len(word) > 2:
-                    replacement = word[0] + "*" * (len(word) - 2) + word[-1]
-                else:
-                    replacement = "*" * len(word)
-                text = pattern.sub(replacement, text)
-        
-        return text, filtered
+        with span("filter"):
+            return profanity_filter.filter(text)
 
     def _build_conversation_history(self, history: List[Dict[str, Any]], persona: str) -> List:
         """Build conversation history for context"""
-        messages = []
+        # Newest messages that fit the prompt token budget
+        with span("history"):
+            return self.history.build(history)
+
+    def _build_messages(
+        self,
+        user_input: str,
+        persona: str,
+        mode: ChatMode,
+        conversation_history: List[Dict[str, Any]]
+    ) -> List:
+        """Build the full message list sent to the model"""
+        # Rendered system prompt for this persona and mode
+        with span("prompt"):
+            messages = [self.prompts.get(persona, mode)]
         
-        for entry in history[-10:]:  # Keep last 10 messages for context
-            if entry.get("type") == "human":
-                messages.append(HumanMessage(content=entry["content"]))
-            elif entry.get("type") == "ai":
-                messages.append(AIMessage(content=entry["content"]))
+        # Add conversation history
+        history_messages = self._build_conversation_history(conversation_history, persona)
+        messages.extend(history_messages)
         
+        # Add current user input
+        messages.append(HumanMessage(content=user_input))
         return messages
 
+    def _observe_upstream(self, mode: ChatMode, messages: List, text: str, seconds: float, usage: Optional[dict] = None):
+        """Record latency and token counts of one upstream call"""
+        record("upstream", seconds)
+        LLM_SECONDS.observe(seconds, mode.value)
+        # Prefer the provider's usage report; estimate when it is missing
+        usage = usage or {}
+        LLM_PROMPT_TOKENS.observe(usage.get("input_tokens") or sum(message_tokens(m.content) for m in messages))
+        LLM_COMPLETION_TOKENS.observe(usage.get("output_tokens") or estimate_tokens(text))
+
+    def _semantic_key(self, user_input: str, persona: str, mode: ChatMode, history: List) -> Optional[tuple]:
+        """(persona, mode, message) for the semantic cache; only opening messages qualify"""
+        if history or not self.semantic_cache.enabled:
+            return None
+        return persona, mode, user_input
+
+    def _opening(self, user_input: str, persona: str, mode: ChatMode, history: List) -> Optional[tuple[str, bool]]:
+        """A pooled reply if this is a greeting opening a conversation"""
+        if history or not self.openings.enabled:
+            return None
+        with span("cache"):
+            return self.openings.take(persona, mode, user_input)
+
+    async def _generate(self, messages: List, mode: ChatMode) -> tuple[str, bool]:
+        """Call the model and filter the reply"""
+        queued = time.perf_counter()
+        async with self.admission.slot():
+            started = time.perf_counter()
+            record("admission", started - queued)
+            response = await self.upstream.call(lambda: self.llm.ainvoke(messages))
+        response_text = response.content
+        self._observe_upstream(
+            mode, messages, response_text, time.perf_counter() - started, getattr(response, "usage_metadata", None)
+        )
+        
+        # Apply profanity filter if in regular mode
+        filtered = False
+        if mode == ChatMode.REGULAR:
+            response_text, filtered = self._apply_profanity_filter(response_text)
+        return response_text, filtered
+
+    async def _generate_uncached(
+        self, messages: List, mode: ChatMode, cache_key: str, semantic_key: Optional[tuple] = None
+    ) -> tuple[str, bool]:
+        """Call the model and store the reply in the caches"""
+        response_text, filtered = await self._generate(messages, mode)
+        await self.response_cache.set(cache_key, (response_text, filtered))
+        if semantic_key:
+            self.semantic_cache.set(*semantic_key, (response_text, filtered))
+        return response_text, filtered
+
+    async def _cached(self, messages: List, semantic_key: Optional[tuple]) -> tuple[str, Optional[tuple[str, bool]]]:
+        """Return (cache key, cached reply): an exact repeat, else a near-identical opener"""
+        with span("cache"):
+            cache_key = ResponseCache.make_key(messages)
+            cached = await self.response_cache.get(cache_key)
+            if not cached and semantic_key:
+                cached = self.semantic_cache.get(*semantic_key)
+        return cache_key, cached
+
+    async def _respond(self, messages: List, mode: ChatMode, semantic_key: Optional[tuple] = None) -> tuple[str, bool]:
+        """Answer a built message list from the caches, an in-flight call or the model.
+
+        Raises AdmissionRejected or UpstreamError when no reply can be produced.
+        """
+        cache_key, cached = await self._cached(messages, semantic_key)
+        if cached:
+            return cached
+        
+        if self.inflight:
+            return await self.inflight.do(
+                cache_key, lambda: self._generate_uncached(messages, mode, cache_key, semantic_key)
+            )
+        return await self._generate_uncached(messages, mode, cache_key, semantic_key)
+
     async def generate_response(
         self, 
         user_input: str, 
@@ -87,63 +180,125 @@ Remember: You ARE this persona, not an AI pretending to be them."""
         mode: ChatMode,
         conversation_history: List[Dict[str, Any]] = None
     ) -> tuple[str, bool]:
-        """Generate a response using the ChatGroq model"""
+        """Generate a response using the configured chat model"""
         
         if conversation_history is None:
             conversation_history = []
         
+        opening = self._opening(user_input, persona, mode, conversation_history)
+        if opening:
+            return opening
+        
+        messages = self._build_messages(user_input, persona, mode, conversation_history)
+        return await self._respond(
+            messages, mode, self._semantic_key(user_input, persona, mode, conversation_history)
+        )
+
+    async def broadcast(
+        self,
+        user_input: str,
+        personas: List[str],
+        mode: ChatMode,
+        conversation_history: List[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Answer one message as several personas at once, yielding each reply as it completes"""
+        
+        # History and the user message are the same for every persona; build them once
+        shared = self._build_conversation_history(conversation_history or [], None)
+        shared.append(HumanMessage(content=user_input))
+        
+        async def reply(index: int, persona: str) -> Dict[str, Any]:
+            messages = [self.prompts.get(persona, mode)] + shared
+            try:
+                reply = self._opening(user_input, persona, mode, conversation_history)
+                if not reply:
+                    reply = await self._respond(
+                        messages, mode, self._semantic_key(user_input, persona, mode, conversation_history)
+                    )
+                response_text, filtered = reply
+            except AdmissionRejected as e:
+                return {"index": index, "status": 503, "detail": f"Chat service busy: {e.reason}", "retry_after": e.retry_after}
+            except UpstreamError as e:
+                return {"index": index, "status": e.status, "detail": f"Upstream LLM error: {e.reason}", "retry_after": e.retry_after}
+            return {"index": index, "response": response_text, "filtered": filtered}
+        
+        tasks = [asyncio.create_task(reply(i, persona)) for i, persona in enumerate(personas)]
         try:
-            # Format the prompt with persona and mode
-            mode_text = "regular (family-friendly)" if mode == ChatMode.REGULAR else "uncensored (creative)"
-            
-            # Create the full prompt
-            system_prompt = self._get_system_prompt().format(
-                persona=persona,
-                mode=mode_text
-            )
-            
-            # Build messages including conversation history
-            messages = [SystemMessage(content=system_prompt)]
-            
-            # Add conversation history
-            history_messages = self._build_conversation_history(conversation_history, persona)
-            messages.extend(history_messages)
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def stream_response(
+        self,
+        user_input: str,
+        persona: str,
+        mode: ChatMode,
+        conversation_history: List[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a response as token events followed by a final done event"""
+        
+        if conversation_history is None:
+            conversation_history = []
+        
+        stream_filter = None
+        if mode == ChatMode.REGULAR:
+            stream_filter = StreamingProfanityFilter()
+        
+        try:
+            messages = self._build_messages(user_input, persona, mode, conversation_history)
             
-            # Add current user input
-            messages.append(HumanMessage(content=user_input))
+            # A pooled or cached response is sent as a single token event
+            semantic_key = self._semantic_key(user_input, persona, mode, conversation_history)
+            cached = self._opening(user_input, persona, mode, conversation_history)
+            if not cached:
+                cache_key, cached = await self._cached(messages, semantic_key)
+            if cached:
+                yield {"type": "token", "content": cached[0]}
+                yield {"type": "done", "filtered": cached[1]}
+                return
             
-            # Generate response
-            response = await self.llm.ainvoke(messages)
-            response_text = response.content
+            parts = []
+            queued = time.perf_counter()
+            async with self.admission.slot():
+                started = time.perf_counter()
+                record("admission", started - queued)
+                async for chunk in self.upstream.stream(lambda: self.llm.astream(messages)):
+                    text = chunk.content
+                    if stream_filter:
+                        text = stream_filter.feed(text)
+                    if text:
+                        parts.append(text)
+                        yield {"type": "token", "content": text}
             
-            # Apply profanity filter if in regular mode
-            filtered = False
-            if mode == ChatMode.REGULAR:
-                response_text, filtered = self._apply_profanity_filter(response_text)
+            if stream_filter:
+                text = stream_filter.flush()
+                if text:
+                    parts.append(text)
+                    yield {"type": "token", "content": text}
             
-            return response_text, filtered
+            self._observe_upstream(mode, messages, "".join(parts), time.perf_counter() - started)
+            filtered = bool(stream_filter and stream_filter.filtered)
+            await self.response_cache.set(cache_key, ("".join(parts), filtered))
+            if semantic_key:
+                self.semantic_cache.set(*semantic_key, ("".join(parts), filtered))
+            yield {"type": "done", "filtered": filtered}
             
+        except AdmissionRejected as e:
+            yield {"type": "error", "status": 503, "detail": f"Chat service busy: {e.reason}", "retry_after": e.retry_after}
+        except UpstreamError as e:
+            yield {"type": "error", "status": e.status, "detail": f"Upstream LLM error: {e.reason}", "retry_after": e.retry_after}
         except Exception as e:
             error_msg = f"Error generating response: {str(e)}"
             if mode == ChatMode.REGULAR:
                 error_msg, _ = self._apply_profanity_filter(error_msg)
-            return error_msg, False
+            yield {"type": "error", "status": 500, "detail": error_msg}
+
+    async def pregenerate(self, persona: str, mode: ChatMode, user_input: str) -> tuple[str, bool]:
+        """Generate a first-turn reply for the opening pool, bypassing the caches"""
+        return await self._generate(self._build_messages(user_input, persona, mode, []), mode)
 
     def validate_persona(self, persona: str) -> bool:
         """Validate that persona description is appropriate"""
-        if not persona or len(persona.strip()) < 10:
-            return False
-        
-        # Check for inappropriate content in persona description
-        inappropriate_terms = [
-            "sexual", "explicit", "nsfw", "porn", "nude", "naked",
-            "violence", "kill", "murder", "suicide", "self-harm",
-            "illegal", "drugs", "weapons", "bomb", "terrorist"
-        ]
-        
-        persona_lower = persona.lower()
-        for term in inappropriate_terms:
-            if term in persona_lower:
-                return False
-        
-        return True
+        return validate_persona(persona)
@@ -2,10 +2,15 @@
 """
 Entry point script for starting the Faceless Agent backend server.
 """
-import uvicorn
+import argparse
+import asyncio
+import json
+import os
+import sys
 
 def main():
     """Start the FastAPI server in development mode."""
+    import uvicorn
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
@@ -13,14 +18,121 @@ def main():
         reload=True
     )
 
-def main_prod():
-    """Start the FastAPI server in production mode."""
+def _preload():
+    """One-time setup in the launcher, before any worker starts."""
+    from . import database
+    from .llm import create_llm
+
+    # Create the schema and seed the defaults once, so workers don't race to
+    asyncio.run(database.init_database())
+    try:
+        # Fail fast on a misconfigured LLM backend instead of in every worker
+        create_llm()
+    except ValueError as e:
+        print(f"Warning: {e}", file=sys.stderr)
+
+def main_prod(argv=None):
+    """Start the FastAPI server in production mode with worker processes."""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Run the API server with several worker processes")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument(
+        "--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "0")) or os.cpu_count() or 1,
+        help="worker processes (default: WEB_CONCURRENCY or the CPU count)"
+    )
+    parser.add_argument(
+        "--graceful-timeout", type=int, default=int(os.getenv("SHUTDOWN_TIMEOUT", "30")),
+        help="seconds in-flight requests get to finish on shutdown"
+    )
+    parser.add_argument(
+        "--shared-state", default=os.getenv("SHARED_STATE_DB", "shared_state.db"),
+        help="SQLite file for the response cache and rate limit shared by workers"
+    )
+    args = parser.parse_args(argv)
+
+    # Workers are fresh interpreters that size their limits from the environment
+    os.environ["WEB_CONCURRENCY"] = str(args.workers)
+    if args.workers > 1:
+        os.environ["SHARED_STATE_DB"] = args.shared_state
+    _preload()
+
+    import uvicorn
     uvicorn.run(
         "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=False
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        reload=False,
+        timeout_graceful_shutdown=args.graceful_timeout
     )
 
+def _read_chunks(path: str, size: int = 1 << 16):
+    stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+    try:
+        while chunk := stream.read(size):
+            yield chunk
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+async def _import(args) -> dict:
+    from . import database
+    from .bulk import import_personas, iter_lines
+
+    if args.database:
+        database.DATABASE_PATH = args.database
+    await database.init_database()
+    fmt = args.format or ("csv" if args.file.endswith(".csv") else "jsonl")
+    return await import_personas(iter_lines(_read_chunks(args.file)), fmt, batch_size=args.batch_size)
+
+def import_main(argv=None):
+    """Bulk-load personas from a JSONL or CSV file without the server."""
+    parser = argparse.ArgumentParser(description="Import custom personas from JSONL or CSV")
+    parser.add_argument("file", help="file to import, or - for stdin")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="defaults to the file extension")
+    parser.add_argument("--database", help="SQLite file (default: personas.db)")
+    parser.add_argument("--batch-size", type=int, default=500, help="rows per transaction")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(_import(args))
+    print(
+        f"{report['inserted']} inserted, {report['duplicates']} duplicates, "
+        f"{report['rejected']} rejected of {report['rows']} rows "
+        f"in {report['seconds']}s ({report['rows_per_second']} rows/s)",
+        file=sys.stderr
+    )
+    for error in report["errors"]:
+        print(json.dumps(error), file=sys.stderr)
+    return 0
+
+async def _export(args):
+    from . import database
+    from .bulk import export_personas
+
+    if args.database:
+        database.DATABASE_PATH = args.database
+    is_custom = {"all": None, "custom": True, "default": False}[args.personas]
+    out = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        async for chunk in export_personas(args.format, is_custom=is_custom):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+
+def export_main(argv=None):
+    """Export personas to JSONL or CSV without the server."""
+    parser = argparse.ArgumentParser(description="Export personas to JSONL or CSV")
+    parser.add_argument("--output", default="-", help="output file, or - for stdout")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    parser.add_argument("--personas", choices=["all", "custom", "default"], default="all")
+    parser.add_argument("--database", help="SQLite file (default: personas.db)")
+    args = parser.parse_args(argv)
+    asyncio.run(_export(args))
+    return 0
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
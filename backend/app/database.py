@@ -1,11 +1,36 @@
 import sqlite3
 import aiosqlite
-from typing import List, Optional
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 import asyncio
 import os
 
+from .metrics import timed
+from .pool import ConnectionPool
+from .sampler import PersonaSampler
+from .writer import WriteQueue
+
 DATABASE_PATH = "personas.db"
 
+# Number of pooled read connections
+POOL_READERS = int(os.getenv("DB_POOL_READERS", "4"))
+
+# Shared connection pool, opened in the app lifespan
+_pool: Optional[ConnectionPool] = None
+
+# Single writer task grouping persona inserts and deletes, started in the app lifespan
+_write_queue: Optional[WriteQueue] = None
+
+# In-memory persona id index used for random draws
+sampler = PersonaSampler()
+
+# Callbacks notified as callback(event, persona) after "added"/"deleted"
+_persona_listeners: List[Callable[[str, dict], None]] = []
+
+# Last persona_generation value this process has caught up with; other
+# processes writing the same file (workers, the import CLI) move it on
+_generation = 0
+
 # Default personas to preload
 DEFAULT_PERSONAS = [
     "A sassy AI chef who speaks in cooking metaphors and gets excited about ingredients",
@@ -40,72 +65,387 @@ DEFAULT_PERSONAS = [
     "A dramatic opera singer who communicates only in musical metaphors"
 ]
 
+# Stored in PRAGMA user_version once the schema and defaults are in place;
+# bump it when init_database gains tables
+SCHEMA_VERSION = 1
+
 async def init_database():
-    """Initialize the database and create tables if they don't exist."""
+    """Initialize the database and create tables if they don't exist.
+
+    An up-to-date file is only read (schema version, sampler), so startup
+    does no writes after the first run.
+    """
     async with aiosqlite.connect(DATABASE_PATH) as db:
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS personas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                description TEXT NOT NULL UNIQUE,
-                is_custom BOOLEAN DEFAULT FALSE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Check if we need to populate default personas
-        cursor = await db.execute("SELECT COUNT(*) FROM personas WHERE is_custom = FALSE")
-        count = await cursor.fetchone()
-        
-        if count[0] == 0:
-            # Insert default personas
-            for persona in DEFAULT_PERSONAS:
-                await db.execute(
-                    "INSERT OR IGNORE INTO personas (description, is_custom) VALUES (?, FALSE)",
-                    (persona,)
-                )
-        
-        await db.commit()
+        async with db.execute("PRAGMA user_version") as cursor:
+            version = (await cursor.fetchone())[0]
+        if version < SCHEMA_VERSION:
+            await _create_schema(db)
+        await load_sampler(db)
+        _record_generation(await _read_generation(db), own=False)
+
+async def _create_schema(db: aiosqlite.Connection):
+    """Create missing tables and seed the default personas if there are none."""
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS personas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            description TEXT NOT NULL UNIQUE,
+            is_custom BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Server-side conversation sessions (see sessions.py)
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            id TEXT PRIMARY KEY,
+            updated_at REAL NOT NULL
+        ) WITHOUT ROWID
+    """)
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS session_messages (
+            session_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            role INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            PRIMARY KEY (session_id, seq)
+        ) WITHOUT ROWID
+    """)
+    
+    # Bumped by every persona write so other processes notice changes
+    await db.execute("CREATE TABLE IF NOT EXISTS persona_generation (value INTEGER NOT NULL)")
+    await db.execute(
+        "INSERT INTO persona_generation (value) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM persona_generation)"
+    )
+    
+    # Check if we need to populate default personas
+    cursor = await db.execute("SELECT COUNT(*) FROM personas WHERE is_custom = FALSE")
+    count = await cursor.fetchone()
+    
+    if count[0] == 0:
+        # Insert default personas in one statement
+        await db.executemany(
+            "INSERT OR IGNORE INTO personas (description, is_custom) VALUES (?, FALSE)",
+            [(persona,) for persona in DEFAULT_PERSONAS]
+        )
+    
+    await db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    await db.commit()
+
+async def load_sampler(db: aiosqlite.Connection):
+    """Rebuild the persona sampler from the personas table."""
+    async with db.execute("SELECT id, is_custom FROM personas") as cursor:
+        rows = await cursor.fetchall()
+    sampler.load((row[0], bool(row[1])) for row in rows)
+
+async def open_pool(readers: int = POOL_READERS):
+    """Open the shared connection pool for DATABASE_PATH."""
+    global _pool
+    await close_pool()
+    pool = ConnectionPool(DATABASE_PATH, readers=readers)
+    await pool.open()
+    _pool = pool
+
+async def close_pool():
+    """Close the shared connection pool if it is open."""
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.close()
+
+@asynccontextmanager
+async def read_connection():
+    """Yield a connection for reads, pooled when the pool is open."""
+    if _pool is not None:
+        async with _pool.reader() as db:
+            yield db
+    else:
+        async with aiosqlite.connect(DATABASE_PATH) as db:
+            yield db
+
+@asynccontextmanager
+async def write_connection():
+    """Yield a connection for writes, the pool's writer when it is open."""
+    if _pool is not None:
+        async with _pool.writer() as db:
+            yield db
+    else:
+        async with aiosqlite.connect(DATABASE_PATH) as db:
+            yield db
+
+async def start_write_queue(queue: Optional[WriteQueue] = None) -> WriteQueue:
+    """Route add_custom_persona and delete_persona through a single writer task."""
+    global _write_queue
+    await stop_write_queue()
+    queue = queue or WriteQueue.from_env(_apply_persona_writes)
+    queue.start()
+    _write_queue = queue
+    return queue
+
+async def stop_write_queue():
+    """Finish queued writes and go back to writing from the caller."""
+    global _write_queue
+    if _write_queue is not None:
+        queue, _write_queue = _write_queue, None
+        await queue.close()
+
+def write_queue_stats() -> Optional[dict]:
+    return _write_queue.stats() if _write_queue is not None else None
+
+def add_persona_listener(callback: Callable[[str, dict], None]):
+    """Register a callback for persona changes, e.g. to invalidate caches."""
+    _persona_listeners.append(callback)
+
+def remove_persona_listener(callback: Callable[[str, dict], None]):
+    """Unregister a callback added with add_persona_listener."""
+    if callback in _persona_listeners:
+        _persona_listeners.remove(callback)
+
+def _notify(event: str, persona: dict):
+    for callback in list(_persona_listeners):
+        callback(event, persona)
+
+async def _read_generation(db: aiosqlite.Connection) -> int:
+    async with db.execute("SELECT value FROM persona_generation") as cursor:
+        row = await cursor.fetchone()
+    return row[0] if row else 0
+
+async def _bump_generation(db: aiosqlite.Connection) -> int:
+    """Count a persona write inside its transaction; returns the new generation."""
+    await db.execute("UPDATE persona_generation SET value = value + 1")
+    return await _read_generation(db)
+
+def _record_generation(value: int, own: bool = True):
+    """Note a generation as applied in this process.
+
+    For our own write that only holds if no other process wrote in between;
+    otherwise the next sync picks their change up.
+    """
+    global _generation
+    if not own or value == _generation + 1:
+        _generation = value
+
+async def sync_persona_changes() -> bool:
+    """Catch up with persona writes made by other processes.
 
+    Reloads the sampler and notifies listeners with a "reloaded" event if
+    the table changed behind this process's back; returns whether it had.
+    """
+    global _generation
+    async with read_connection() as db:
+        value = await _read_generation(db)
+        if value == _generation:
+            return False
+        _generation = value
+        await load_sampler(db)
+    _notify("reloaded", {})
+    return True
+
+async def watch_persona_changes(interval: float = 2.0):
+    """Run sync_persona_changes every interval seconds, until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await sync_persona_changes()
+        except Exception as e:
+            print(f"Warning: persona sync failed: {e}")
+
+@timed("db.get_persona")
+async def get_persona(persona_id: int) -> Optional[dict]:
+    """Get a single persona by id."""
+    async with read_connection() as db:
+        async with db.execute(
+            "SELECT id, description, is_custom FROM personas WHERE id = ?",
+            (persona_id,)
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row:
+            return {"id": row[0], "description": row[1], "is_custom": bool(row[2])}
+        return None
+
+@timed("db.get_personas")
+async def get_personas(persona_ids: List[int]) -> Dict[int, dict]:
+    """Get several personas by id in one query, keyed by id."""
+    if not persona_ids:
+        return {}
+    placeholders = ",".join("?" * len(persona_ids))
+    async with read_connection() as db:
+        async with db.execute(
+            f"SELECT id, description, is_custom FROM personas WHERE id IN ({placeholders})",
+            list(persona_ids)
+        ) as cursor:
+            rows = await cursor.fetchall()
+    return {row[0]: {"id": row[0], "description": row[1], "is_custom": bool(row[2])} for row in rows}
+
+@timed("db.get_all_personas")
 async def get_all_personas() -> List[dict]:
     """Get all personas from the database."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        cursor = await db.execute(
+    async with read_connection() as db:
+        async with db.execute(
             "SELECT id, description, is_custom FROM personas ORDER BY is_custom, id"
-        )
-        rows = await cursor.fetchall()
+        ) as cursor:
+            rows = await cursor.fetchall()
         return [
             {"id": row[0], "description": row[1], "is_custom": bool(row[2])}
             for row in rows
         ]
 
-async def get_random_persona() -> Optional[dict]:
-    """Get a random persona from the database."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        cursor = await db.execute(
-            "SELECT id, description, is_custom FROM personas ORDER BY RANDOM() LIMIT 1"
-        )
-        row = await cursor.fetchone()
-        if row:
-            return {"id": row[0], "description": row[1], "is_custom": bool(row[2])}
+def draw_persona_id(is_custom: Optional[bool] = None, custom_weight: Optional[float] = None) -> Optional[int]:
+    """Draw a persona id from the sampler without touching the database.
+
+    Returns None when the sampler is not loaded yet or has nothing to draw;
+    get_random_persona handles both.
+    """
+    if not sampler.loaded:
         return None
+    return sampler.sample(is_custom, custom_weight)
 
-async def add_custom_persona(description: str) -> dict:
-    """Add a custom persona to the database."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        cursor = await db.execute(
-            "INSERT INTO personas (description, is_custom) VALUES (?, TRUE)",
-            (description,)
-        )
+@timed("db.get_random_persona")
+async def get_random_persona(
+    is_custom: Optional[bool] = None,
+    custom_weight: Optional[float] = None
+) -> Optional[dict]:
+    """Get a random persona from the database.
+
+    Draws an id from the in-memory sampler and fetches that row by primary
+    key. is_custom limits the draw to default or custom personas and
+    custom_weight sets the probability of picking a custom one.
+    """
+    async with read_connection() as db:
+        if not sampler.loaded:
+            await load_sampler(db)
+        
+        while True:
+            persona_id = sampler.sample(is_custom, custom_weight)
+            if persona_id is None:
+                return None
+            async with db.execute(
+                "SELECT id, description, is_custom FROM personas WHERE id = ?",
+                (persona_id,)
+            ) as cursor:
+                row = await cursor.fetchone()
+            if row:
+                return {"id": row[0], "description": row[1], "is_custom": bool(row[2])}
+            # Changed behind the sampler's back (e.g. by another process)
+            await load_sampler(db)
+
+async def _apply_persona_writes(operations: List[Tuple]) -> List[Any]:
+    """Apply ("add", description) and ("delete", id) operations in one transaction.
+
+    Each operation runs in its own savepoint, so one that fails (such as a
+    duplicate description) is rolled back alone and its exception returned
+    in its place; the rest commit together with a single generation bump.
+    Returns the added persona, whether the persona was deleted, or the
+    exception, per operation.
+    """
+    results: List[Any] = []
+    changes = []
+    async with write_connection() as db:
+        await db.execute("BEGIN IMMEDIATE")
+        for kind, value in operations:
+            await db.execute("SAVEPOINT persona_write")
+            try:
+                if kind == "add":
+                    async with db.execute(
+                        "INSERT INTO personas (description, is_custom) VALUES (?, TRUE)",
+                        (value,)
+                    ) as cursor:
+                        persona = {"id": cursor.lastrowid, "description": value, "is_custom": True}
+                    changes.append(("added", persona))
+                    results.append(persona)
+                else:
+                    async with db.execute(
+                        "SELECT description FROM personas WHERE id = ? AND is_custom = TRUE",
+                        (value,)
+                    ) as cursor:
+                        row = await cursor.fetchone()
+                    if row:
+                        await db.execute("DELETE FROM personas WHERE id = ?", (value,))
+                        changes.append(("deleted", {"id": value, "description": row[0], "is_custom": True}))
+                    results.append(row is not None)
+                await db.execute("RELEASE persona_write")
+            except sqlite3.Error as e:
+                await db.execute("ROLLBACK TO persona_write")
+                await db.execute("RELEASE persona_write")
+                results.append(e)
+        if changes:
+            generation = await _bump_generation(db)
         await db.commit()
-        persona_id = cursor.lastrowid
-        return {"id": persona_id, "description": description, "is_custom": True}
+    if changes:
+        _record_generation(generation)
+    for event, persona in changes:
+        if event == "added":
+            sampler.add(persona["id"], is_custom=True)
+        else:
+            sampler.remove(persona["id"], is_custom=True)
+        _notify(event, persona)
+    return results
+
+async def _write_persona(kind: str, value: Any) -> Any:
+    if _write_queue is not None:
+        return await _write_queue.submit(kind, value)
+    result = (await _apply_persona_writes([(kind, value)]))[0]
+    if isinstance(result, Exception):
+        raise result
+    return result
 
+@timed("db.add_custom_persona")
+async def add_custom_persona(description: str) -> dict:
+    """Add a custom persona to the database.
+
+    Raises WriteQueueFull when the write queue is running and stays full.
+    """
+    return await _write_persona("add", description)
+
+@timed("db.delete_persona")
 async def delete_persona(persona_id: int) -> bool:
     """Delete a persona from the database (only custom personas can be deleted)."""
-    async with aiosqlite.connect(DATABASE_PATH) as db:
-        cursor = await db.execute(
-            "DELETE FROM personas WHERE id = ? AND is_custom = TRUE",
-            (persona_id,)
+    return await _write_persona("delete", persona_id)
+
+@timed("db.bulk_add_custom_personas")
+async def bulk_add_custom_personas(descriptions: List[str]) -> int:
+    """Insert custom personas in one transaction, skipping existing ones.
+
+    Returns the number of rows inserted; the rest already existed.
+    """
+    if not descriptions:
+        return 0
+    async with write_connection() as db:
+        # Take the write lock up front so other processes cannot insert
+        # between reading MAX(id) and committing
+        await db.execute("BEGIN IMMEDIATE")
+        async with db.execute("SELECT COALESCE(MAX(id), 0) FROM personas") as cursor:
+            last_id = (await cursor.fetchone())[0]
+        await db.executemany(
+            "INSERT OR IGNORE INTO personas (description, is_custom) VALUES (?, TRUE)",
+            [(description,) for description in descriptions]
         )
+        generation = await _bump_generation(db)
         await db.commit()
-        return cursor.rowcount > 0
+        _record_generation(generation)
+        # The transaction held the write lock, so every id above last_id is from this batch
+        async with db.execute(
+            "SELECT id FROM personas WHERE id > ? AND is_custom = TRUE", (last_id,)
+        ) as cursor:
+            new_ids = [row[0] for row in await cursor.fetchall()]
+        for persona_id in new_ids:
+            sampler.add(persona_id, is_custom=True)
+    if new_ids:
+        _notify("imported", {"ids": new_ids})
+    return len(new_ids)
+
+async def iter_personas(is_custom: Optional[bool] = None, batch_size: int = 1000) -> AsyncIterator[dict]:
+    """Yield personas in listing order without loading the whole table."""
+    query = "SELECT id, description, is_custom FROM personas"
+    params: tuple = ()
+    if is_custom is not None:
+        query += " WHERE is_custom = ?"
+        params = (is_custom,)
+    query += " ORDER BY is_custom, id"
+    async with read_connection() as db:
+        async with db.execute(query, params) as cursor:
+            while True:
+                rows = await cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield {"id": row[0], "description": row[1], "is_custom": bool(row[2])}
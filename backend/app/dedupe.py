@@ -0,0 +1,216 @@
+import asyncio
+import os
+import re
+import zlib
+from array import array
+from typing import Dict, List, Set, Tuple
+
+from .database import get_personas, iter_personas
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+# Added (per bin of distance) to a value borrowed when densifying an empty
+# bin, so borrowed values rarely equal genuine minima
+_DENSIFY_OFFSET = 0x9E3779B1
+
+def normalize(text: str) -> str:
+    """Lowercase text and collapse punctuation and whitespace to single spaces."""
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+def shingles(text: str, size: int = 3) -> Set[int]:
+    """Hashed character n-grams of the normalized text."""
+    text = normalize(text)
+    if len(text) <= size:
+        return {zlib.crc32(text.encode())}
+    return {zlib.crc32(text[i:i + size].encode()) for i in range(len(text) - size + 1)}
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+class NearDuplicateIndex:
+    """MinHash LSH index over persona descriptions for near-copy detection.
+
+    Each description becomes a set of hashed character shingles, sketched
+    with one-permutation MinHash: every shingle hash is routed to one of
+    `bins` bins by its low bits and each bin keeps its minimum, with empty
+    bins filled from their neighbours. That costs one hash per shingle
+    instead of one per shingle and permutation. Signatures are split into
+    bands, and a lookup only compares against personas sharing a band, so
+    it does not scan the table. Candidates are pre-screened on their
+    signatures and confirmed by exact shingle Jaccard similarity.
+
+    The index is filled from the database on first use (or by a startup
+    task) and kept current by persona listeners.
+    """
+
+    def __init__(self, threshold: float = 0.8, bins: int = 32, bands: int = 8, shingle_size: int = 3):
+        if bins & (bins - 1) or bins % bands:
+            raise ValueError("bins must be a power of two and a multiple of bands")
+        self.threshold = threshold
+        self.bins = bins
+        self.bands = bands
+        self.rows = bins // bands
+        self.shingle_size = shingle_size
+        # Low bits of a shingle hash pick its bin, the rest is its value
+        self._shift = bins.bit_length() - 1
+        self._signatures: Dict[int, array] = {}
+        self._buckets: Dict[int, object] = {}
+        self._lock = asyncio.Lock()
+        self.loaded = False
+        self.lookups = 0
+        self.candidates = 0
+
+    @classmethod
+    def from_env(cls) -> "NearDuplicateIndex":
+        """Build an index from PERSONA_DUPLICATE_THRESHOLD."""
+        return cls(threshold=float(os.getenv("PERSONA_DUPLICATE_THRESHOLD", "0.8")))
+
+    @property
+    def enabled(self) -> bool:
+        return 0 < self.threshold <= 1
+
+    def signature(self, grams: Set[int]) -> array:
+        """One-permutation MinHash signature with rotation densification."""
+        bins = self.bins
+        shift = self._shift
+        empty = 1 << 32
+        mins = [empty] * bins
+        for h in grams:
+            index = h & (bins - 1)
+            value = h >> shift
+            if value < mins[index]:
+                mins[index] = value
+        if empty in mins:
+            original = mins[:]
+            if original.count(empty) == bins:
+                return array("I", [0] * bins)
+            for i in range(bins):
+                if original[i] == empty:
+                    # Borrow from the next non-empty bin to the right, circularly
+                    distance = 1
+                    while original[(i + distance) % bins] == empty:
+                        distance += 1
+                    mins[i] = (original[(i + distance) % bins] + distance * _DENSIFY_OFFSET) & 0xFFFFFFFF
+        return array("I", mins)
+
+    def _band_keys(self, signature: array) -> List[int]:
+        rows = self.rows
+        return [hash((band, tuple(signature[band * rows:(band + 1) * rows]))) for band in range(self.bands)]
+
+    def add(self, persona_id: int, description: str):
+        """Index a persona (no-op if it is already indexed)."""
+        if persona_id in self._signatures:
+            return
+        signature = self.signature(shingles(description, self.shingle_size))
+        self._signatures[persona_id] = signature
+        for key in self._band_keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                self._buckets[key] = persona_id
+            elif isinstance(bucket, list):
+                bucket.append(persona_id)
+            else:
+                self._buckets[key] = [bucket, persona_id]
+
+    def remove(self, persona_id: int):
+        """Drop a persona from the index."""
+        signature = self._signatures.pop(persona_id, None)
+        if signature is None:
+            return
+        for key in self._band_keys(signature):
+            bucket = self._buckets.get(key)
+            if isinstance(bucket, list):
+                if persona_id in bucket:
+                    bucket.remove(persona_id)
+                if len(bucket) == 1:
+                    self._buckets[key] = bucket[0]
+            elif bucket == persona_id:
+                del self._buckets[key]
+
+    def invalidate(self):
+        """Forget everything; the next lookup reloads from the database."""
+        self._signatures.clear()
+        self._buckets.clear()
+        self.loaded = False
+
+    def on_persona_changed(self, event: str, persona: dict):
+        """Persona listener keeping the index in step with the table."""
+        if event == "added":
+            # Also while loading: the load may have read the table before this row
+            if self.loaded or self._lock.locked():
+                self.add(persona["id"], persona["description"])
+        elif event == "deleted":
+            self.remove(persona["id"])
+        elif event in ("imported", "reloaded"):
+            # Bulk imports only report ids, and changes made by other
+            # processes none at all; rebuild on the next lookup
+            self.invalidate()
+
+    async def ensure_loaded(self):
+        """Index every stored persona, once."""
+        if self.loaded or not self.enabled:
+            return
+        async with self._lock:
+            if self.loaded:
+                return
+            count = 0
+            async for persona in iter_personas():
+                self.add(persona["id"], persona["description"])
+                count += 1
+                if count % 1000 == 0:
+                    # Let requests run while a large table is indexed
+                    await asyncio.sleep(0)
+            self.loaded = True
+
+    def candidates_for(self, description: str) -> List[Tuple[int, float]]:
+        """Personas sharing a band with description, with estimated similarity."""
+        signature = self.signature(shingles(description, self.shingle_size))
+        found: Set[int] = set()
+        for key in self._band_keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                continue
+            if isinstance(bucket, list):
+                found.update(bucket)
+            else:
+                found.add(bucket)
+        estimates = []
+        for persona_id in found:
+            other = self._signatures[persona_id]
+            same = sum(1 for a, b in zip(signature, other) if a == b)
+            estimates.append((persona_id, same / self.bins))
+        return estimates
+
+    async def find(self, description: str, limit: int = 3) -> List[dict]:
+        """Stored personas at least threshold-similar to description, most similar first."""
+        if not self.enabled:
+            return []
+        await self.ensure_loaded()
+        self.lookups += 1
+
+        # Loose pre-screen on the signature estimate; exact check below
+        screen = max(0.0, self.threshold - 0.25)
+        candidates = [pid for pid, estimate in self.candidates_for(description) if estimate >= screen]
+        self.candidates += len(candidates)
+        if not candidates:
+            return []
+
+        grams = shingles(description, self.shingle_size)
+        matches = []
+        for persona in (await get_personas(candidates)).values():
+            similarity = jaccard(grams, shingles(persona["description"], self.shingle_size))
+            if similarity >= self.threshold:
+                matches.append({**persona, "similarity": round(similarity, 3)})
+        matches.sort(key=lambda m: m["similarity"], reverse=True)
+        return matches[:limit]
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "indexed": len(self._signatures),
+            "threshold": self.threshold,
+            "lookups": self.lookups,
+            "candidates_per_lookup": round(self.candidates / self.lookups, 2) if self.lookups else 0.0
+        }
@@ -0,0 +1,144 @@
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+# Pre-tokenization close to what BPE chat tokenizers do: words with their
+# leading space, numbers in groups of up to three digits, punctuation runs
+_PRETOKENIZE = re.compile(r"'(?:s|t|re|ve|m|ll|d)| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|\s+")
+
+# Chat formatting overhead per message (role markers, separators)
+MESSAGE_OVERHEAD = 4
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of text without loading a tokenizer.
+
+    Words count one token per ~6 letters and other pre-tokens one per ~4
+    characters, which tracks Llama-3 and cl100k-style tokenizers closely on
+    conversational English.
+    """
+    tokens = 0
+    for piece in _PRETOKENIZE.findall(text):
+        stripped = piece.strip()
+        if stripped.isalpha():
+            tokens += (len(stripped) + 5) // 6
+        else:
+            tokens += max(1, (len(stripped) + 3) // 4)
+    return tokens
+
+@lru_cache(maxsize=8192)
+def message_tokens(content: str) -> int:
+    """Estimated tokens of one chat message including its formatting.
+
+    Cached, since every turn of a conversation re-counts the same messages.
+    """
+    return estimate_tokens(content) + MESSAGE_OVERHEAD
+
+class HistoryWindow:
+    """Selects the conversation history that fits a prompt token budget.
+
+    Messages are taken from the newest backwards until the budget is used up.
+    With summarize enabled, older turns that no longer fit are replaced by a
+    short extractive summary; per-message summary lines are cached, so each
+    turn is only summarized once over the life of a conversation.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 1024,
+        max_messages: int = 0,
+        summarize: bool = False,
+        summary_budget: Optional[int] = None,
+        cache_size: int = 4096
+    ):
+        self.token_budget = token_budget
+        self.max_messages = max_messages
+        self.summarize = summarize
+        self.summary_budget = summary_budget if summary_budget is not None else token_budget // 4
+        self.cache_size = cache_size
+        self._lines: OrderedDict = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "HistoryWindow":
+        """Build a window from HISTORY_* environment variables."""
+        return cls(
+            token_budget=int(os.getenv("HISTORY_TOKEN_BUDGET", "1024")),
+            max_messages=int(os.getenv("HISTORY_MAX_MESSAGES", "0")),
+            summarize=os.getenv("HISTORY_SUMMARY", "false").lower() in ("1", "true", "yes")
+        )
+
+    def build(self, history: List[Dict[str, Any]]) -> List:
+        """Return the messages to send for this history, oldest first."""
+        entries = [e for e in history if e.get("type") in ("human", "ai")]
+        if self.max_messages:
+            entries = entries[-self.max_messages:]
+
+        budget = self.token_budget
+        if self.summarize and entries:
+            budget -= self.summary_budget
+
+        kept: List[Dict[str, Any]] = []
+        used = 0
+        for entry in reversed(entries):
+            cost = message_tokens(entry["content"])
+            if used + cost > budget:
+                break
+            kept.append(entry)
+            used += cost
+        kept.reverse()
+
+        messages: List = []
+        dropped = entries[:len(entries) - len(kept)]
+        if self.summarize and dropped:
+            summary = self._summary(dropped)
+            if summary:
+                messages.append(SystemMessage(content=summary))
+
+        for entry in kept:
+            if entry["type"] == "human":
+                messages.append(HumanMessage(content=entry["content"]))
+            else:
+                messages.append(AIMessage(content=entry["content"]))
+        return messages
+
+    def _summary(self, dropped: List[Dict[str, Any]]) -> str:
+        """Summarize dropped turns within the summary budget, newest kept."""
+        header = "Summary of the earlier conversation:"
+        used = message_tokens(header)
+        lines: List[str] = []
+        for entry in reversed(dropped):
+            line = self._line(entry)
+            cost = estimate_tokens(line) + 1
+            if used + cost > self.summary_budget:
+                break
+            lines.append(line)
+            used += cost
+        if not lines:
+            return ""
+        return "\n".join([header] + lines[::-1])
+
+    def _line(self, entry: Dict[str, Any]) -> str:
+        key = hashlib.sha1(f"{entry['type']}\0{entry['content']}".encode("utf-8")).digest()
+        line = self._lines.get(key)
+        if line is None:
+            speaker = "User" if entry["type"] == "human" else "You"
+            line = f"- {speaker}: {_first_sentence(entry['content'])}"
+            self._lines[key] = line
+            if len(self._lines) > self.cache_size:
+                self._lines.popitem(last=False)
+        else:
+            self._lines.move_to_end(key)
+        return line
+
+def _first_sentence(text: str, limit: int = 120) -> str:
+    """First sentence of text, cut to at most limit characters."""
+    text = " ".join(text.split())
+    match = re.search(r"[.!?](\s|$)", text)
+    sentence = text[:match.end()].strip() if match else text
+    if len(sentence) > limit:
+        sentence = sentence[:limit - 3].rstrip() + "..."
+    return sentence
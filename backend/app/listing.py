@@ -0,0 +1,137 @@
+import asyncio
+import base64
+import hashlib
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from .database import get_all_personas
+from .serialization import dumps
+
+class InvalidCursor(ValueError):
+    """Raised for a cursor that was not issued by this listing."""
+
+def encode_cursor(key: Tuple[int, int]) -> str:
+    """Opaque cursor for the last (is_custom, id) key of a page."""
+    return base64.urlsafe_b64encode(f"{key[0]}:{key[1]}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        is_custom, persona_id = raw.split(":")
+        return int(is_custom), int(persona_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+class PersonaPage:
+    """One serialized page of the persona listing."""
+
+    __slots__ = ("body", "etag", "next_cursor")
+
+    def __init__(self, body: bytes, next_cursor: Optional[str]):
+        self.body = body
+        self.next_cursor = next_cursor
+        self.etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+class PersonaListing:
+    """In-memory snapshot of the personas table for GET /personas.
+
+    Rows are kept in listing order (built-in first, then by id) with each
+    row pre-serialized to JSON, so a page is a bisect for the cursor plus a
+    byte join, without touching the database or Pydantic. Serialized pages
+    and their ETags are cached until the snapshot is invalidated by a
+    persona being added or deleted.
+    """
+
+    def __init__(self, max_pages: int = 256):
+        self.max_pages = max_pages
+        self.version = 0
+        self._rows: Optional[List[Tuple[Tuple[int, int], str, bytes]]] = None
+        self._keys: List[Tuple[int, int]] = []
+        self._pages: OrderedDict = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        """Drop the snapshot; the next request reloads it."""
+        self.version += 1
+        self._rows = None
+        self._pages.clear()
+
+    def on_persona_changed(self, event: str, persona: dict):
+        """Persona listener keeping the snapshot in step with the table."""
+        self.invalidate()
+
+    async def _snapshot(self) -> Tuple[list, list]:
+        """Return (rows, keys), loading the snapshot if needed."""
+        rows = self._rows
+        if rows is not None:
+            return rows, self._keys
+        async with self._lock:
+            if self._rows is None:
+                version = self.version
+                rows = []
+                for persona in await get_all_personas():
+                    key = (int(persona["is_custom"]), persona["id"])
+                    body = dumps(persona)
+                    rows.append((key, persona["description"].lower(), body))
+                keys = [row[0] for row in rows]
+                if version != self.version:
+                    # Changed while loading: serve this load once, keep no snapshot
+                    return rows, keys
+                self._rows, self._keys = rows, keys
+            return self._rows, self._keys
+
+    async def page(
+        self,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        is_custom: Optional[bool] = None,
+        search: Optional[str] = None
+    ) -> PersonaPage:
+        """Return the serialized page after cursor, filtered and limited."""
+        needle = search.lower() if search else None
+        cache_key = (cursor, limit, is_custom, needle)
+        cached = self._pages.get(cache_key)
+        if cached is not None:
+            self._pages.move_to_end(cache_key)
+            return cached
+
+        version = self.version
+        rows, keys = await self._snapshot()
+
+        # Keyset start: first row after the cursor key
+        start = bisect_right(keys, decode_cursor(cursor)) if cursor else 0
+        group = None
+        if is_custom is not None:
+            # Rows are grouped by is_custom, so the filter is a key range
+            group = int(is_custom)
+            start = max(start, bisect_right(keys, (group, -1)))
+
+        selected = []
+        last_key = None
+        more = False
+        for i in range(start, len(rows)):
+            key, description, body = rows[i]
+            if group is not None and key[0] != group:
+                break
+            if needle and needle not in description:
+                continue
+            if limit is not None and len(selected) == limit:
+                more = True
+                break
+            selected.append(body)
+            last_key = key
+
+        page = PersonaPage(b"[" + b",".join(selected) + b"]", encode_cursor(last_key) if more else None)
+        if version == self.version and self.max_pages > 0:
+            self._pages[cache_key] = page
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        return page
+
+    def stats(self) -> dict:
+        return {
+            "rows": len(self._rows) if self._rows is not None else None,
+            "cached_pages": len(self._pages),
+            "version": self.version
+        }
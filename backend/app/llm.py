@@ -0,0 +1,194 @@
+import asyncio
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from .cache import ResponseCache
+from .history import message_tokens
+
+# Backend name -> factory building the chat model from the environment
+LLM_BACKENDS: Dict[str, Callable[[], Any]] = {}
+
+def register_backend(name: str):
+    """Register a factory under name for LLM_BACKEND to select."""
+    def decorator(factory: Callable[[], Any]):
+        LLM_BACKENDS[name] = factory
+        return factory
+    return decorator
+
+def create_llm(name: Optional[str] = None):
+    """Build the chat model for name, or for the LLM_BACKEND environment variable.
+
+    A backend only needs the two methods ChatService calls: ``ainvoke`` and
+    ``astream`` over a list of LangChain messages.
+    """
+    name = name or os.getenv("LLM_BACKEND", "groq")
+    factory = LLM_BACKENDS.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown LLM backend {name!r}; choose one of {sorted(LLM_BACKENDS)}")
+    return factory()
+
+@register_backend("groq")
+def groq_backend():
+    """Groq hosted model; requires GROQ_API_KEY."""
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise ValueError("GROQ_API_KEY environment variable is required")
+
+    from langchain_groq import ChatGroq
+    return ChatGroq(
+        model=os.getenv("GROQ_MODEL", "llama-3.1-8b-instant"),
+        temperature=0.7,
+        groq_api_key=api_key,
+        max_tokens=1024,
+        # Retries and timeouts are handled by UpstreamPolicy (resilience.py)
+        max_retries=0
+    )
+
+class StubLLM:
+    """Local stand-in for a hosted model, for load tests and benchmarks.
+
+    Replies after latency seconds plus per_token seconds for every prompt
+    token (approximating prefill cost), and streams the reply word by word
+    at tokens_per_second (0 streams as fast as possible). Counts calls and
+    prompt tokens so callers can see how much upstream work was done.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.2,
+        reply: str = "Ahoy, matey! The seas be calm today.",
+        per_token: float = 0.0,
+        tokens_per_second: float = 0.0
+    ):
+        self.latency = latency
+        self.reply = reply
+        self.per_token = per_token
+        self.tokens_per_second = tokens_per_second
+        self.calls = 0
+        self.prompt_tokens = 0
+
+    @classmethod
+    def from_env(cls) -> "StubLLM":
+        """Build a stub from STUB_* environment variables."""
+        kwargs = {}
+        if os.getenv("STUB_REPLY"):
+            kwargs["reply"] = os.getenv("STUB_REPLY")
+        return cls(
+            latency=float(os.getenv("STUB_LATENCY", "0.2")),
+            per_token=float(os.getenv("STUB_PER_TOKEN", "0")),
+            tokens_per_second=float(os.getenv("STUB_TOKENS_PER_SECOND", "0")),
+            **kwargs
+        )
+
+    def _delay(self, messages) -> float:
+        tokens = sum(message_tokens(m.content) for m in messages)
+        self.prompt_tokens += tokens
+        return self.latency + tokens * self.per_token
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        delay = self._delay(messages)
+        if self.tokens_per_second:
+            delay += message_tokens(self.reply) / self.tokens_per_second
+        await asyncio.sleep(delay)
+        return AIMessage(content=self.reply)
+
+    async def astream(self, messages):
+        self.calls += 1
+        await asyncio.sleep(self._delay(messages))
+        words = self.reply.split(" ")
+        for i, word in enumerate(words):
+            text = word if i == 0 else " " + word
+            if self.tokens_per_second:
+                await asyncio.sleep(message_tokens(text) / self.tokens_per_second)
+            yield AIMessageChunk(content=text)
+
+@register_backend("stub")
+def stub_backend():
+    """Deterministic local stub configured by STUB_* variables."""
+    return StubLLM.from_env()
+
+class RecordReplayLLM:
+    """Serves responses recorded from another backend, keyed by prompt.
+
+    In record mode every reply of the wrapped model is appended to a JSONL
+    file keyed like the response cache (role and content of every message);
+    in replay mode those replies are served without the network. A prompt
+    that was never recorded raises LookupError, or goes to fallback if set.
+    """
+
+    def __init__(self, path: str, record: bool = False, inner: Any = None, fallback: Any = None):
+        if record and inner is None:
+            raise ValueError("Recording needs a backend to record from")
+        self.path = path
+        self.record = record
+        self.inner = inner
+        self.fallback = fallback
+        self.responses: Dict[str, str] = {}
+        self.misses = 0
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.responses[entry["key"]] = entry["content"]
+
+    def _save(self, key: str, content: str):
+        self.responses[key] = content
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"key": key, "content": content}) + "\n")
+
+    async def ainvoke(self, messages):
+        key = ResponseCache.make_key(messages)
+        if not self.record and key in self.responses:
+            return AIMessage(content=self.responses[key])
+
+        if self.record:
+            response = await self.inner.ainvoke(messages)
+            self._save(key, response.content)
+            return response
+
+        self.misses += 1
+        if self.fallback is None:
+            raise LookupError("No recorded response for this prompt")
+        return await self.fallback.ainvoke(messages)
+
+    async def astream(self, messages):
+        key = ResponseCache.make_key(messages)
+        if self.record:
+            parts: List[str] = []
+            async for chunk in self.inner.astream(messages):
+                parts.append(chunk.content)
+                yield chunk
+            self._save(key, "".join(parts))
+            return
+
+        if key in self.responses:
+            words = self.responses[key].split(" ")
+            for i, word in enumerate(words):
+                yield AIMessageChunk(content=word if i == 0 else " " + word)
+            return
+
+        self.misses += 1
+        if self.fallback is None:
+            raise LookupError("No recorded response for this prompt")
+        async for chunk in self.fallback.astream(messages):
+            yield chunk
+
+@register_backend("record")
+def record_backend():
+    """Record replies of LLM_RECORD_BACKEND (default groq) to LLM_RECORDING."""
+    inner = create_llm(os.getenv("LLM_RECORD_BACKEND", "groq"))
+    return RecordReplayLLM(os.getenv("LLM_RECORDING", "llm_recording.jsonl"), record=True, inner=inner)
+
+@register_backend("replay")
+def replay_backend():
+    """Replay LLM_RECORDING; unrecorded prompts go to LLM_REPLAY_FALLBACK if set."""
+    fallback = os.getenv("LLM_REPLAY_FALLBACK")
+    return RecordReplayLLM(
+        os.getenv("LLM_RECORDING", "llm_recording.jsonl"),
+        fallback=create_llm(fallback) if fallback else None
+    )
@@ -1,17 +1,52 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
+from fastapi.datastructures import Default
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from contextlib import asynccontextmanager
+import asyncio
+import importlib
+import json
 import os
+import time
+from typing import AsyncIterator, Dict, List, Optional
 from dotenv import load_dotenv
 
-from .database import init_database, get_random_persona, add_custom_persona, get_all_personas, delete_persona
-from .chat_service import ChatService
+from .database import (
+    init_database,
+    open_pool,
+    close_pool,
+    add_persona_listener,
+    remove_persona_listener,
+    get_persona,
+    get_personas,
+    get_random_persona,
+    draw_persona_id,
+    iter_personas,
+    add_custom_persona,
+    delete_persona,
+    start_write_queue,
+    stop_write_queue,
+    write_queue_stats,
+    watch_persona_changes
+)
+from .admission import AdmissionRejected
+from .resilience import UpstreamError
+from .writer import WriteQueueFull
+from . import metrics
+from .bulk import export_personas, import_personas, iter_lines
+from .dedupe import NearDuplicateIndex
+from .listing import InvalidCursor, PersonaListing
+from .serialization import FastJSONResponse, RawJSONResponse, dumps, model_response
+from .sessions import SessionStore
 from .models import (
     PersonaResponse, 
     CustomPersonaRequest, 
     ChatRequest, 
     ChatResponse, 
+    ChatBatchRequest,
+    ChatBatchItem,
+    ChatBatchResponse,
+    BroadcastRequest,
     ErrorResponse,
     ChatMode
 )
@@ -22,25 +57,159 @@ load_dotenv()
 # Initialize chat service
 chat_service = None
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Startup
-    global chat_service
-    await init_database()
+# Startup-optimized mode: build the chat service (and import the LLM stack)
+# on the first request that needs it instead of during startup
+LAZY_STARTUP = os.getenv("LAZY_STARTUP", "false").lower() in ("1", "true", "yes")
+chat_service_deferred = False
+chat_service_lock = asyncio.Lock()
+
+# Background job keeping the opening pool of the chat service full
+WARMUP_INTERVAL = float(os.getenv("WARMUP_INTERVAL", "60"))
+warmup_task = None
+
+# Set once startup has finished, for GET /health/ready
+ready = False
+startup_seconds = None
+
+# Server-side conversation sessions
+session_store = None
+
+# Snapshot of the personas table served by GET /personas
+persona_listing = PersonaListing()
+add_persona_listener(persona_listing.on_persona_changed)
+
+# Serialized /generate_persona bodies for the default personas, filled at
+# startup: defaults cannot be edited or deleted, so the bytes never go stale
+default_persona_bodies: Dict[int, bytes] = {}
+
+# Near-duplicate detection for new personas, filled in the background at startup
+duplicate_index = NearDuplicateIndex.from_env()
+add_persona_listener(duplicate_index.on_persona_changed)
+
+# Limits for /chat/batch
+BATCH_MAX_ITEMS = int(os.getenv("CHAT_BATCH_MAX_ITEMS", "1000"))
+BATCH_CONCURRENCY = int(os.getenv("CHAT_BATCH_CONCURRENCY", "8"))
+
+# Limit for /chat/broadcast
+BROADCAST_MAX_PERSONAS = int(os.getenv("CHAT_BROADCAST_MAX_PERSONAS", "32"))
+
+def on_persona_changed(event: str, persona: dict):
+    """Drop cached prompts of deleted personas."""
+    if event == "deleted" and chat_service:
+        chat_service.invalidate_persona(persona["description"])
+
+def build_chat_service():
+    """Construct the chat service; leaves it None if the LLM is not configured."""
+    global chat_service, warmup_task
+    # Imported here so importing the app does not load the LLM stack
+    from .chat_service import ChatService
     try:
         chat_service = ChatService()
+        add_persona_listener(on_persona_changed)
+        if chat_service.openings.enabled:
+            # Pre-generate greeting replies for the top personas in the background
+            warmup_task = asyncio.create_task(chat_service.openings.run(WARMUP_INTERVAL))
     except ValueError as e:
         print(f"Warning: {e}")
         print("Chat functionality will be limited without GROQ_API_KEY")
+
+async def ensure_chat_service():
+    """Build a deferred chat service on first use (LAZY_STARTUP)."""
+    global chat_service_deferred
+    if not chat_service_deferred:
+        return
+    async with chat_service_lock:
+        if chat_service_deferred:
+            with metrics.span("startup.chat_service"):
+                # Load the modules off the event loop, then construct on it
+                await asyncio.to_thread(importlib.import_module, "app.chat_service")
+                build_chat_service()
+            chat_service_deferred = False
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup
+    global chat_service, session_store, chat_service_deferred, ready, startup_seconds, warmup_task
+    started = time.perf_counter()
+    await init_database()
+    await open_pool()
+    # Persona inserts and deletes go through one writer task
+    await start_write_queue()
+    default_persona_bodies.clear()
+    async for persona in iter_personas(is_custom=False):
+        default_persona_bodies[persona["id"]] = dumps(persona)
+    session_store = SessionStore.from_env()
+    maintenance = asyncio.create_task(
+        session_store.run_maintenance(float(os.getenv("SESSION_MAINTENANCE_INTERVAL", "600")))
+    )
+    index_load = asyncio.create_task(duplicate_index.ensure_loaded())
+    # Pick up personas written by other workers or the import CLI
+    sync_interval = float(os.getenv("PERSONA_SYNC_INTERVAL", "2"))
+    persona_sync = asyncio.create_task(watch_persona_changes(sync_interval)) if sync_interval > 0 else None
+    if LAZY_STARTUP:
+        chat_service_deferred = True
+    else:
+        build_chat_service()
+    startup_seconds = time.perf_counter() - started
+    ready = True
     yield
     # Shutdown
-    pass
+    ready = False
+    chat_service_deferred = False
+    maintenance.cancel()
+    index_load.cancel()
+    if persona_sync:
+        persona_sync.cancel()
+    if warmup_task:
+        warmup_task.cancel()
+        warmup_task = None
+    session_store = None
+    if chat_service:
+        remove_persona_listener(on_persona_changed)
+        await chat_service.close()
+        chat_service = None
+    await stop_write_queue()
+    await close_pool()
+
+# Counters among the service stats; everything else is exported as a gauge
+COUNTER_STATS = {
+    "hits", "misses", "started", "shared", "admitted", "rejected",
+    "evictions", "served", "generated", "expired", "refills", "opened", "calls", "attempts", "retries", "timeouts", "failures", "hedges", "hedge_wins", "short_circuits"
+}
+
+def service_metrics() -> list:
+    """Cache, coalescing and admission stats of the chat service for /metrics."""
+    if not chat_service:
+        return []
+    sections = {
+        "response_cache": chat_service.response_cache.stats(),
+        "semantic_cache": chat_service.semantic_cache.stats(),
+        "openings": chat_service.openings.stats(),
+        "inflight": chat_service.inflight.stats() if chat_service.inflight else {},
+        "admission": chat_service.admission.stats(),
+        "upstream": chat_service.upstream.stats(),
+        "prompt_cache": chat_service.prompts.stats()
+    }
+    samples = []
+    for section, stats in sections.items():
+        for key, value in stats.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            if key in COUNTER_STATS:
+                samples.append((f"faceless_{section}_{key}_total", "counter", f"{section} {key}", value))
+            else:
+                samples.append((f"faceless_{section}_{key}", "gauge", f"{section} {key}", value))
+    return samples
+
+metrics.registry.add_collector(service_metrics)
 
 app = FastAPI(
     title="Faceless Agent API",
     description="A persona-shifting AI chat agent powered by Groq and LangChain",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # As a Default(), FastAPI still uses its own fast path for response_model routes
+    default_response_class=Default(FastJSONResponse)
 )
 
 # Configure CORS
@@ -50,51 +219,188 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "ETag", "X-Next-Cursor"],
 )
 
+# Per-request stage breakdown in the Server-Timing header
+app.add_middleware(metrics.ServerTimingMiddleware)
+
 @app.get("/")
 async def root():
     return {"message": "Faceless Agent API", "version": "1.0.0"}
 
+def chat_service_state() -> str:
+    if chat_service:
+        return "loaded"
+    return "deferred" if chat_service_deferred else "unavailable"
+
+@app.get("/health/live")
+async def liveness():
+    """The process is up and its event loop is responding."""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness(response: Response):
+    """Whether startup has finished and requests can be served (503 if not)."""
+    if not ready:
+        response.status_code = 503
+    return {
+        "status": "ready" if ready else "starting",
+        "chat_service": chat_service_state(),
+        "lazy_startup": LAZY_STARTUP,
+        "startup_seconds": round(startup_seconds, 4) if startup_seconds is not None else None
+    }
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "groq_configured": chat_service is not None}
+    return {
+        "status": "healthy",
+        "chat_service": chat_service_state(),
+        "groq_configured": chat_service is not None,
+        "llm_backend": type(chat_service.llm).__name__ if chat_service else None,
+        "response_cache": chat_service.response_cache.stats() if chat_service else None,
+        "semantic_cache": chat_service.semantic_cache.stats() if chat_service else None,
+        "openings": chat_service.openings.stats() if chat_service else None,
+        "inflight": chat_service.inflight.stats() if chat_service and chat_service.inflight else None,
+        "admission": chat_service.admission.stats() if chat_service else None,
+        "upstream": chat_service.upstream.stats() if chat_service else None,
+        "prompt_cache": chat_service.prompts.stats() if chat_service else None,
+        "persona_listing": persona_listing.stats(),
+        "duplicate_index": duplicate_index.stats(),
+        "write_queue": write_queue_stats()
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Histograms and service stats in Prometheus text format."""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/generate_persona", response_model=PersonaResponse)
-async def generate_persona():
-    """Generate a random persona from the database."""
+async def generate_persona(
+    is_custom: Optional[bool] = None,
+    custom_weight: Optional[float] = Query(None, ge=0, le=1)
+):
+    """Generate a random persona from the database.
+
+    ``is_custom`` limits the draw to default or custom personas;
+    ``custom_weight`` is the probability of drawing a custom persona.
+    """
     try:
-        persona = await get_random_persona()
+        persona_id = draw_persona_id(is_custom, custom_weight)
+        body = default_persona_bodies.get(persona_id)
+        if body is not None:
+            return RawJSONResponse(body)
+        persona = await get_persona(persona_id) if persona_id is not None else None
+        if not persona:
+            # Sampler not loaded yet, or the id was deleted by another process
+            persona = await get_random_persona(is_custom=is_custom, custom_weight=custom_weight)
         if not persona:
             raise HTTPException(status_code=404, detail="No personas found")
-        return PersonaResponse(**persona)
+        return model_response(PersonaResponse(**persona))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating persona: {str(e)}")
 
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches etag."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
 @app.get("/personas", response_model=list[PersonaResponse])
-async def list_personas():
-    """Get all personas from the database."""
+async def list_personas(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    is_custom: Optional[bool] = None,
+    search: Optional[str] = None
+):
+    """Get personas, optionally filtered and paginated.
+
+    Without ``limit`` every matching persona is returned. With it, the
+    ``X-Next-Cursor`` header carries the cursor of the next page. Responses
+    have an ETag; a matching ``If-None-Match`` gets 304 Not Modified.
+    """
     try:
-        personas = await get_all_personas()
-        return [PersonaResponse(**persona) for persona in personas]
+        page = await persona_listing.page(cursor=cursor, limit=limit, is_custom=is_custom, search=search)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching personas: {str(e)}")
+    
+    headers = {"ETag": page.etag, "Cache-Control": "no-cache"}
+    if page.next_cursor:
+        headers["X-Next-Cursor"] = page.next_cursor
+    if etag_matches(request.headers.get("if-none-match"), page.etag):
+        return Response(status_code=304, headers=headers)
+    return RawJSONResponse(page.body, headers=headers)
+
+@app.post("/personas/import")
+async def import_personas_endpoint(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format", pattern="^(jsonl|csv)$")
+):
+    """Bulk-import custom personas from a streamed JSONL or CSV request body.
+
+    Rows are validated like ``/add_persona``, deduplicated and inserted in
+    batched transactions. Returns counts, rows per second and the first
+    rejected rows.
+    """
+    if fmt is None:
+        fmt = "csv" if "csv" in request.headers.get("content-type", "") else "jsonl"
+    try:
+        return await import_personas(iter_lines(request.stream()), fmt)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error importing personas: {str(e)}")
+
+@app.get("/personas/export")
+async def export_personas_endpoint(
+    fmt: str = Query("jsonl", alias="format", pattern="^(jsonl|csv)$"),
+    is_custom: Optional[bool] = None
+):
+    """Stream all personas as JSONL or CSV."""
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        export_personas(fmt, is_custom=is_custom),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="personas.{fmt}"'}
+    )
+
+def write_queue_full(error: WriteQueueFull) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Too many persona changes queued. Please retry later.",
+        headers={"Retry-After": error.retry_after_header}
+    )
 
 @app.post("/add_persona", response_model=PersonaResponse)
 async def add_persona(request: CustomPersonaRequest):
     """Add a custom persona to the database."""
     try:
         # Validate persona description
+        await ensure_chat_service()
         if not chat_service or not chat_service.validate_persona(request.description):
             raise HTTPException(
                 status_code=400, 
                 detail="Invalid persona description. Must be at least 10 characters and appropriate content."
             )
         
+        # Reject near-copies of stored personas
+        similar = await duplicate_index.find(request.description, limit=1)
+        if similar:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Too similar to an existing persona (id {similar[0]['id']}): {similar[0]['description']}"
+            )
+        
         persona = await add_custom_persona(request.description)
-        return PersonaResponse(**persona)
+        return model_response(PersonaResponse(**persona))
     except HTTPException:
         raise
+    except WriteQueueFull as e:
+        raise write_queue_full(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error adding persona: {str(e)}")
 
@@ -111,46 +417,248 @@ async def delete_persona_endpoint(persona_id: int):
         return {"message": "Persona deleted successfully"}
     except HTTPException:
         raise
+    except WriteQueueFull as e:
+        raise write_queue_full(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting persona: {str(e)}")
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
-    """Generate a chat response using the specified persona and mode."""
+async def validate_chat_request(request: ChatRequest) -> str:
+    """Reject chat requests that cannot be served; return the persona description."""
+    await ensure_chat_service()
+    if not chat_service:
+        raise HTTPException(
+            status_code=503, 
+            detail="Chat service unavailable. Please configure GROQ_API_KEY."
+        )
+    
+    # Validate inputs
+    if not request.message.strip():
+        raise HTTPException(status_code=400, detail="Message cannot be empty")
+    
+    if request.persona_id is not None:
+        persona = await get_persona(request.persona_id)
+        if not persona:
+            raise HTTPException(status_code=404, detail="Persona not found")
+        return persona["description"]
+    
+    if not request.persona or not request.persona.strip():
+        raise HTTPException(status_code=400, detail="Persona cannot be empty")
+    return request.persona
+
+class SessionTurn:
+    """The history for one chat turn and the session it is recorded in."""
+
+    def __init__(self, session_id: Optional[str], history: List[dict], is_new: bool):
+        self.session_id = session_id
+        self.history = history
+        self.is_new = is_new
+
+    async def record(self, message: str, reply: str):
+        """Append this turn (and a new session's initial history) to the session."""
+        if not self.session_id:
+            return
+        entries = list(self.history) if self.is_new else []
+        entries += [{"type": "human", "content": message}, {"type": "ai", "content": reply}]
+        await session_store.append(self.session_id, entries)
+
+async def check_session(request: ChatRequest):
+    """Reject requests for sessions that do not exist."""
+    if request.session_id is None:
+        return
+    if not session_store:
+        raise HTTPException(status_code=503, detail="Sessions unavailable")
+    if await session_store.get_history(request.session_id) is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+@asynccontextmanager
+async def session_turn(request: ChatRequest) -> AsyncIterator[SessionTurn]:
+    """Resolve the history for a chat turn, holding the session's turn lock."""
+    if request.session_id is None:
+        history = request.conversation_history or []
+        session_id = session_store.new_id() if session_store else None
+        yield SessionTurn(session_id, history, is_new=True)
+        return
+    
+    await check_session(request)
+    async with session_store.turn(request.session_id):
+        history = await session_store.get_history(request.session_id)
+        yield SessionTurn(request.session_id, history or [], is_new=False)
+
+async def run_chat(request: ChatRequest) -> ChatResponse:
+    """Generate the reply to one chat request, raising HTTPException on failure."""
     try:
-        if not chat_service:
-            raise HTTPException(
-                status_code=503, 
-                detail="Chat service unavailable. Please configure GROQ_API_KEY."
-            )
-        
-        # Validate inputs
-        if not request.message.strip():
-            raise HTTPException(status_code=400, detail="Message cannot be empty")
-        
-        if not request.persona.strip():
-            raise HTTPException(status_code=400, detail="Persona cannot be empty")
+        persona = await validate_chat_request(request)
         
-        # Generate response
-        response_text, filtered = await chat_service.generate_response(
-            user_input=request.message,
-            persona=request.persona,
-            mode=request.mode,
-            conversation_history=request.conversation_history or []
-        )
+        async with session_turn(request) as turn:
+            # Generate response
+            response_text, filtered = await chat_service.generate_response(
+                user_input=request.message,
+                persona=persona,
+                mode=request.mode,
+                conversation_history=turn.history
+            )
+            await turn.record(request.message, response_text)
         
         return ChatResponse(
             response=response_text,
-            persona=request.persona,
+            persona=persona,
             mode=request.mode.value,
-            filtered=filtered
+            filtered=filtered,
+            persona_id=request.persona_id,
+            session_id=turn.session_id
         )
         
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Chat service busy: {e.reason}. Please retry later.",
+            headers={"Retry-After": e.retry_after_header}
+        )
+    except UpstreamError as e:
+        raise HTTPException(
+            status_code=e.status,
+            detail=f"Upstream LLM error: {e.reason}",
+            headers={"Retry-After": e.retry_after_header} if e.retry_after is not None else None
+        )
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating chat response: {str(e)}")
 
+@app.post("/chat", response_model=ChatResponse)
+async def chat(request: ChatRequest):
+    """Generate a chat response using the specified persona and mode."""
+    # Routing, body reading and request validation happen before we get here
+    metrics.mark_since_request("parse")
+    return model_response(await run_chat(request))
+
+async def run_batch_item(index: int, request: ChatRequest, limit: asyncio.Semaphore) -> ChatBatchItem:
+    """Run one batch item under the batch concurrency limit, capturing its error."""
+    async with limit:
+        try:
+            return ChatBatchItem(index=index, result=await run_chat(request))
+        except HTTPException as e:
+            return ChatBatchItem(index=index, status=e.status_code, error=e.detail)
+
+@app.post("/chat/batch")
+async def chat_batch(batch: ChatBatchRequest):
+    """Generate replies for many chat requests concurrently.
+
+    Items run at most ``CHAT_BATCH_CONCURRENCY`` at a time. Results come back
+    in request order, or with ``stream`` as NDJSON lines in completion order;
+    a failed item carries its own status and error instead of failing the batch.
+    """
+    if not batch.items:
+        raise HTTPException(status_code=400, detail="Batch cannot be empty")
+    if len(batch.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_ITEMS} items")
+    
+    concurrency = BATCH_CONCURRENCY
+    if batch.max_concurrency:
+        concurrency = max(1, min(concurrency, batch.max_concurrency))
+    limit = asyncio.Semaphore(concurrency)
+    
+    if not batch.stream:
+        results = await asyncio.gather(
+            *(run_batch_item(i, item, limit) for i, item in enumerate(batch.items))
+        )
+        failed = sum(1 for r in results if r.error is not None)
+        return model_response(ChatBatchResponse(results=results, succeeded=len(results) - failed, failed=failed))
+    
+    async def result_stream():
+        tasks = [asyncio.create_task(run_batch_item(i, item, limit)) for i, item in enumerate(batch.items)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                yield item.model_dump_json(exclude_none=True) + "\n"
+        finally:
+            # Client went away: stop the remaining items
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Stream a chat response as newline-delimited JSON events.
+
+    Emits ``token`` events as the model produces text, then a final ``done``
+    event carrying the ``filtered`` flag (or an ``error`` event).
+    """
+    metrics.mark_since_request("parse")
+    persona = await validate_chat_request(request)
+    await check_session(request)
+    
+    async def event_stream():
+        async with session_turn(request) as turn:
+            parts = []
+            async for event in chat_service.stream_response(
+                user_input=request.message,
+                persona=persona,
+                mode=request.mode,
+                conversation_history=turn.history
+            ):
+                if event["type"] == "token":
+                    parts.append(event["content"])
+                elif event["type"] == "done":
+                    await turn.record(request.message, "".join(parts))
+                    event.update(
+                        persona=persona,
+                        persona_id=request.persona_id,
+                        mode=request.mode.value,
+                        session_id=turn.session_id
+                    )
+                yield json.dumps(event) + "\n"
+    
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+@app.post("/chat/broadcast")
+async def chat_broadcast(request: BroadcastRequest):
+    """Answer one message as several personas in parallel.
+
+    Streams one NDJSON ``reply`` (or ``error``) event per persona as soon as
+    it completes, then a final ``done`` event, so total latency tracks the
+    slowest persona rather than the sum.
+    """
+    await ensure_chat_service()
+    if not chat_service:
+        raise HTTPException(
+            status_code=503, 
+            detail="Chat service unavailable. Please configure GROQ_API_KEY."
+        )
+    if not request.message.strip():
+        raise HTTPException(status_code=400, detail="Message cannot be empty")
+    
+    targets = []
+    found = await get_personas(request.persona_ids)
+    missing = [i for i in request.persona_ids if i not in found]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Persona not found: {missing}")
+    targets += [(i, found[i]["description"]) for i in request.persona_ids]
+    targets += [(None, persona) for persona in request.personas]
+    
+    if not targets:
+        raise HTTPException(status_code=400, detail="At least one persona is required")
+    if len(targets) > BROADCAST_MAX_PERSONAS:
+        raise HTTPException(status_code=413, detail=f"Broadcast exceeds {BROADCAST_MAX_PERSONAS} personas")
+    if any(not persona.strip() for _, persona in targets):
+        raise HTTPException(status_code=400, detail="Persona cannot be empty")
+    
+    async def event_stream():
+        async for result in chat_service.broadcast(
+            user_input=request.message,
+            personas=[persona for _, persona in targets],
+            mode=request.mode,
+            conversation_history=request.conversation_history or []
+        ):
+            persona_id, persona = targets[result["index"]]
+            event = {"type": "error" if "status" in result else "reply", **result}
+            event.update(persona=persona, persona_id=persona_id)
+            yield json.dumps(event) + "\n"
+        yield json.dumps({"type": "done", "count": len(targets), "mode": request.mode.value}) + "\n"
+    
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     return JSONResponse(
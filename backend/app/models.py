@@ -16,15 +16,42 @@ class CustomPersonaRequest(BaseModel):
 
 class ChatRequest(BaseModel):
     message: str
-    persona: str
+    persona: Optional[str] = None
+    persona_id: Optional[int] = None  # Refer to a stored persona instead of sending its description
     mode: ChatMode = ChatMode.REGULAR
     conversation_history: Optional[List[dict]] = []
+    session_id: Optional[str] = None  # Continue a server-side session instead of sending history
 
 class ChatResponse(BaseModel):
     response: str
     persona: str
     mode: str
     filtered: bool = False
+    persona_id: Optional[int] = None
+    session_id: Optional[str] = None
+
+class ChatBatchRequest(BaseModel):
+    items: List[ChatRequest]
+    stream: bool = False  # Stream NDJSON results as they complete instead of in order
+    max_concurrency: Optional[int] = None  # Lower the server's batch concurrency limit
+
+class ChatBatchItem(BaseModel):
+    index: int
+    status: int = 200
+    result: Optional[ChatResponse] = None
+    error: Optional[str] = None
+
+class ChatBatchResponse(BaseModel):
+    results: List[ChatBatchItem]
+    succeeded: int
+    failed: int
+
+class BroadcastRequest(BaseModel):
+    message: str
+    persona_ids: List[int] = []
+    personas: List[str] = []  # Descriptions, answered after persona_ids
+    mode: ChatMode = ChatMode.REGULAR
+    conversation_history: Optional[List[dict]] = []
 
 class ErrorResponse(BaseModel):
     error: str
@@ -0,0 +1,84 @@
+import asyncio
+import aiosqlite
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+# Pragmas applied to every pooled connection
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "temp_store": "MEMORY",
+    "cache_size": -8000,  # 8 MB page cache per connection
+    "mmap_size": 64 * 1024 * 1024,
+}
+
+class ConnectionPool:
+    """Long-lived SQLite connections: a bounded set of readers and one writer.
+
+    Connections stay open for the lifetime of the app, so the worker thread and
+    sqlite3's per-connection statement cache are reused across requests. WAL
+    mode lets readers run while the single writer commits.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        readers: int = 4,
+        pragmas: Optional[Dict[str, object]] = None,
+        cached_statements: int = 128
+    ):
+        self.path = path
+        self.size = max(1, readers)
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self.cached_statements = cached_statements
+        self._readers: asyncio.Queue = asyncio.Queue()
+        self._all_readers: List[aiosqlite.Connection] = []
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._write_lock = asyncio.Lock()
+
+    async def _connect(self, read_only: bool) -> aiosqlite.Connection:
+        db = await aiosqlite.connect(self.path, cached_statements=self.cached_statements)
+        for name, value in self.pragmas.items():
+            await db.execute(f"PRAGMA {name}={value}")
+        if read_only:
+            await db.execute("PRAGMA query_only=ON")
+        return db
+
+    async def open(self):
+        """Open the writer and all reader connections."""
+        # The writer goes first so WAL mode is set before readers attach
+        self._writer = await self._connect(read_only=False)
+        for _ in range(self.size):
+            db = await self._connect(read_only=True)
+            self._all_readers.append(db)
+            self._readers.put_nowait(db)
+
+    async def close(self):
+        """Close every connection in the pool."""
+        for db in self._all_readers:
+            await db.close()
+        self._all_readers.clear()
+        self._readers = asyncio.Queue()
+        if self._writer is not None:
+            await self._writer.close()
+            self._writer = None
+
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a read-only connection, waiting if all are in use."""
+        db = await self._readers.get()
+        try:
+            yield db
+        finally:
+            self._readers.put_nowait(db)
+
+    @asynccontextmanager
+    async def writer(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Hold the single writer connection; writes are serialized."""
+        async with self._write_lock:
+            try:
+                yield self._writer
+            except BaseException:
+                await self._writer.rollback()
+                raise
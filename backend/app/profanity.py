@@ -0,0 +1,151 @@
+import re
+from typing import Callable, List, Optional
+
+# Profanity filter for regular mode
+PROFANITY_WORDS = [
+    "damn", "hell", "shit", "fuck", "bitch", "ass", "bastard", "crap",
+    "piss", "cock", "dick", "pussy", "whore", "slut", "fag", "nigger",
+    "retard", "gay", "lesbian", "homo", "queer", "tranny"
+]
+
+# Inflections also masked in word-boundary mode ("fucking", "bitches")
+WORD_SUFFIXES = ["s", "es", "ed", "er", "ers", "ing", "in"]
+
+def _mask(match: re.Match) -> str:
+    """Replace a match with asterisks, keeping first and last letter."""
+    word = match.group(0)
+    if len(word) > 2:
+        return word[0] + "*" * (len(word) - 2) + word[-1]
+    return "*" * len(word)
+
+def _trie_pattern(words: List[str]) -> str:
+    """Build a regex alternation factored by common prefixes.
+
+    "bitch|bastard" becomes "b(?:astard|itch)", so the regex engine rejects a
+    position after one character comparison instead of trying every word.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word.lower():
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        is_word_end = "" in node
+        if len(branches) == 1 and not is_word_end:
+            return branches[0]
+        # Optional group is greedy, so longer words still win
+        return "(?:" + "|".join(branches) + ")" + ("?" if is_word_end else "")
+
+    return build(trie)
+
+class ProfanityFilter:
+    """Precompiled single-pass profanity filter.
+
+    All words are compiled into one case-insensitive, prefix-factored
+    alternation, so a text is scanned once regardless of the word count. In
+    word-boundary mode only whole words (plus common inflections) match, so
+    "class" and "hello" are left alone; otherwise any substring matches.
+    """
+
+    def __init__(self, words: List[str], word_boundary: bool = True, suffixes: Optional[List[str]] = None):
+        self.words = list(words)
+        self.word_boundary = word_boundary
+        alternation = _trie_pattern(self.words)
+        if word_boundary:
+            suffixes = WORD_SUFFIXES if suffixes is None else suffixes
+            suffix_group = f"(?:{_trie_pattern(suffixes)})?" if suffixes else ""
+            pattern = rf"\b(?:{alternation}){suffix_group}\b"
+            self.max_match_len = max(map(len, self.words)) + max(map(len, suffixes), default=0)
+        else:
+            pattern = alternation
+            self.max_match_len = max(map(len, self.words))
+        self._pattern = re.compile(pattern, re.IGNORECASE)
+
+    def filter(self, text: str) -> tuple[str, bool]:
+        """Mask every match in one pass. Returns (filtered_text, was_filtered)"""
+        text, count = self._pattern.subn(_mask, text)
+        return text, count > 0
+
+    def batch_filter(self, texts: List[str]) -> List[tuple[str, bool]]:
+        """Filter many texts, skipping per-text work when none of them match."""
+        # Words never contain a newline, so matches cannot span the separator
+        if not self._pattern.search("\n".join(texts)):
+            return [(text, False) for text in texts]
+        return [self.filter(text) for text in texts]
+
+    def spans(self, text: str) -> List[tuple[int, int]]:
+        """Return (start, end) spans of every match in text."""
+        return [match.span() for match in self._pattern.finditer(text)]
+
+# Shared filter, compiled once at import
+profanity_filter = ProfanityFilter(PROFANITY_WORDS)
+
+def batch_filter(texts: List[str]) -> List[tuple[str, bool]]:
+    """Filter a list of texts with the shared profanity filter."""
+    return profanity_filter.batch_filter(texts)
+
+class StreamingProfanityFilter:
+    """Incremental profanity filter for streamed responses.
+
+    Text is held back until no filtered word can still be completed by a later
+    chunk, so a word split across chunks is masked exactly as it would be in
+    the full response.
+    """
+
+    def __init__(
+        self,
+        apply_filter: Optional[Callable[[str], tuple[str, bool]]] = None,
+        find_spans: Optional[Callable[[str], List[tuple[int, int]]]] = None,
+        hold: Optional[int] = None,
+        engine: ProfanityFilter = profanity_filter
+    ):
+        self._apply_filter = apply_filter or engine.filter
+        self._find_spans = find_spans or engine.spans
+        # One extra character so a word-boundary match is never decided early
+        self._hold = hold if hold is not None else engine.max_match_len + 1
+        self._context = ""
+        self._pending = ""
+        self.filtered = False
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk and return the text that is now safe to emit."""
+        self._pending += chunk
+        return self._drain(final=False)
+
+    def flush(self) -> str:
+        """Return whatever text is still held back at the end of the stream."""
+        return self._drain(final=True)
+
+    def _drain(self, final: bool) -> str:
+        # The last emitted character is kept as context for word boundaries
+        text = self._context + self._pending
+        offset = len(self._context)
+        cut = len(text) if final else len(text) - self._hold
+        if cut <= offset:
+            return ""
+
+        # Never emit part of a match while the rest of it is still held back
+        spans = self._find_spans(text)
+        moved = True
+        while moved:
+            moved = False
+            for start, end in spans:
+                if start < cut < end:
+                    cut = start
+                    moved = True
+        if cut <= offset:
+            return ""
+
+        masked, _ = self._apply_filter(text)
+        emitted = masked[offset:cut]
+        if emitted != text[offset:cut]:
+            self.filtered = True
+
+        self._context = text[cut - 1:cut]
+        self._pending = text[cut:]
+        return emitted
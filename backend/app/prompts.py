@@ -0,0 +1,71 @@
+import os
+from collections import OrderedDict
+from typing import Optional
+
+from langchain_core.messages import SystemMessage
+from .models import ChatMode
+
+SYSTEM_PROMPT_TEMPLATE = """You are {persona}. 
+
+Mode: {mode}
+
+Instructions:
+- Stay completely in character as the persona described
+- Respond in a way that matches the persona's personality, speech patterns, and worldview
+- If in regular mode, keep responses family-friendly and appropriate
+- If in uncensored mode, you can be more creative and edgy while still being helpful
+- Make your responses engaging, entertaining, and true to the character
+- Don't break character or mention that you're an AI unless it's part of your persona
+- Keep responses conversational and not too long (2-3 sentences typically)
+
+Remember: You ARE this persona, not an AI pretending to be them."""
+
+MODE_TEXT = {
+    ChatMode.REGULAR: "regular (family-friendly)",
+    ChatMode.UNCENSORED: "uncensored (creative)",
+}
+
+def render_system_prompt(persona: str, mode: ChatMode) -> str:
+    """Render the system prompt for a persona and mode."""
+    return SYSTEM_PROMPT_TEMPLATE.format(persona=persona, mode=MODE_TEXT[mode])
+
+class PromptCache:
+    """LRU cache of rendered system messages keyed by (persona, mode)."""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        if max_entries is None:
+            max_entries = int(os.getenv("PROMPT_CACHE_SIZE", "512"))
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, persona: str, mode: ChatMode) -> SystemMessage:
+        """Return the rendered SystemMessage, rendering it on a miss."""
+        key = (persona, mode)
+        message = self._entries.get(key)
+        if message is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return message
+
+        self.misses += 1
+        message = SystemMessage(content=render_system_prompt(persona, mode))
+        if self.max_entries > 0:
+            self._entries[key] = message
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return message
+
+    def invalidate(self, persona: str):
+        """Drop the cached prompts of a persona in every mode."""
+        for mode in ChatMode:
+            self._entries.pop((persona, mode), None)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "max_entries": self.max_entries
+        }
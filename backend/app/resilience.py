@@ -0,0 +1,340 @@
+import asyncio
+import math
+import os
+import random
+import time
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# HTTP statuses from the provider worth another attempt
+RETRYABLE_STATUSES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+# Latency samples needed before hedging uses the observed percentile
+MIN_HEDGE_SAMPLES = 20
+
+class UpstreamError(Exception):
+    """Raised when the upstream LLM could not produce a reply.
+
+    status is the HTTP status the API answers with: 502 for upstream
+    failures, 504 for timeouts and 503 (with retry_after) while the
+    circuit is open or the provider is rate limiting us.
+    """
+
+    def __init__(self, reason: str, status: int = 502, retry_after: Optional[float] = None):
+        super().__init__(reason)
+        self.reason = reason
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> Optional[str]:
+        """Retry-After value in whole seconds, if there is one."""
+        if self.retry_after is None:
+            return None
+        return str(max(1, math.ceil(self.retry_after)))
+
+def error_status(error: BaseException) -> Optional[int]:
+    """HTTP status carried by a provider error, if any."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether another attempt could succeed: timeouts, connection errors, 429 and 5xx."""
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = error_status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    # Client libraries name their transport errors consistently enough
+    name = type(error).__name__
+    return "Timeout" in name or "Connection" in name
+
+class CircuitBreaker:
+    """Fails upstream calls fast after repeated failures.
+
+    Closed, it counts consecutive failed attempts; at failure_threshold it
+    opens and rejects calls for reset_timeout seconds. Then it is half-open:
+    one probe call is let through, and its outcome closes or re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opened = 0
+        self._probing = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_threshold > 0
+
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a probe through."""
+        return max(0.0, self.opened_at + self.reset_timeout - self._clock())
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now."""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if self.retry_after() > 0:
+                return False
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self._probing = False
+        self.state = self.CLOSED
+
+    def record_cancel(self):
+        """An allowed call was cancelled before it finished; let another probe."""
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.enabled and (self.state == self.HALF_OPEN or self.failures >= self.failure_threshold):
+            if self.state != self.OPEN:
+                self.opened += 1
+            self.state = self.OPEN
+            self.opened_at = self._clock()
+
+class UpstreamPolicy:
+    """Timeouts, retries, hedging and a circuit breaker around upstream LLM calls.
+
+    Every attempt gets timeout seconds. Retryable failures are tried again
+    up to retries times after a jittered exponential backoff ("full
+    jitter": a random delay up to backoff * 2**attempt, capped at
+    max_backoff). With hedging on, an attempt that is still running after
+    the hedge delay (hedge_after seconds, or the observed latency
+    percentile) gets a second identical request and the first reply wins;
+    hedges are capped at hedge_budget of calls so a slow upstream is not
+    sent twice the traffic. The circuit breaker counts failed attempts.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 30.0,
+        retries: int = 2,
+        backoff: float = 0.2,
+        max_backoff: float = 2.0,
+        hedge: bool = False,
+        hedge_after: Optional[float] = None,
+        hedge_percentile: float = 0.95,
+        hedge_budget: float = 0.1,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge = hedge
+        self.hedge_after = hedge_after
+        self.hedge_percentile = hedge_percentile
+        self.hedge_budget = hedge_budget
+        self.breaker = breaker or CircuitBreaker()
+        self._latencies: deque = deque(maxlen=512)
+        self.calls = 0
+        self.attempts = 0
+        self.retried = 0
+        self.timeouts = 0
+        self.failed = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.short_circuits = 0
+
+    @classmethod
+    def from_env(cls) -> "UpstreamPolicy":
+        """Build a policy from LLM_* environment variables.
+
+        LLM_HEDGE is "off" (default), "p95"-style for the observed latency
+        percentile, or a fixed delay in seconds.
+        """
+        hedge = os.getenv("LLM_HEDGE", "off").strip().lower()
+        hedge_after = None
+        hedge_percentile = 0.95
+        if hedge.startswith("p"):
+            hedge_percentile = float(hedge[1:]) / 100
+        elif hedge not in ("off", "", "0"):
+            hedge_after = float(hedge)
+        return cls(
+            timeout=float(os.getenv("LLM_TIMEOUT", "30")),
+            retries=int(os.getenv("LLM_RETRIES", "2")),
+            backoff=float(os.getenv("LLM_RETRY_BACKOFF", "0.2")),
+            max_backoff=float(os.getenv("LLM_RETRY_MAX_BACKOFF", "2")),
+            hedge=hedge not in ("off", "", "0"),
+            hedge_after=hedge_after,
+            hedge_percentile=hedge_percentile,
+            hedge_budget=float(os.getenv("LLM_HEDGE_BUDGET", "0.1")),
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+                reset_timeout=float(os.getenv("LLM_BREAKER_RESET", "30"))
+            )
+        )
+
+    def _check_circuit(self):
+        if not self.breaker.allow():
+            self.short_circuits += 1
+            raise UpstreamError("upstream unavailable (circuit open)", 503, self.breaker.retry_after())
+
+    def _hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging this attempt, or None not to."""
+        if not self.hedge or self.hedges >= self.hedge_budget * max(1, self.calls):
+            return None
+        if self.hedge_after is not None:
+            return self.hedge_after
+        if len(self._latencies) < MIN_HEDGE_SAMPLES:
+            return None
+        latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * self.hedge_percentile))]
+
+    async def _attempt(self, call: Callable[[], Awaitable[T]]) -> T:
+        """One attempt, possibly hedged, within the attempt timeout."""
+        started = time.monotonic()
+        delay = self._hedge_delay()
+        first = asyncio.ensure_future(call())
+        tasks = {first}
+        try:
+            if delay is not None and delay < self.timeout:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    self.hedges += 1
+                    tasks.add(asyncio.ensure_future(call()))
+            deadline = started + self.timeout
+            error: Optional[BaseException] = None
+            while tasks:
+                done, _ = await asyncio.wait(
+                    tasks, timeout=max(0.0, deadline - time.monotonic()), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise asyncio.TimeoutError()
+                for task in done:
+                    tasks.discard(task)
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        self._latencies.append(time.monotonic() - started)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _failure(self, error: BaseException) -> UpstreamError:
+        self.failed += 1
+        if isinstance(error, asyncio.TimeoutError):
+            return UpstreamError(f"upstream timed out after {self.timeout:g}s", 504)
+        status = error_status(error)
+        if status == 429:
+            return UpstreamError("upstream rate limited", 503, self.backoff)
+        return UpstreamError(f"upstream error: {error}", 502)
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    async def call(self, call: Callable[[], Awaitable[T]]) -> T:
+        """Run call() with timeouts, retries, hedging and the breaker.
+
+        Raises UpstreamError once it gives up.
+        """
+        self.calls += 1
+        for attempt in range(self.retries + 1):
+            self._check_circuit()
+            self.attempts += 1
+            try:
+                result = await self._attempt(call)
+            except asyncio.CancelledError:
+                self.breaker.record_cancel()
+                raise
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    self.timeouts += 1
+                self.breaker.record_failure()
+                if attempt == self.retries or not is_retryable(e):
+                    raise self._failure(e) from e
+                self.retried += 1
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            self.breaker.record_success()
+            return result
+
+    async def stream(self, open_stream: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """Iterate open_stream() with the breaker, retrying until the first chunk.
+
+        Once a chunk has been passed on the stream cannot be restarted, so
+        later failures are raised as UpstreamError without a retry. The
+        timeout applies to the first chunk.
+        """
+        self.calls += 1
+        for attempt in range(self.retries + 1):
+            self._check_circuit()
+            self.attempts += 1
+            stream = open_stream()
+            started = time.monotonic()
+            try:
+                first = await asyncio.wait_for(stream.__anext__(), self.timeout)
+            except asyncio.CancelledError:
+                self.breaker.record_cancel()
+                await stream.aclose()
+                raise
+            except StopAsyncIteration:
+                self.breaker.record_success()
+                return
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    self.timeouts += 1
+                self.breaker.record_failure()
+                await stream.aclose()
+                if attempt == self.retries or not is_retryable(e):
+                    raise self._failure(e) from e
+                self.retried += 1
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            self._latencies.append(time.monotonic() - started)
+            break
+
+        try:
+            yield first
+            async for chunk in stream:
+                yield chunk
+        except Exception as e:
+            self.breaker.record_failure()
+            raise self._failure(e) from e
+        finally:
+            await stream.aclose()
+        self.breaker.record_success()
+
+    def stats(self) -> dict:
+        """Attempt, retry, hedge and breaker counters, for /health and /metrics."""
+        return {
+            "state": self.breaker.state,
+            "circuit_open": int(self.breaker.state == CircuitBreaker.OPEN),
+            "consecutive_failures": self.breaker.failures,
+            "opened": self.breaker.opened,
+            "calls": self.calls,
+            "attempts": self.attempts,
+            "retries": self.retried,
+            "timeouts": self.timeouts,
+            "failures": self.failed,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "short_circuits": self.short_circuits,
+            "timeout": self.timeout
+        }
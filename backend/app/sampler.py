@@ -0,0 +1,79 @@
+import random
+from array import array
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+class PersonaSampler:
+    """In-memory index of persona ids for constant-time random draws.
+
+    Default and custom persona ids are kept in two compact int64 arrays.
+    Deletions are recorded as tombstones and skipped when drawn; an array is
+    compacted once half of it is tombstoned, so draws stay O(1) on average.
+    """
+
+    def __init__(self):
+        self._ids: Dict[bool, array] = {False: array("q"), True: array("q")}
+        self._removed: Dict[bool, Set[int]] = {False: set(), True: set()}
+        self.loaded = False
+
+    def load(self, rows: Iterable[Tuple[int, bool]]):
+        """Replace the index with (id, is_custom) rows."""
+        ids = {False: array("q"), True: array("q")}
+        for persona_id, is_custom in rows:
+            ids[bool(is_custom)].append(persona_id)
+        self._ids = ids
+        self._removed = {False: set(), True: set()}
+        self.loaded = True
+
+    def count(self, is_custom: Optional[bool] = None) -> int:
+        """Number of live ids, optionally only defaults or customs."""
+        if is_custom is None:
+            return self.count(False) + self.count(True)
+        return len(self._ids[is_custom]) - len(self._removed[is_custom])
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def add(self, persona_id: int, is_custom: bool):
+        """Index a newly inserted persona."""
+        self._ids[bool(is_custom)].append(persona_id)
+
+    def remove(self, persona_id: int, is_custom: bool = True):
+        """Tombstone a deleted persona."""
+        is_custom = bool(is_custom)
+        self._removed[is_custom].add(persona_id)
+        if len(self._removed[is_custom]) * 2 > len(self._ids[is_custom]):
+            self._compact(is_custom)
+
+    def _compact(self, is_custom: bool):
+        removed = self._removed[is_custom]
+        self._ids[is_custom] = array("q", (i for i in self._ids[is_custom] if i not in removed))
+        self._removed[is_custom] = set()
+
+    def _pick_group(self, is_custom: Optional[bool], custom_weight: Optional[float]) -> Optional[bool]:
+        defaults, customs = self.count(False), self.count(True)
+        if is_custom is not None:
+            return is_custom if self.count(is_custom) else None
+        if not defaults and not customs:
+            return None
+        if not defaults or not customs:
+            return bool(customs)
+        if custom_weight is None:
+            # Uniform over all personas
+            return random.randrange(defaults + customs) >= defaults
+        return random.random() < custom_weight
+
+    def sample(self, is_custom: Optional[bool] = None, custom_weight: Optional[float] = None) -> Optional[int]:
+        """Draw a random persona id.
+
+        is_custom restricts the draw to defaults or customs. custom_weight is
+        the probability of drawing from the customs when both groups exist;
+        by default every persona is equally likely.
+        """
+        group = self._pick_group(is_custom, custom_weight)
+        if group is None:
+            return None
+        ids, removed = self._ids[group], self._removed[group]
+        while True:
+            persona_id = ids[random.randrange(len(ids))]
+            if persona_id not in removed:
+                return persona_id
@@ -0,0 +1,200 @@
+import math
+import os
+import re
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .dedupe import normalize
+from .models import ChatMode
+
+_DIGITS = re.compile(r"\d+")
+
+def embed(text: str, dim: int = 512, ngram: int = 3) -> Dict[int, float]:
+    """Sparse unit vector of hashed word and character n-gram features.
+
+    Words and the character n-grams of each padded word are hashed into
+    dim buckets with a hash-derived sign (the "hashing trick"), so texts
+    that share most of their words and spellings point the same way.
+    It is lexical, not semantic in the model sense: "hello there!" and
+    "Hello there" are close, "hi" and "good morning" are not.
+    """
+    vector: Dict[int, float] = {}
+
+    def add(feature: str, weight: float):
+        h = zlib.crc32(feature.encode())
+        index = h % dim
+        vector[index] = vector.get(index, 0.0) + (weight if h & 0x80000000 else -weight)
+
+    for word in normalize(text).split():
+        add(word, 2.0)
+        padded = f" {word} "
+        for i in range(max(1, len(padded) - ngram + 1)):
+            add(padded[i:i + ngram], 1.0)
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    if not norm:
+        return {}
+    return {i: v / norm for i, v in vector.items() if v}
+
+class _Entries:
+    """Cached replies of one (persona, mode), vectors kept sparse."""
+
+    __slots__ = ("indices", "values", "guards", "replies", "created", "used")
+
+    def __init__(self):
+        self.indices: List[array] = []
+        self.values: List[array] = []
+        self.guards: List[Tuple[str, ...]] = []
+        self.replies: List[Tuple[str, bool]] = []
+        self.created: List[float] = []
+        self.used: List[float] = []
+
+    def __len__(self) -> int:
+        return len(self.replies)
+
+    def pop(self, i: int):
+        for column in (self.indices, self.values, self.guards, self.replies, self.created, self.used):
+            column.pop(i)
+
+class SemanticCache:
+    """Replies to near-identical first messages, per persona and mode.
+
+    Complements the exact ResponseCache for conversation openers, where
+    "Hello there!" and "hello there" to the same persona deserve the same
+    reply. Messages are embedded with hashed n-gram vectors (see embed)
+    and a lookup returns the stored reply of the most similar message if
+    its cosine similarity reaches threshold. Numbers must match exactly,
+    so "what is 2+2" never answers "what is 2+3".
+
+    Memory is bounded: at most max_entries messages per (persona, mode),
+    evicting the least recently used, and at most max_keys (persona, mode)
+    pairs, evicting the least recently used pair. Entries expire after ttl.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.0,
+        max_entries: int = 64,
+        max_keys: int = 256,
+        ttl: float = 3600,
+        dim: int = 512,
+        clock: Callable[[], float] = time.time
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self.dim = dim
+        self._clock = clock
+        self._groups: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "SemanticCache":
+        """Build a cache from SEMANTIC_CACHE_* environment variables (off by default)."""
+        return cls(
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0")),
+            max_entries=int(os.getenv("SEMANTIC_CACHE_SIZE", "64")),
+            max_keys=int(os.getenv("SEMANTIC_CACHE_KEYS", "256")),
+            ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return 0 < self.threshold <= 1 and self.max_entries > 0 and self.max_keys > 0
+
+    @staticmethod
+    def _guard(text: str) -> Tuple[str, ...]:
+        return tuple(_DIGITS.findall(text))
+
+    def lookup(self, persona: str, mode: ChatMode, text: str) -> Tuple[Optional[Tuple[str, bool]], float]:
+        """Return (reply, similarity) of the closest fresh entry, without counting it.
+
+        The reply is None when nothing reaches the threshold; similarity is
+        that of the closest entry either way (0.0 if there is none).
+        """
+        entries = self._groups.get((persona, mode))
+        if not entries:
+            return None, 0.0
+        query = embed(text, self.dim)
+        guard = self._guard(text)
+        cutoff = self._clock() - self.ttl
+        best, best_score = -1, 0.0
+        for i in range(len(entries) - 1, -1, -1):
+            if entries.created[i] < cutoff:
+                entries.pop(i)
+                continue
+            if entries.guards[i] != guard:
+                continue
+            score = 0.0
+            for index, value in zip(entries.indices[i], entries.values[i]):
+                weight = query.get(index)
+                if weight is not None:
+                    score += weight * value
+            if score > best_score:
+                best, best_score = i, score
+        # Vectors are stored as float32: a repeat of the same text scores just under 1
+        if best < 0 or best_score < self.threshold - 1e-6:
+            return None, best_score
+        entries.used[best] = self._clock()
+        return entries.replies[best], best_score
+
+    def get(self, persona: str, mode: ChatMode, text: str) -> Optional[Tuple[str, bool]]:
+        """Return the (response_text, filtered) reply to a similar message, or None."""
+        if not self.enabled:
+            return None
+        reply, _ = self.lookup(persona, mode, text)
+        if reply is None:
+            self.misses += 1
+            return None
+        self._groups.move_to_end((persona, mode))
+        self.hits += 1
+        return reply
+
+    def set(self, persona: str, mode: ChatMode, text: str, reply: Tuple[str, bool]):
+        """Remember the reply to a message, evicting old entries and pairs."""
+        if not self.enabled:
+            return
+        vector = embed(text, self.dim)
+        if not vector:
+            return
+        key = (persona, mode)
+        entries = self._groups.get(key)
+        if entries is None:
+            entries = self._groups[key] = _Entries()
+            while len(self._groups) > self.max_keys:
+                _, dropped = self._groups.popitem(last=False)
+                self.evictions += len(dropped)
+        self._groups.move_to_end(key)
+        while len(entries) >= self.max_entries:
+            entries.pop(entries.used.index(min(entries.used)))
+            self.evictions += 1
+        now = self._clock()
+        indices = sorted(vector)
+        entries.indices.append(array("H", indices))
+        entries.values.append(array("f", [vector[i] for i in indices]))
+        entries.guards.append(self._guard(text))
+        entries.replies.append(reply)
+        entries.created.append(now)
+        entries.used.append(now)
+
+    def invalidate(self, persona: str):
+        """Drop the cached replies of a persona in every mode."""
+        for mode in ChatMode:
+            self._groups.pop((persona, mode), None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": sum(len(entries) for entries in self._groups.values()),
+            "keys": len(self._groups),
+            "evictions": self.evictions,
+            "threshold": self.threshold
+        }
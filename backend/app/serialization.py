@@ -0,0 +1,55 @@
+import json
+from typing import Any, Dict, Optional
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+
+try:
+    import orjson
+except ImportError:  # optional: the fast-json extra
+    orjson = None
+
+def dumps(value: Any) -> bytes:
+    """Serialize plain JSON data to compact UTF-8 bytes.
+
+    Uses orjson when it is installed and the standard library otherwise;
+    both produce the same bytes for the dicts, lists, strings and numbers
+    the API returns.
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, allow_nan=False).encode()
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dumps(), the app's default response class.
+
+    Content must already be JSON data (no models or datetimes): endpoints
+    returning models still go through FastAPI's encoder first.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+class RawJSONResponse(JSONResponse):
+    """JSON response for a body serialized ahead of time."""
+
+    def __init__(
+        self,
+        body: bytes,
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        background: Optional[BackgroundTask] = None
+    ):
+        super().__init__(body, status_code=status_code, headers=headers, background=background)
+
+    def render(self, content: bytes) -> bytes:
+        return content
+
+def model_response(model: BaseModel, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> RawJSONResponse:
+    """Response for a model the endpoint built itself.
+
+    Serializes in Pydantic's core, skipping the response_model re-validation
+    and jsonable_encoder pass FastAPI applies to returned models.
+    """
+    return RawJSONResponse(model.__pydantic_serializer__.to_json(model), status_code=status_code, headers=headers)
@@ -0,0 +1,179 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from .database import read_connection, write_connection
+
+# Compact role codes stored in session_messages.role
+ROLES = {"human": 0, "ai": 1}
+ROLE_NAMES = {code: name for name, code in ROLES.items()}
+
+class SessionStore:
+    """Server-side conversation history so clients only send the new message.
+
+    Messages live in the append-only session_messages table next to personas;
+    recently used sessions are also kept in an in-memory LRU. A maintenance
+    job expires idle sessions and compacts long ones down to the messages the
+    history window can still use.
+
+    With shared set (several worker processes on one database), a hot entry
+    is only trusted while the session's updated_at still matches, since the
+    previous turn may have been served by another worker.
+    """
+
+    def __init__(
+        self,
+        hot_sessions: int = 1024,
+        ttl: float = 7 * 24 * 3600,
+        keep_messages: int = 100,
+        shared: bool = False
+    ):
+        self.hot_sessions = hot_sessions
+        self.ttl = ttl
+        self.keep_messages = keep_messages
+        self.shared = shared
+        self._hot: OrderedDict = OrderedDict()
+        self._locks: Dict[str, list] = {}
+
+    @classmethod
+    def from_env(cls) -> "SessionStore":
+        """Build a store from SESSION_* environment variables."""
+        return cls(
+            hot_sessions=int(os.getenv("SESSION_HOT_SIZE", "1024")),
+            ttl=float(os.getenv("SESSION_TTL", str(7 * 24 * 3600))),
+            keep_messages=int(os.getenv("SESSION_KEEP_MESSAGES", "100")),
+            shared=int(os.getenv("WEB_CONCURRENCY", "1")) > 1
+        )
+
+    @staticmethod
+    def new_id() -> str:
+        """Generate a new session id."""
+        return uuid.uuid4().hex
+
+    @asynccontextmanager
+    async def turn(self, session_id: str) -> AsyncIterator[None]:
+        """Serialize turns of one session (read history, generate, append)."""
+        entry = self._locks.get(session_id)
+        if entry is None:
+            entry = self._locks[session_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[session_id]
+
+    def _remember(self, session_id: str, history: List[Dict[str, Any]], updated_at: float):
+        self._hot[session_id] = (history, updated_at)
+        self._hot.move_to_end(session_id)
+        while len(self._hot) > self.hot_sessions:
+            self._hot.popitem(last=False)
+
+    async def get_history(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the stored history of a session, or None if it is unknown."""
+        entry = self._hot.get(session_id)
+        if entry is not None and not self.shared:
+            self._hot.move_to_end(session_id)
+            return entry[0]
+
+        async with read_connection() as db:
+            async with db.execute("SELECT updated_at FROM sessions WHERE id = ?", (session_id,)) as cursor:
+                row = await cursor.fetchone()
+            if not row:
+                self._hot.pop(session_id, None)
+                return None
+            if entry is not None and entry[1] == row[0]:
+                # Nobody else has written to the session since we cached it
+                self._hot.move_to_end(session_id)
+                return entry[0]
+            async with db.execute(
+                """SELECT role, content FROM session_messages WHERE session_id = ?
+                   ORDER BY seq DESC LIMIT ?""",
+                (session_id, self.keep_messages)
+            ) as cursor:
+                rows = await cursor.fetchall()
+
+        history = [{"type": ROLE_NAMES[role], "content": content} for role, content in reversed(rows)]
+        self._remember(session_id, history, row[0])
+        return history
+
+    async def append(self, session_id: str, entries: List[Dict[str, Any]]):
+        """Append messages to a session, creating it if needed."""
+        rows = [(ROLES[e["type"]], e["content"]) for e in entries if e.get("type") in ROLES]
+        now = time.time()
+        async with write_connection() as db:
+            # Lock before reading MAX(seq): another worker may append to the same session
+            await db.execute("BEGIN IMMEDIATE")
+            async with db.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM session_messages WHERE session_id = ?",
+                (session_id,)
+            ) as cursor:
+                last_seq = (await cursor.fetchone())[0]
+            previous = None
+            if self.shared:
+                async with db.execute("SELECT updated_at FROM sessions WHERE id = ?", (session_id,)) as cursor:
+                    row = await cursor.fetchone()
+                previous = row[0] if row else None
+            await db.executemany(
+                "INSERT INTO session_messages (session_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                [(session_id, last_seq + i, role, content) for i, (role, content) in enumerate(rows, 1)]
+            )
+            await db.execute(
+                "INSERT OR REPLACE INTO sessions (id, updated_at) VALUES (?, ?)",
+                (session_id, now)
+            )
+            await db.commit()
+
+        added = [{"type": ROLE_NAMES[role], "content": content} for role, content in rows]
+        entry = self._hot.get(session_id)
+        if entry is not None and self.shared and entry[1] != previous:
+            # Another worker appended in between; reload on the next turn
+            del self._hot[session_id]
+        elif entry is not None:
+            self._remember(session_id, (entry[0] + added)[-self.keep_messages:], now)
+        elif last_seq == 0:
+            # A brand-new session: these entries are its whole history
+            self._remember(session_id, added[-self.keep_messages:], now)
+
+    async def expire(self) -> int:
+        """Delete sessions idle for longer than the TTL; return how many."""
+        cutoff = time.time() - self.ttl
+        async with write_connection() as db:
+            async with db.execute("SELECT id FROM sessions WHERE updated_at < ?", (cutoff,)) as cursor:
+                expired = [row[0] for row in await cursor.fetchall()]
+            await db.executemany("DELETE FROM session_messages WHERE session_id = ?", [(i,) for i in expired])
+            await db.executemany("DELETE FROM sessions WHERE id = ?", [(i,) for i in expired])
+            await db.commit()
+        for session_id in expired:
+            self._hot.pop(session_id, None)
+        return len(expired)
+
+    async def compact(self) -> int:
+        """Drop messages older than the last keep_messages of each session."""
+        async with write_connection() as db:
+            async with db.execute(
+                """DELETE FROM session_messages WHERE seq <= (
+                       SELECT MAX(m.seq) FROM session_messages m
+                       WHERE m.session_id = session_messages.session_id
+                   ) - ?""",
+                (self.keep_messages,)
+            ) as cursor:
+                removed = cursor.rowcount
+            await db.commit()
+        return removed
+
+    async def run_maintenance(self, interval: float = 600):
+        """Expire and compact sessions every interval seconds, until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.expire()
+                await self.compact()
+            except Exception as e:
+                print(f"Warning: session maintenance failed: {e}")
@@ -0,0 +1,33 @@
+import re
+
+from .profanity import _trie_pattern
+
+# Terms that make a persona description inappropriate
+INAPPROPRIATE_TERMS = [
+    "sexual", "explicit", "nsfw", "porn", "nude", "naked",
+    "violence", "kill", "murder", "suicide", "self-harm",
+    "illegal", "drugs", "weapons", "bomb", "terrorist"
+]
+
+# Shortest accepted persona description
+MIN_PERSONA_LENGTH = 10
+
+# All terms in one prefix-factored pattern, matched anywhere like the
+# original substring checks, so a description is scanned once. Matched
+# against lowercased text: re.IGNORECASE makes the scan several times slower
+_INAPPROPRIATE = re.compile(_trie_pattern(INAPPROPRIATE_TERMS))
+
+def persona_rejection(persona: str) -> str:
+    """Reason a persona description is rejected, or "" if it is acceptable."""
+    if not persona or len(persona.strip()) < MIN_PERSONA_LENGTH:
+        return "too short"
+    
+    # Check for inappropriate content in persona description
+    if _INAPPROPRIATE.search(persona.lower()):
+        return "inappropriate content"
+    
+    return ""
+
+def validate_persona(persona: str) -> bool:
+    """Validate that persona description is appropriate"""
+    return not persona_rejection(persona)
@@ -0,0 +1,217 @@
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .admission import AdmissionRejected
+from .database import iter_personas
+from .dedupe import normalize
+from .models import ChatMode
+from .resilience import UpstreamError
+
+# First messages answered from the pool, compared after normalize()
+GREETINGS = frozenset({
+    "hi", "hii", "hello", "hey", "heya", "hiya", "yo", "howdy", "greetings", "sup",
+    "hi there", "hello there", "hey there", "hi hi", "hello hello",
+    "good morning", "good afternoon", "good evening",
+})
+
+# Message the pooled replies are generated for
+OPENING_MESSAGE = "Hello!"
+
+# Window over which the consumption rate is measured, in seconds
+RATE_WINDOW = 60.0
+
+def is_greeting(message: str) -> bool:
+    """Whether a first message is a generic greeting the pool can answer."""
+    return normalize(message) in GREETINGS
+
+class OpeningPool:
+    """Pre-generated replies to a greeting, for first turns of popular personas.
+
+    For each warmed (persona, mode) the pool keeps up to depth replies
+    generated ahead of time. A conversation that opens with a greeting
+    takes one (each reply is served once, so users see different
+    openings) and the background job refills the pool. Replies older than
+    max_age are dropped and regenerated, so the pool tracks prompt and
+    model changes. The job renders each system prompt first, so later
+    cache misses for these personas skip that work too.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[str, ChatMode, str], Awaitable[Tuple[str, bool]]],
+        prepare: Optional[Callable[[str, ChatMode], object]] = None,
+        personas: int = 0,
+        modes: Tuple[ChatMode, ...] = (ChatMode.REGULAR,),
+        depth: int = 2,
+        max_age: float = 3600,
+        concurrency: int = 2,
+        clock: Callable[[], float] = time.time
+    ):
+        self.generate = generate
+        self.prepare = prepare
+        self.personas = personas
+        self.modes = modes
+        self.depth = depth
+        self.max_age = max_age
+        self.concurrency = concurrency
+        self._clock = clock
+        self._pool: Dict[Tuple[str, ChatMode], deque] = {}
+        self._demand: Dict[Tuple[str, ChatMode], int] = {}
+        self._consumed_at: deque = deque()
+        self._wake = asyncio.Event()
+        self.served = 0
+        self.misses = 0
+        self.generated = 0
+        self.expired = 0
+        self.failures = 0
+        self.refills = 0
+
+    @classmethod
+    def from_env(
+        cls,
+        generate: Callable[[str, ChatMode, str], Awaitable[Tuple[str, bool]]],
+        prepare: Optional[Callable[[str, ChatMode], object]] = None
+    ) -> "OpeningPool":
+        """Build a pool from WARMUP_* environment variables (off by default)."""
+        modes = tuple(
+            ChatMode(mode.strip()) for mode in os.getenv("WARMUP_MODES", "regular").split(",") if mode.strip()
+        )
+        return cls(
+            generate,
+            prepare,
+            personas=int(os.getenv("WARMUP_PERSONAS", "0")),
+            modes=modes,
+            depth=int(os.getenv("WARMUP_DEPTH", "2")),
+            max_age=float(os.getenv("WARMUP_MAX_AGE", "3600")),
+            concurrency=int(os.getenv("WARMUP_CONCURRENCY", "2"))
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.personas > 0 and self.depth > 0 and bool(self.modes)
+
+    def warm(self, personas: List[str]):
+        """Set the personas to keep replies for, keeping pooled replies of those staying."""
+        keys = [(persona, mode) for persona in personas for mode in self.modes]
+        self._pool = {key: self._pool.get(key) or deque() for key in keys}
+        self._wake.set()
+
+    def take(self, persona: str, mode: ChatMode, message: str) -> Optional[Tuple[str, bool]]:
+        """Consume a fresh pooled reply if message is a greeting to a warmed persona."""
+        entries = self._pool.get((persona, mode))
+        if entries is None or not is_greeting(message):
+            return None
+        cutoff = self._clock() - self.max_age
+        while entries and entries[0][1] < cutoff:
+            entries.popleft()
+            self.expired += 1
+        self._wake.set()
+        if not entries:
+            self.misses += 1
+            self._demand[(persona, mode)] = self._demand.get((persona, mode), 0) + 1
+            return None
+        reply, _ = entries.popleft()
+        self.served += 1
+        now = self._clock()
+        self._consumed_at.append(now)
+        while self._consumed_at[0] < now - RATE_WINDOW:
+            self._consumed_at.popleft()
+        return reply
+
+    def invalidate(self, persona: str):
+        """Stop warming a persona that no longer exists."""
+        for mode in ChatMode:
+            self._pool.pop((persona, mode), None)
+
+    def _shortfall(self) -> List[Tuple[str, ChatMode]]:
+        """One key per missing reply, keys that ran dry under demand first."""
+        cutoff = self._clock() - self.max_age
+        missing = []
+        for key, entries in self._pool.items():
+            while entries and entries[0][1] < cutoff:
+                entries.popleft()
+                self.expired += 1
+            missing.extend([key] * (self.depth - len(entries)))
+        missing.sort(key=lambda key: -self._demand.get(key, 0))
+        return missing
+
+    async def _fill(self, key: Tuple[str, ChatMode]):
+        persona, mode = key
+        try:
+            reply = await self.generate(persona, mode, OPENING_MESSAGE)
+        except (AdmissionRejected, UpstreamError):
+            # Live traffic comes first; try again on the next pass
+            self.failures += 1
+            return
+        entries = self._pool.get(key)
+        if entries is not None and len(entries) < self.depth:
+            entries.append((reply, self._clock()))
+            self.generated += 1
+
+    async def refill(self):
+        """Top up every warmed (persona, mode) to depth fresh replies."""
+        missing = self._shortfall()
+        if not missing:
+            return
+        self.refills += 1
+        limit = asyncio.Semaphore(max(1, self.concurrency))
+
+        async def fill(key):
+            async with limit:
+                await self._fill(key)
+
+        await asyncio.gather(*(fill(key) for key in missing))
+
+    async def run(self, interval: float = 60.0, personas: Optional[List[str]] = None):
+        """Warm the top default personas (or the given ones), then keep their pools full.
+
+        Refills after every consumption and at least every interval
+        seconds, which is also when aged replies are replaced.
+        """
+        if not self.enabled:
+            return
+        if personas is None:
+            personas = []
+            async for persona in iter_personas(is_custom=False):
+                personas.append(persona["description"])
+                if len(personas) == self.personas:
+                    break
+        if self.prepare:
+            for persona in personas:
+                for mode in self.modes:
+                    self.prepare(persona, mode)
+        self.warm(personas)
+        while True:
+            self._wake.clear()
+            try:
+                await self.refill()
+            except Exception as e:
+                print(f"Warning: opening pool refill failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> dict:
+        """Pool size, freshness and consumption, for /health and /metrics."""
+        now = self._clock()
+        ages = [now - created for entries in self._pool.values() for _, created in entries]
+        recent = sum(1 for t in self._consumed_at if t >= now - RATE_WINDOW)
+        target = len(self._pool) * self.depth
+        return {
+            "warmed": len(self._pool),
+            "size": len(ages),
+            "fill_ratio": round(len(ages) / target, 4) if target else 0.0,
+            "oldest_age": round(max(ages), 1) if ages else 0.0,
+            "mean_age": round(sum(ages) / len(ages), 1) if ages else 0.0,
+            "consumed_per_minute": round(recent * 60 / RATE_WINDOW, 2),
+            "served": self.served,
+            "misses": self.misses,
+            "generated": self.generated,
+            "expired": self.expired,
+            "failures": self.failures,
+            "refills": self.refills
+        }
@@ -0,0 +1,137 @@
+import asyncio
+import math
+import os
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+class WriteQueueFull(Exception):
+    """Raised when a write could not be queued before the enqueue timeout."""
+
+    def __init__(self, retry_after: float):
+        super().__init__("write queue full")
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        """Retry-After value in whole seconds."""
+        return str(max(1, math.ceil(self.retry_after)))
+
+class WriteQueue:
+    """Single writer task applying queued writes in grouped transactions.
+
+    Callers submit an operation and await its result. One background task
+    takes whatever has queued up (at most max_batch operations) and hands
+    the batch to apply, which runs it as one transaction and returns a
+    result or an exception per operation; each caller's future gets its
+    own. Under load many writes share one commit instead of contending
+    for SQLite's write lock. The queue holds at most max_queue operations;
+    a submit that cannot get in within enqueue_timeout seconds raises
+    WriteQueueFull, so overload turns into quick 503s rather than
+    requests piling up.
+    """
+
+    def __init__(
+        self,
+        apply: Callable[[List[Tuple]], Awaitable[List[Any]]],
+        max_queue: int = 1000,
+        max_batch: int = 256,
+        enqueue_timeout: float = 1.0
+    ):
+        self.apply = apply
+        self.max_queue = max_queue
+        self.max_batch = max(1, max_batch)
+        self.enqueue_timeout = enqueue_timeout
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(0, max_queue))
+        self._task: Optional[asyncio.Task] = None
+        self.submitted = 0
+        self.rejected = 0
+        self.batches = 0
+        self.applied = 0
+        self.failures = 0
+        self.largest_batch = 0
+
+    @classmethod
+    def from_env(cls, apply: Callable[[List[Tuple]], Awaitable[List[Any]]]) -> "WriteQueue":
+        """Build a queue from WRITE_QUEUE_* environment variables."""
+        return cls(
+            apply,
+            max_queue=int(os.getenv("WRITE_QUEUE_SIZE", "1000")),
+            max_batch=int(os.getenv("WRITE_QUEUE_BATCH", "256")),
+            enqueue_timeout=float(os.getenv("WRITE_QUEUE_TIMEOUT", "1"))
+        )
+
+    def start(self):
+        """Start the writer task on the running loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Apply everything already queued, then stop the writer task."""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def submit(self, *operation) -> Any:
+        """Queue an operation and wait for its result (or its exception)."""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            await asyncio.wait_for(self._queue.put((operation, future)), self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise WriteQueueFull(self.enqueue_timeout) from None
+        self.submitted += 1
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._apply(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _apply(self, batch: List[Tuple[Tuple, asyncio.Future]]):
+        self.batches += 1
+        self.applied += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        try:
+            results = await self.apply([operation for operation, _ in batch])
+        except asyncio.CancelledError:
+            for _, future in batch:
+                if not future.done():
+                    future.cancel()
+            raise
+        except Exception as e:
+            # The transaction failed as a whole
+            self.failures += 1
+            results = [e] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                # The caller went away; the write still happened
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        """Queue depth and batching counters, for /health and /metrics."""
+        return {
+            "running": self._task is not None,
+            "queued": self._queue.qsize(),
+            "max_queue": self.max_queue,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "failures": self.failures,
+            "writes_per_batch": round(self.applied / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch
+        }
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Throughput of sequential /chat calls vs one /chat/batch request.
+
+Runs the app in-process (httpx ASGI transport) against a temporary database
+and the stub LLM backend, so the numbers reflect request overhead and
+fan-out rather than Groq latency.
+
+Usage:
+    python -m benchmarks.bench_batch --requests 200 --latency 0.05 --concurrency 4 8 16
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+os.environ.setdefault("LLM_BACKEND", "stub")
+
+import httpx
+
+from app import main
+from app.cache import ResponseCache
+
+
+def items(n: int):
+    # Distinct messages so nothing is served from the cache or coalesced
+    return [{"message": f"Evaluation prompt {i}", "persona": "A pirate captain"} for i in range(n)]
+
+
+async def sequential(client, args):
+    for item in items(args.requests):
+        response = await client.post("/chat", json=item)
+        response.raise_for_status()
+
+
+async def batched(client, args, concurrency: int, stream: bool):
+    body = {"items": items(args.requests), "max_concurrency": concurrency, "stream": stream}
+    response = await client.post("/chat/batch", json=body)
+    response.raise_for_status()
+
+
+async def main_async(args):
+    os.environ["STUB_LATENCY"] = str(args.latency)
+    with tempfile.TemporaryDirectory() as tmp, patch("app.database.DATABASE_PATH", os.path.join(tmp, "bench.db")), \
+            patch("app.main.BATCH_CONCURRENCY", max(args.concurrency)):
+        async with main.app.router.lifespan_context(main.app):
+            main.chat_service.response_cache = ResponseCache(max_entries=0)
+            runs = [("sequential /chat", lambda c: sequential(c, args))]
+            for n in args.concurrency:
+                runs.append((f"batch x{n}", lambda c, n=n: batched(c, args, n, False)))
+                runs.append((f"batch x{n} stream", lambda c, n=n: batched(c, args, n, True)))
+
+            print(f"requests={args.requests} stub latency={args.latency * 1000:.0f}ms")
+            print(f"{'mode':>20} {'seconds':>8} {'req/s':>8}")
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                for name, run in runs:
+                    start = time.perf_counter()
+                    await run(client)
+                    elapsed = time.perf_counter() - start
+                    print(f"{name:>20} {elapsed:>8.2f} {args.requests / elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub LLM latency in seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[4, 8, 16])
+    asyncio.run(main_async(parser.parse_args()))
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Latency of answering one message as N personas: one by one vs broadcast.
+
+The stub LLM takes a different latency per persona (spread between --min and
+--max), so broadcast latency should track the slowest persona while the
+sequential loop pays the sum.
+
+Usage:
+    python -m benchmarks.bench_broadcast --personas 2 4 8 16
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("LLM_BACKEND", "stub")
+
+from langchain_core.messages import AIMessage
+
+from app.cache import ResponseCache
+from app.chat_service import ChatService
+from app.database import DEFAULT_PERSONAS
+from app.models import ChatMode
+
+HISTORY = [
+    {"type": "human" if i % 2 == 0 else "ai", "content": f"Earlier message number {i} about the voyage."}
+    for i in range(40)
+]
+
+
+class PersonaLatencyLLM:
+    """Replies after a latency chosen by the persona in the system prompt."""
+
+    def __init__(self, latencies):
+        self.latencies = latencies
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(self.latencies.get(messages[0].content, 0.0))
+        return AIMessage(content="Greetings, traveller.")
+
+
+async def measure(n: int, args):
+    service = ChatService(response_cache=ResponseCache(max_entries=0))
+    personas = DEFAULT_PERSONAS[:n]
+    step = (args.max - args.min) / max(1, n - 1)
+    service.llm = PersonaLatencyLLM({
+        service.prompts.get(p, ChatMode.REGULAR).content: args.min + i * step for i, p in enumerate(personas)
+    })
+
+    start = time.perf_counter()
+    for persona in personas:
+        await service.generate_response("Who are you?", persona, ChatMode.REGULAR, HISTORY)
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    async for _ in service.broadcast("Who are you?", personas, ChatMode.REGULAR, HISTORY):
+        pass
+    broadcast = time.perf_counter() - start
+    return sequential, broadcast
+
+
+async def main(args):
+    print(f"persona latency {args.min * 1000:.0f}-{args.max * 1000:.0f}ms, history={len(HISTORY)} messages")
+    print(f"{'personas':>8} {'sequential ms':>14} {'broadcast ms':>13} {'speedup':>8}")
+    for n in args.personas:
+        sequential, broadcast = await measure(n, args)
+        print(f"{n:>8} {sequential * 1000:>14.1f} {broadcast * 1000:>13.1f} {sequential / broadcast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--personas", type=int, nargs="+", default=[2, 4, 8, 16])
+    parser.add_argument("--min", type=float, default=0.05, help="fastest persona latency in seconds")
+    parser.add_argument("--max", type=float, default=0.2, help="slowest persona latency in seconds")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Rows per second loading personas one at a time vs the bulk importer.
+
+"one by one" mirrors POST /add_persona: validate, insert and commit each
+row. "bulk" streams the same rows as JSONL through import_personas with
+batched executemany transactions. Both run against a fresh temporary
+database, through the connection pool.
+
+Usage:
+    python -m benchmarks.bench_bulk_import --rows 1000 10000 --batch-size 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+from app import database
+from app.bulk import import_personas, iter_lines
+from app.validation import validate_persona
+
+
+def descriptions(rows: int):
+    return [f"A benchmark persona number {i} who enjoys bulk loading" for i in range(rows)]
+
+
+async def one_by_one(rows: int) -> float:
+    start = time.perf_counter()
+    for description in descriptions(rows):
+        if validate_persona(description):
+            await database.add_custom_persona(description)
+    return time.perf_counter() - start
+
+
+async def bulk(rows: int, batch_size: int) -> float:
+    body = "".join(json.dumps({"description": d}) + "\n" for d in descriptions(rows)).encode()
+    chunks = [body[i:i + 65536] for i in range(0, len(body), 65536)]
+    start = time.perf_counter()
+    report = await import_personas(iter_lines(chunks), "jsonl", batch_size=batch_size)
+    assert report["inserted"] == rows, report
+    return time.perf_counter() - start
+
+
+async def measure(run, *args) -> float:
+    with tempfile.TemporaryDirectory() as tmp, patch("app.database.DATABASE_PATH", os.path.join(tmp, "bench.db")):
+        await database.init_database()
+        await database.open_pool()
+        try:
+            return await run(*args)
+        finally:
+            await database.close_pool()
+
+
+async def main(args):
+    print(f"{'rows':>7} {'one by one rows/s':>18} {'bulk rows/s':>12} {'speedup':>8}")
+    for rows in args.rows:
+        single = await measure(one_by_one, min(rows, args.single_limit))
+        single_rate = min(rows, args.single_limit) / single
+        bulk_rate = rows / await measure(bulk, rows, args.batch_size)
+        print(f"{rows:>7} {single_rate:>18.0f} {bulk_rate:>12.0f} {bulk_rate / single_rate:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--single-limit", type=int, default=2000, help="cap on rows inserted one by one")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Compare database throughput with per-call connections against the pool.
+
+Usage:
+    python -m benchmarks.bench_db_pool --concurrency 32 --duration 3
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+from app import database
+
+
+async def run_load(concurrency: int, duration: float, write_ratio: float) -> int:
+    """Run mixed persona requests for duration seconds; return the request count."""
+    deadline = time.perf_counter() + duration
+    completed = 0
+
+    async def worker(worker_id: int):
+        nonlocal completed
+        n = 0
+        while time.perf_counter() < deadline:
+            n += 1
+            if write_ratio and n % int(1 / write_ratio) == 0:
+                persona = await database.add_custom_persona(f"Benchmark persona {worker_id}-{n}")
+                await database.delete_persona(persona["id"])
+            elif n % 2:
+                await database.get_random_persona()
+            else:
+                await database.get_all_personas()
+            completed += 1
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return completed
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        with patch.object(database, "DATABASE_PATH", path):
+            await database.init_database()
+
+            count = await run_load(args.concurrency, args.duration, args.write_ratio)
+            per_call = count / args.duration
+
+            await database.open_pool(readers=args.readers)
+            try:
+                count = await run_load(args.concurrency, args.duration, args.write_ratio)
+            finally:
+                await database.close_pool()
+            pooled = count / args.duration
+
+    print(f"concurrency={args.concurrency} readers={args.readers} write_ratio={args.write_ratio}")
+    print(f"per-call connect: {per_call:10.1f} req/s")
+    print(f"pooled:           {pooled:10.1f} req/s  ({pooled / per_call:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--readers", type=int, default=database.POOL_READERS)
+    parser.add_argument("--write-ratio", type=float, default=0.1, help="fraction of requests that write")
+    asyncio.run(main(parser.parse_args()))
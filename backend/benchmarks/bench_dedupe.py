@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate lookup with the MinHash index vs a linear Jaccard scan.
+
+Fills a temporary database with synthetic personas, then times the index
+load and the average lookup for reworded copies of stored personas
+("recall" is the share found) and for fresh descriptions ("flagged"
+counts those wrongly reported as duplicates).
+"scan" compares each query against every stored description, which is
+what a lookup would cost without the index. Also compares the compiled
+validation matcher with a per-term substring loop.
+
+Usage:
+    python -m benchmarks.bench_dedupe --rows 1000 10000 100000 --queries 200
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from unittest.mock import patch
+
+from app import database
+from app.dedupe import NearDuplicateIndex, jaccard, shingles
+from app.validation import INAPPROPRIATE_TERMS, validate_persona
+
+ROLES = ["pirate", "chef", "detective", "wizard", "astronaut", "librarian", "knight", "gardener",
+         "hacker", "poet", "sailor", "doctor", "farmer", "painter", "pilot", "monk"]
+SYLLABLES = ["ka", "lo", "mi", "re", "su", "to", "va", "ne", "bi", "do", "fe", "gu", "ha", "ji", "po", "zu"]
+
+
+def word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def persona(rng: random.Random, i: int) -> str:
+    # A shared template with random filler words, like real free-text personas
+    words = " ".join(word(rng) for _ in range(8))
+    return f"A {rng.choice(ROLES)} who {words}"
+
+
+def reword(description: str) -> str:
+    return description.replace(" who ", " that ", 1) + "!"
+
+
+async def run(rows: int, queries: int, scan_limit: int):
+    rng = random.Random(rows)
+    stored = [persona(rng, i) for i in range(rows)]
+    await database.bulk_add_custom_personas(stored)
+
+    index = NearDuplicateIndex()
+    start = time.perf_counter()
+    await index.ensure_loaded()
+    load = time.perf_counter() - start
+
+    copies = [reword(rng.choice(stored)) for _ in range(queries)]
+    fresh = [persona(rng, rows + i) for i in range(queries)]
+
+    start = time.perf_counter()
+    found = flagged = 0
+    for q in copies:
+        found += bool(await index.find(q))
+    for q in fresh:
+        flagged += bool(await index.find(q))
+    lookup = (time.perf_counter() - start) / (2 * queries)
+
+    # Linear scan over precomputed shingles, on a subset of queries when large
+    corpus = [shingles(d) for d in stored]
+    sample = copies[:max(1, min(queries, scan_limit * 1000 // rows))]
+    start = time.perf_counter()
+    for q in sample:
+        grams = shingles(q)
+        max(jaccard(grams, other) for other in corpus)
+    scan = (time.perf_counter() - start) / len(sample)
+
+    stats = index.stats()
+    print(f"{rows:>7} {load:>8.2f}s {lookup * 1000:>10.3f}ms {scan * 1000:>10.2f}ms "
+          f"{scan / lookup:>8.0f}x {stats['candidates_per_lookup']:>11} {found / queries:>7.1%} {flagged:>8}")
+
+
+def bench_validation(samples: int):
+    rng = random.Random(0)
+    texts = [persona(rng, i) for i in range(samples)]
+
+    def substring(text):
+        lowered = text.lower()
+        return len(text.strip()) >= 10 and not any(term in lowered for term in INAPPROPRIATE_TERMS)
+
+    for name, check in (("substring loop", substring), ("compiled", validate_persona)):
+        start = time.perf_counter()
+        for text in texts:
+            check(text)
+        print(f"  {name:<15} {(time.perf_counter() - start) / samples * 1e6:.2f}us/persona")
+
+
+async def main(args):
+    print(f"{'rows':>7} {'load':>9} {'index':>12} {'scan':>12} {'speedup':>9} {'candidates':>11} {'recall':>7} {'flagged':>8}")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp, patch("app.database.DATABASE_PATH", os.path.join(tmp, "bench.db")):
+            await database.init_database()
+            await database.open_pool()
+            try:
+                await run(rows, args.queries, args.scan_limit)
+            finally:
+                await database.close_pool()
+    print("validation:")
+    bench_validation(args.validation_samples)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=200, help="reworded copies and fresh personas each")
+    parser.add_argument("--scan-limit", type=int, default=2000, help="thousands of rows compared in the scan")
+    parser.add_argument("--validation-samples", type=int, default=20000)
+    asyncio.run(main(parser.parse_args()))
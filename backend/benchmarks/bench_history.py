@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Prompt tokens and latency per request for long synthetic conversations.
+
+Compares the old fixed last-10 window with the token-budgeted HistoryWindow
+(with and without summaries). Latency is measured against a stub LLM whose
+delay grows with prompt tokens, plus the time spent building the history.
+
+Usage:
+    python -m benchmarks.bench_history --turns 100 --budgets 256 512 1024
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+os.environ.setdefault("LLM_BACKEND", "stub")
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.cache import ResponseCache
+from app.chat_service import ChatService
+from app.history import HistoryWindow, message_tokens
+from app.models import ChatMode
+from app.llm import StubLLM
+
+SENTENCES = [
+    "Ahoy there, what brings ye to these waters?",
+    "I have been searching for the lost treasure of the digital seas for many long years.",
+    "Tell me more about the map.",
+    "The map is etched in neon and only readable under a full moon, when the servers hum softly "
+    "and the old protocols whisper forgotten passwords to anyone patient enough to listen.",
+    "Why?",
+]
+
+
+class FixedLastTen:
+    """The original behaviour: always keep the last 10 messages."""
+
+    def build(self, history):
+        return [
+            HumanMessage(content=e["content"]) if e["type"] == "human" else AIMessage(content=e["content"])
+            for e in history[-10:]
+        ]
+
+
+def synthetic_conversation(turns: int, rng: random.Random):
+    history = []
+    for i in range(turns * 2):
+        content = " ".join(rng.choice(SENTENCES) for _ in range(rng.choice([1, 1, 2, 6])))
+        history.append({"type": "human" if i % 2 == 0 else "ai", "content": content})
+    return history
+
+
+async def measure(window, conversations, args):
+    llm = StubLLM(latency=args.latency, per_token=args.per_token)
+    service = ChatService(response_cache=ResponseCache(max_entries=0), llm=llm)
+    service.history = window
+
+    build_time = 0.0
+    peak_tokens = 0
+    start = time.perf_counter()
+    for history in conversations:
+        t = time.perf_counter()
+        service._build_conversation_history(history, "A pirate captain")
+        build_time += time.perf_counter() - t
+        before = service.llm.prompt_tokens
+        await service.generate_response("And then?", "A pirate captain", ChatMode.REGULAR, history)
+        peak_tokens = max(peak_tokens, service.llm.prompt_tokens - before)
+    elapsed = time.perf_counter() - start
+
+    n = len(conversations)
+    return service.llm.prompt_tokens / n, peak_tokens, elapsed / n * 1000, build_time / n * 1e6
+
+
+async def main(args):
+    rng = random.Random(7)
+    conversations = [synthetic_conversation(args.turns, rng) for _ in range(args.requests)]
+    windows = {"fixed last-10": FixedLastTen()}
+    for budget in args.budgets:
+        windows[f"budget {budget}"] = HistoryWindow(token_budget=budget)
+        windows[f"budget {budget} + summary"] = HistoryWindow(token_budget=budget, summarize=True)
+
+    print(f"turns={args.turns} requests={args.requests} per_token={args.per_token * 1000:.3f}ms")
+    print(f"{'window':>28} {'avg tokens':>11} {'max tokens':>11} {'latency ms':>11} {'build us':>9}")
+    for name, window in windows.items():
+        tokens, peak, latency, build = await measure(window, conversations, args)
+        print(f"{name:>28} {tokens:>11.0f} {peak:>11d} {latency:>11.1f} {build:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--budgets", type=int, nargs="+", default=[256, 512, 1024])
+    parser.add_argument("--latency", type=float, default=0.02, help="fixed stub latency in seconds")
+    parser.add_argument("--per-token", type=float, default=0.0002, help="stub prefill seconds per prompt token")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of the profanity filter against the original per-word loop.
+
+Usage:
+    python -m benchmarks.bench_profanity --lengths 200 2000 20000 --repeat 200
+"""
+import argparse
+import random
+import re
+import time
+
+from app.profanity import PROFANITY_WORDS, ProfanityFilter, profanity_filter
+
+FILLER = (
+    "the captain sailed across the neon sea while the wizard brewed coffee and "
+    "argued with a robot about philosophy class hello shell assess "
+).split()
+
+
+def legacy_filter(text: str) -> tuple[str, bool]:
+    """The original implementation: one regex compile and pass per word."""
+    filtered = False
+    for word in PROFANITY_WORDS:
+        pattern = re.compile(re.escape(word), re.IGNORECASE)
+        if pattern.search(text):
+            filtered = True
+            if len(word) > 2:
+                replacement = word[0] + "*" * (len(word) - 2) + word[-1]
+            else:
+                replacement = "*" * len(word)
+            text = pattern.sub(replacement, text)
+    return text, filtered
+
+
+def make_text(length: int, profanity_rate: float, rng: random.Random) -> str:
+    words = []
+    while sum(len(w) + 1 for w in words) < length:
+        pool = PROFANITY_WORDS if rng.random() < profanity_rate else FILLER
+        words.append(rng.choice(pool))
+    return " ".join(words)[:length]
+
+
+def per_call_us(fn, texts, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text)
+    return (time.perf_counter() - start) / (repeat * len(texts)) * 1e6
+
+
+def main(args):
+    rng = random.Random(42)
+    substring = ProfanityFilter(PROFANITY_WORDS, word_boundary=False)
+    print(f"{'chars':>8} {'legacy us':>11} {'substring us':>13} {'boundary us':>12} {'batch us':>10}")
+    for length in args.lengths:
+        texts = [make_text(length, args.rate, rng) for _ in range(args.texts)]
+        legacy = per_call_us(legacy_filter, texts, args.repeat)
+        single = per_call_us(substring.filter, texts, args.repeat)
+        boundary = per_call_us(profanity_filter.filter, texts, args.repeat)
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            profanity_filter.batch_filter(texts)
+        batch = (time.perf_counter() - start) / (args.repeat * len(texts)) * 1e6
+
+        print(f"{length:>8} {legacy:>11.1f} {single:>13.1f} {boundary:>12.1f} {batch:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[200, 2_000, 20_000])
+    parser.add_argument("--texts", type=int, default=20, help="texts per length")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=0.01, help="fraction of profane words")
+    main(parser.parse_args())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for random persona selection.
+
+Compares ``ORDER BY RANDOM() LIMIT 1`` against the in-memory sampler used by
+``get_random_persona`` as the personas table grows from 30 to 1M rows.
+
+Usage:
+    python -m benchmarks.bench_random_persona --sizes 30 1000 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+from app import database
+
+ORDER_BY_RANDOM = "SELECT id, description, is_custom FROM personas ORDER BY RANDOM() LIMIT 1"
+
+
+async def fill_table(rows: int):
+    """Top the personas table up with custom personas to the given row count."""
+    async with database.write_connection() as db:
+        async with db.execute("SELECT COUNT(*) FROM personas") as cursor:
+            existing = (await cursor.fetchone())[0]
+        await db.executemany(
+            "INSERT INTO personas (description, is_custom) VALUES (?, TRUE)",
+            ((f"Generated benchmark persona number {i}",) for i in range(existing, rows))
+        )
+        await db.commit()
+
+
+async def time_draws(draw, draws: int) -> float:
+    """Return the mean latency of draw() in microseconds."""
+    start = time.perf_counter()
+    for _ in range(draws):
+        await draw()
+    return (time.perf_counter() - start) / draws * 1e6
+
+
+async def order_by_random():
+    async with database.read_connection() as db:
+        async with db.execute(ORDER_BY_RANDOM) as cursor:
+            return await cursor.fetchone()
+
+
+async def main(args):
+    print(f"{'rows':>10} {'ORDER BY RANDOM() us':>22} {'sampler us':>12} {'speedup':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        with patch.object(database, "DATABASE_PATH", path):
+            await database.init_database()
+            await database.open_pool()
+            try:
+                for rows in sorted(args.sizes):
+                    await fill_table(rows)
+                    async with database.read_connection() as db:
+                        await database.load_sampler(db)
+
+                    # ORDER BY RANDOM() is a full scan; fewer draws on big tables
+                    slow_draws = max(5, min(args.draws, 2_000_000 // rows))
+                    baseline = await time_draws(order_by_random, slow_draws)
+                    sampled = await time_draws(database.get_random_persona, args.draws)
+                    print(f"{rows:>10} {baseline:>22.1f} {sampled:>12.1f} {baseline / sampled:>8.1f}x")
+            finally:
+                await database.close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[30, 1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--draws", type=int, default=2000)
+    asyncio.run(main(parser.parse_args()))
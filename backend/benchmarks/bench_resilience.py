@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tail latency and error rate of upstream calls with and without the resilience layer.
+
+A simulated upstream answers in --latency seconds, except that a --slow
+fraction of calls take --slow-factor times longer and a --fail fraction
+fail with a retryable error. Each configuration makes --calls calls with
+--concurrency in flight and reports p50/p95/p99 latency, the share of
+calls that failed and the upstream requests made per call.
+
+Usage:
+    python -m benchmarks.bench_resilience --calls 2000 --slow 0.05 --fail 0.02
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from app.resilience import CircuitBreaker, UpstreamError, UpstreamPolicy
+
+
+class FlakyUpstream:
+    def __init__(self, latency: float, slow: float, slow_factor: float, fail: float, seed: int = 0):
+        self.latency = latency
+        self.slow = slow
+        self.slow_factor = slow_factor
+        self.fail = fail
+        self.rng = random.Random(seed)
+        self.requests = 0
+
+    async def __call__(self):
+        self.requests += 1
+        roll = self.rng.random()
+        if roll < self.fail:
+            await asyncio.sleep(self.latency / 2)
+            raise ConnectionError("connection reset")
+        slow = roll < self.fail + self.slow
+        await asyncio.sleep(self.latency * (self.slow_factor if slow else 1))
+        return "ok"
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def run(name: str, policy: UpstreamPolicy, args):
+    upstream = FlakyUpstream(args.latency, args.slow, args.slow_factor, args.fail)
+    latencies = []
+    errors = 0
+    limit = asyncio.Semaphore(args.concurrency)
+
+    async def one():
+        nonlocal errors
+        async with limit:
+            started = time.perf_counter()
+            try:
+                await policy.call(upstream)
+            except UpstreamError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(args.calls)))
+    latencies.sort()
+    print(f"{name:>18} {percentile(latencies, 0.5) * 1000:>8.1f} {percentile(latencies, 0.95) * 1000:>8.1f} "
+          f"{percentile(latencies, 0.99) * 1000:>8.1f} {errors / args.calls:>7.2%} {upstream.requests / args.calls:>10.2f}")
+
+
+async def main(args):
+    # The breaker stays out of the way: failures here are scattered, not an outage
+    breaker = lambda: CircuitBreaker(failure_threshold=0)
+    configs = {
+        "none": UpstreamPolicy(retries=0, breaker=breaker()),
+        "retries": UpstreamPolicy(retries=2, backoff=args.latency / 4, breaker=breaker()),
+        "retries+hedge p95": UpstreamPolicy(
+            retries=2, backoff=args.latency / 4, hedge=True, hedge_percentile=0.95, breaker=breaker()
+        ),
+    }
+    print(f"{'policy':>18} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'requests':>10}")
+    for name, policy in configs.items():
+        await run(name, policy, args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02, help="typical upstream latency in seconds")
+    parser.add_argument("--slow", type=float, default=0.05, help="fraction of slow calls")
+    parser.add_argument("--slow-factor", type=float, default=10)
+    parser.add_argument("--fail", type=float, default=0.02, help="fraction of failing calls")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Semantic cache evaluation: hit rate and false hits per similarity threshold.
+
+Replays a labeled set of opening messages against one (persona, mode)
+like live traffic: a message is looked up, and on a miss its intent's
+reply is generated and stored. A hit is "true" when the returned reply
+belongs to the message's intent and "false" otherwise. The set mixes
+paraphrases ("How are you?" / "how are you doing?") with lexically close
+messages that mean something else ("I love you" / "I hate you", "tell me
+a joke" / "tell me a story"), which are what a threshold has to reject.
+"possible" is the best hit rate any cache could reach on the order
+played: every message except the first of each intent.
+
+Also times a lookup against a full (persona, mode) group.
+
+Usage:
+    python -m benchmarks.bench_semantic_cache --thresholds 0.7 0.8 0.85 0.9 0.95 --rounds 20
+"""
+import argparse
+import random
+import time
+
+from app.models import ChatMode
+from app.semantic_cache import SemanticCache
+
+PERSONA = "A cheerful pirate captain"
+
+INTENTS = {
+    "greeting": ["hi there", "Hi there!", "hi there :)", "HI THERE", "hi, there"],
+    "hello": ["hello", "Hello!", "hello!!", "hello :)", "Hello."],
+    "how_are_you": ["How are you?", "how are you doing?", "how are you today", "How are you doing today?", "how are u"],
+    "who_are_you": ["Who are you?", "who are you??", "who are you exactly", "Who are you, exactly?"],
+    "name": ["What is your name?", "what's your name", "whats your name?", "What is your name, captain?"],
+    "joke": ["Tell me a joke", "tell me a joke please", "Tell me a joke!", "please tell me a joke"],
+    "story": ["Tell me a story", "tell me a story please", "Tell me a story!", "please tell me a story"],
+    "love": ["I love you", "i love you!", "I love you so much"],
+    "hate": ["I hate you", "i hate you!", "I hate you so much"],
+    "sum_4": ["what is 2+2", "What is 2 + 2?", "whats 2+2"],
+    "sum_5": ["what is 2+3", "What is 2 + 3?", "whats 2+3"],
+    "weather": ["What's the weather like?", "what is the weather like", "how's the weather", "What is the weather like today?"],
+    "favorite_food": ["What's your favorite food?", "what is your favourite food", "favorite food?", "What food do you like best?"],
+    "where_from": ["Where are you from?", "where are you from", "where do you come from?", "Where are you from originally?"],
+    "help": ["Can you help me?", "can you help me please", "could you help me?", "I need help"],
+    "goodbye": ["Goodbye", "bye!", "good bye", "See you later"],
+}
+
+
+def evaluate(threshold: float, rounds: int, seed: int = 0) -> dict:
+    """Replay the labeled set rounds times in random orders."""
+    queries = [(intent, text) for intent, texts in INTENTS.items() for text in texts]
+    rng = random.Random(seed)
+    true_hits = false_hits = possible = 0
+    for _ in range(rounds):
+        cache = SemanticCache(threshold=threshold)
+        rng.shuffle(queries)
+        seen = set()
+        for intent, text in queries:
+            if intent in seen:
+                possible += 1
+            reply = cache.get(PERSONA, ChatMode.REGULAR, text)
+            if reply is None:
+                cache.set(PERSONA, ChatMode.REGULAR, text, (intent, False))
+            elif reply[0] == intent:
+                true_hits += 1
+            else:
+                false_hits += 1
+            seen.add(intent)
+    total = rounds * len(queries)
+    return {
+        "hit_rate": true_hits / total,
+        "false_hit_rate": false_hits / total,
+        "possible": possible / total
+    }
+
+
+def lookup_cost(entries: int, lookups: int = 2000) -> float:
+    """Microseconds per lookup against a group of entries messages."""
+    cache = SemanticCache(threshold=0.85, max_entries=entries)
+    rng = random.Random(1)
+    words = [text for texts in INTENTS.values() for text in texts]
+    for i in range(entries):
+        cache.set(PERSONA, ChatMode.REGULAR, f"{rng.choice(words)} {i}", ("reply", False))
+    start = time.perf_counter()
+    for i in range(lookups):
+        cache.get(PERSONA, ChatMode.REGULAR, words[i % len(words)])
+    return (time.perf_counter() - start) / lookups * 1e6
+
+
+def main(args):
+    print(f"{sum(len(t) for t in INTENTS.values())} messages in {len(INTENTS)} intents, {args.rounds} rounds")
+    print(f"{'threshold':>9} {'hit rate':>9} {'false hits':>11} {'possible':>9}")
+    for threshold in args.thresholds:
+        result = evaluate(threshold, args.rounds)
+        print(f"{threshold:>9.2f} {result['hit_rate']:>9.1%} {result['false_hit_rate']:>11.1%} {result['possible']:>9.1%}")
+    print("lookup cost:")
+    for entries in args.entries:
+        print(f"  {entries:>5} entries {lookup_cost(entries):>9.1f}us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.7, 0.8, 0.85, 0.9, 0.95, 1.0])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--entries", type=int, nargs="+", default=[16, 64, 256])
+    main(parser.parse_args())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Response serialization cost per endpoint: FastAPI's model path vs the fast path.
+
+"model" is what returning a Pydantic model with response_model costs in
+FastAPI's classic path: re-validating the returned value against the
+response field, jsonable_encoder, then stdlib json in JSONResponse.
+"fast" is what the endpoints do now:
+
+- /generate_persona: default personas are sent as bytes serialized at
+  startup; custom ones are serialized once in Pydantic's core
+- /personas: a page is a join of rows serialized when the snapshot is
+  built (the snapshot build itself is timed separately, per row)
+- /chat: the reply model is serialized in Pydantic's core, without the
+  re-validation pass
+
+Only serialization and response construction are timed, no I/O. The
+"dumps" line compares the JSON encoder used for plain data, orjson (when
+installed) against the stdlib fallback.
+
+Usage:
+    python -m benchmarks.bench_serialization --page 100 --rows 10000
+"""
+import argparse
+import asyncio
+import json
+import time
+from unittest.mock import patch
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from app import serialization
+from app.database import DEFAULT_PERSONAS
+from app.listing import PersonaListing
+from app.main import app
+from app.models import ChatResponse, PersonaResponse
+from app.serialization import RawJSONResponse, dumps, model_response
+
+
+def response_field(path: str):
+    return next(route.response_field for route in app.routes if getattr(route, "path", "") == path)
+
+
+async def classic(field, content) -> bytes:
+    """FastAPI's classic path for a returned model: validate, encode, json.dumps."""
+    encoded = await serialize_response(field=field, response_content=content)
+    return JSONResponse(encoded).body
+
+
+def timed(fn, iterations: int) -> float:
+    """Microseconds per call of fn()."""
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def timed_async(fn, iterations: int) -> float:
+    await fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def synthetic_personas(rows: int) -> list:
+    personas = [{"id": i + 1, "description": d, "is_custom": False} for i, d in enumerate(DEFAULT_PERSONAS)]
+    for i in range(len(personas), rows):
+        personas.append({"id": i + 1, "description": f"A custom persona number {i} who speaks in riddles", "is_custom": True})
+    return personas
+
+
+def report(name: str, model_us: float, fast_us: float):
+    print(f"{name:<34} {model_us:>9.2f}us {fast_us:>9.2f}us {model_us / fast_us:>8.1f}x")
+
+
+async def main(args):
+    personas = synthetic_personas(args.rows)
+    default, custom = personas[0], personas[-1]
+    default_body = dumps(default)
+    reply = ChatResponse(response="Arr, the tide be turning! " * 8, persona=custom["description"], mode="normal", persona_id=7)
+
+    print(f"encoder: {'orjson' if serialization.orjson else 'stdlib json'}")
+    print(f"{'endpoint':<34} {'model':>11} {'fast':>11} {'speedup':>9}")
+
+    n = args.iterations
+    field = response_field("/generate_persona")
+    report(
+        "/generate_persona (default)",
+        await timed_async(lambda: classic(field, PersonaResponse(**default)), n),
+        timed(lambda: RawJSONResponse(default_body), n)
+    )
+    report(
+        "/generate_persona (custom)",
+        await timed_async(lambda: classic(field, PersonaResponse(**custom)), n),
+        timed(lambda: model_response(PersonaResponse(**custom)), n)
+    )
+
+    field = response_field("/chat")
+    report(
+        "/chat",
+        await timed_async(lambda: classic(field, reply), n),
+        timed(lambda: model_response(reply), n)
+    )
+
+    async def all_personas():
+        return personas
+
+    field = response_field("/personas")
+    page = [PersonaResponse(**p) for p in personas[:args.page]]
+    with patch("app.listing.get_all_personas", all_personas):
+        listing = PersonaListing(max_pages=0)
+        await listing.page()
+        report(
+            f"/personas (page of {args.page})",
+            await timed_async(lambda: classic(field, page), max(1, n // 10)),
+            await timed_async(lambda: listing.page(limit=args.page), max(1, n // 10))
+        )
+
+    async def snapshot():
+        listing.invalidate()
+        await listing.page(limit=1)
+
+    with patch("app.listing.get_all_personas", all_personas):
+        per_row = await timed_async(snapshot, 5) / len(personas)
+    print(f"{'snapshot build':<34} {per_row:>21.2f}us/row ({len(personas)} rows)")
+
+    stdlib = timed(lambda: json.dumps(personas[:args.page], separators=(",", ":"), ensure_ascii=False).encode(), n // 10)
+    fast = timed(lambda: dumps(personas[:args.page]), n // 10)
+    report(f"dumps ({args.page} personas)", stdlib, fast)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--page", type=int, default=100, help="personas per /personas page")
+    parser.add_argument("--rows", type=int, default=10000, help="personas in the listing snapshot")
+    asyncio.run(main(parser.parse_args()))
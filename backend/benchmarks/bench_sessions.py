@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Request size and latency of long conversations, stateless vs server sessions.
+
+Stateless clients resend the whole conversation_history on every turn;
+session clients send only the new message and a session_id. Runs the app
+in-process (httpx ASGI transport) against a temporary database and the stub LLM backend.
+
+Usage:
+    python -m benchmarks.bench_sessions --turns 50 --conversations 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+os.environ.setdefault("LLM_BACKEND", "stub")
+
+import httpx
+
+from app import main
+from app.cache import ResponseCache
+
+REPLY = "Arr, the tide be turning and the gulls be crying over the harbour wall tonight."
+
+
+async def conversation(client, turns: int, use_session: bool):
+    """Run one conversation; return (request bytes, latency s) per turn."""
+    history = []
+    session_id = None
+    samples = []
+    for i in range(turns):
+        body = {"message": f"Tell me about day {i} at sea.", "persona": "A pirate captain"}
+        if use_session and session_id:
+            body["session_id"] = session_id
+        elif not use_session:
+            body["conversation_history"] = history
+        payload = json.dumps(body).encode()
+
+        start = time.perf_counter()
+        response = await client.post("/chat", content=payload, headers={"content-type": "application/json"})
+        samples.append((len(payload), time.perf_counter() - start))
+        response.raise_for_status()
+        data = response.json()
+        session_id = data["session_id"]
+        history += [{"type": "human", "content": body["message"]}, {"type": "ai", "content": data["response"]}]
+    return samples
+
+
+async def run(args, use_session: bool):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench") as client:
+        results = [await conversation(client, args.turns, use_session) for _ in range(args.conversations)]
+    last = [samples[-1] for samples in results]
+    total_bytes = sum(size for samples in results for size, _ in samples)
+    return (
+        sum(size for size, _ in last) / len(last),
+        sum(latency for _, latency in last) / len(last) * 1000,
+        total_bytes / len(results) / 1024
+    )
+
+
+async def main_async(args):
+    os.environ.update(STUB_LATENCY=str(args.latency), STUB_REPLY=REPLY)
+    with tempfile.TemporaryDirectory() as tmp, patch("app.database.DATABASE_PATH", os.path.join(tmp, "bench.db")):
+        async with main.app.router.lifespan_context(main.app):
+            main.chat_service.response_cache = ResponseCache(max_entries=0)
+            print(f"turns={args.turns} conversations={args.conversations}")
+            print(f"{'mode':>10} {'bytes@last':>11} {'ms@last':>8} {'KiB/conv':>9}")
+            for name, use_session in (("stateless", False), ("session", True)):
+                size, latency, total = await run(args, use_session)
+                print(f"{name:>10} {size:>11.0f} {latency:>8.2f} {total:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0, help="stub LLM latency in seconds")
+    asyncio.run(main_async(parser.parse_args()))
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Load test for request coalescing against a local stub LLM.
+
+Fires bursts of concurrent chat requests drawn from a small set of distinct
+messages and counts upstream calls with and without coalescing. The response
+cache is disabled so only in-flight sharing is measured.
+
+Usage:
+    python -m benchmarks.bench_singleflight --clients 200 --distinct 5
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("LLM_BACKEND", "stub")
+
+from app.cache import ResponseCache
+from app.admission import AdmissionController
+from app.chat_service import ChatService
+from app.models import ChatMode
+from app.llm import StubLLM
+
+
+async def run(coalesce: bool, args) -> tuple[int, float]:
+    llm = StubLLM(latency=args.latency)
+    # Admission limits out of the way: this measures coalescing alone
+    admission = AdmissionController(max_concurrency=args.clients, max_queue=args.clients)
+    service = ChatService(response_cache=ResponseCache(max_entries=0), coalesce=coalesce, admission=admission, llm=llm)
+    messages = [f"Tell me about treasure #{i % args.distinct}" for i in range(args.clients)]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        service.generate_response(message, "A pirate captain", ChatMode.REGULAR)
+        for message in messages
+    ))
+    return service.llm.calls, time.perf_counter() - start
+
+
+async def main(args):
+    print(f"clients={args.clients} distinct={args.distinct} latency={args.latency}s")
+    for coalesce in (False, True):
+        calls, elapsed = await run(coalesce, args)
+        label = "coalesced" if coalesce else "independent"
+        print(f"{label:>12}: {calls:5d} upstream calls  {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--distinct", type=int, default=5, help="number of distinct requests in the burst")
+    parser.add_argument("--latency", type=float, default=0.2, help="stub LLM latency in seconds")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Cold-start cost: import time and time to first request, eager vs lazy.
+
+Each run is a fresh interpreter that imports app.main, runs the lifespan
+against a database file, then sends GET /health/ready and a first POST
+/chat in-process (httpx ASGI transport, stub LLM backend). "eager" builds
+the chat service during startup; "lazy" sets LAZY_STARTUP so the LLM
+stack is imported and the service built on the first /chat. Runs are
+made both on a fresh database (schema and defaults created) and on an
+existing one, which is the usual autoscaler cold start. Also reports how
+long importing the LLM stack (app.chat_service) takes by itself.
+
+Usage:
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import asyncio, json, sys, time
+started = time.perf_counter()
+from app import main
+imported = time.perf_counter()
+import httpx
+from unittest.mock import patch
+
+async def run():
+    with patch("app.database.DATABASE_PATH", sys.argv[1]):
+        async with main.app.router.lifespan_context(main.app):
+            up = time.perf_counter()
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                assert (await client.get("/health/ready")).status_code == 200
+                ready = time.perf_counter()
+                response = await client.post("/chat", json={"message": "Hello", "persona": "A cold-start tester"})
+                assert response.status_code == 200, response.text
+                chatted = time.perf_counter()
+    print(json.dumps({
+        "import": imported - started,
+        "startup": up - imported,
+        "first_ready": ready - started,
+        "first_chat": chatted - started
+    }))
+
+asyncio.run(run())
+"""
+
+IMPORT_ONLY = r"""
+import json, sys, time
+started = time.perf_counter()
+__import__(sys.argv[1])
+print(json.dumps({"import": time.perf_counter() - started}))
+"""
+
+
+def child(code: str, args, env: dict) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", code, *args], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def median(samples: list, key: str) -> float:
+    return statistics.median(sample[key] for sample in samples) * 1000
+
+
+def main(args):
+    base_env = dict(
+        os.environ, LLM_BACKEND="stub", STUB_LATENCY="0", PERSONA_SYNC_INTERVAL="0", PYTHONPATH=BACKEND_DIR
+    )
+    for module in ("app.main", "app.chat_service"):
+        samples = [child(IMPORT_ONLY, [module], base_env) for _ in range(args.runs)]
+        print(f"import {module:<17} {median(samples, 'import'):>8.1f} ms")
+
+    print(f"\n{'mode':>6} {'database':>9} {'import ms':>10} {'startup ms':>11} {'ready ms':>9} {'first chat ms':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        existing = os.path.join(tmp, "existing.db")
+        child(CHILD, [existing], base_env)
+        for mode in ("eager", "lazy"):
+            env = dict(base_env, LAZY_STARTUP="true" if mode == "lazy" else "false")
+            for database in ("fresh", "existing"):
+                samples = []
+                for run in range(args.runs):
+                    if database == "fresh":
+                        path = os.path.join(tmp, f"fresh-{mode}-{run}.db")
+                    else:
+                        path = os.path.join(tmp, "run.db")
+                        shutil.copy(existing, path)
+                    samples.append(child(CHILD, [path], env))
+                print(f"{mode:>6} {database:>9} {median(samples, 'import'):>10.1f} {median(samples, 'startup'):>11.1f} "
+                      f"{median(samples, 'first_ready'):>9.1f} {median(samples, 'first_chat'):>14.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="interpreters started per configuration (median reported)")
+    main(parser.parse_args())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+First-turn latency of the /generate_persona -> "Hello!" flow with an opening pool.
+
+Users arrive at --rate per second, each with a random default persona,
+and open the conversation with a greeting. The stub LLM answers after
+--latency seconds. Compared setups:
+
+- "no pool": every greeting goes upstream (response cache off, so each
+  user gets their own reply, which is what the pool also provides)
+- "cache": the exact response cache answers repeats with the same reply
+- "pool": the warmup job keeps --depth pre-generated replies per persona
+  and refills them in the background while users consume them
+
+Reports latency percentiles, the share answered without waiting for the
+model, and for the pool its fill level and consumption rate at the end.
+
+Usage:
+    python -m benchmarks.bench_warmup --users 300 --rate 50 --depth 2 4
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+
+os.environ.setdefault("LLM_BACKEND", "stub")
+
+from app.cache import ResponseCache
+from app.chat_service import ChatService
+from app.database import DEFAULT_PERSONAS
+from app.models import ChatMode
+from app.warmup import OpeningPool
+
+
+async def first_turns(service: ChatService, args) -> list:
+    rng = random.Random(0)
+    latencies = []
+
+    async def user():
+        persona = rng.choice(DEFAULT_PERSONAS)
+        started = time.perf_counter()
+        await service.generate_response("Hello!", persona, ChatMode.REGULAR)
+        latencies.append(time.perf_counter() - started)
+
+    tasks = []
+    for _ in range(args.users):
+        tasks.append(asyncio.create_task(user()))
+        await asyncio.sleep(1 / args.rate)
+    await asyncio.gather(*tasks)
+    return latencies
+
+
+def summarize(name: str, latencies: list, latency: float, extra: str = ""):
+    latencies = sorted(latencies)
+    instant = sum(1 for t in latencies if t < latency / 2) / len(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:<12} {statistics.median(latencies) * 1000:>8.1f}ms {p95 * 1000:>8.1f}ms {instant:>8.1%}  {extra}")
+
+
+async def main(args):
+    os.environ["STUB_LATENCY"] = str(args.latency)
+    print(f"{args.users} users at {args.rate}/s over {len(DEFAULT_PERSONAS)} personas, model latency {args.latency * 1000:.0f}ms")
+    print(f"{'setup':<12} {'p50':>10} {'p95':>10} {'instant':>9}")
+
+    service = ChatService(response_cache=ResponseCache(max_entries=0))
+    summarize("no pool", await first_turns(service, args), args.latency)
+
+    service = ChatService()
+    summarize("cache", await first_turns(service, args), args.latency)
+
+    for depth in args.depth:
+        service = ChatService(response_cache=ResponseCache(max_entries=0))
+        service.openings = OpeningPool(service.pregenerate, personas=len(DEFAULT_PERSONAS), depth=depth, concurrency=8)
+        service.openings.warm(DEFAULT_PERSONAS)
+        await service.openings.refill()
+        job = asyncio.create_task(service.openings.run(personas=DEFAULT_PERSONAS))
+        try:
+            latencies = await first_turns(service, args)
+        finally:
+            job.cancel()
+        stats = service.openings.stats()
+        summarize(
+            f"pool x{depth}", latencies, args.latency,
+            f"fill {stats['fill_ratio']:.0%}, {stats['consumed_per_minute']:.0f}/min consumed, {stats['generated']} generated"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--rate", type=float, default=50, help="users arriving per second")
+    parser.add_argument("--latency", type=float, default=0.3, help="stub model latency in seconds")
+    parser.add_argument("--depth", type=int, nargs="+", default=[1, 2, 4], help="pooled replies per persona")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark suite for the API hot paths.
+
+Drives app.main:app in-process (httpx ASGI transport) and/or over HTTP with
+uvicorn, against the stub LLM backend and a temporary database topped up to
+each table size. For every endpoint and concurrency level it reports p50,
+p95 and p99 latency and requests per second; the profanity filter is timed
+directly. Results are written to JSON, and --baseline compares them with an
+earlier run, exiting non-zero when p95 latency regressed beyond --threshold.
+
+Usage:
+    python -m benchmarks.suite --transport inprocess uvicorn --concurrency 1 8 32 --rows 30 10000
+    python -m benchmarks.suite --output after.json --baseline before.json
+    python -m benchmarks.suite --transport uvicorn --workers 4 --concurrency 32 128
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+os.environ.setdefault("LLM_BACKEND", "stub")
+
+import httpx
+
+from app import database, main
+from app.profanity import profanity_filter
+from benchmarks.bench_random_persona import fill_table
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROFANITY_SAMPLE = (
+    "Well, that was a damn good voyage, matey. The crew worked hard, the sea was calm "
+    "and not one of those bloody gulls stole our bread this time. What the hell, let's sail again!"
+)
+
+
+def scenarios(run_id: str):
+    """Endpoint name -> function building request i as (method, url, json body)."""
+    return {
+        "chat": lambda i: ("POST", "/chat", {"message": f"Benchmark message {run_id}-{i}", "persona": "A pirate captain"}),
+        "chat_cached": lambda i: ("POST", "/chat", {"message": "Benchmark message", "persona": "A pirate captain"}),
+        "generate_persona": lambda i: ("GET", "/generate_persona", None),
+        "personas": lambda i: ("GET", "/personas", None),
+        "add_persona": lambda i: (
+            "POST", "/add_persona", {"description": f"A benchmark persona {run_id}-{i} who enjoys load tests"}
+        ),
+    }
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, elapsed: float, errors: int) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+async def drive(client: httpx.AsyncClient, make_request, total: int, concurrency: int) -> dict:
+    """Send total requests from concurrency closed-loop workers."""
+    counter = itertools.count()
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while (i := next(counter)) < total:
+            method, url, body = make_request(i)
+            start = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+def bench_profanity(total: int) -> dict:
+    """Per-call latency of the regular-mode profanity filter."""
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(total):
+        t = time.perf_counter()
+        profanity_filter.filter(PROFANITY_SAMPLE)
+        latencies.append(time.perf_counter() - t)
+    return summarize(latencies, time.perf_counter() - start, 0)
+
+
+async def run_endpoints(client, transport: str, rows: int, args, results: list):
+    for endpoint in scenarios(""):
+        if args.endpoints and endpoint not in args.endpoints:
+            continue
+        for concurrency in args.concurrency:
+            # Unique per run so messages miss the cache and personas do not collide
+            make_request = scenarios(f"{transport}-{rows}-{concurrency}-{time.time_ns()}")[endpoint]
+            # Warm caches and connections before measuring
+            await drive(client, lambda i: make_request(-1 - i), min(20, concurrency * 2), concurrency)
+            result = await drive(client, make_request, args.requests, concurrency)
+            result.update(transport=transport, rows=rows, endpoint=endpoint, concurrency=concurrency)
+            results.append(result)
+            print(
+                f"{transport:>9} {rows:>7} {endpoint:>16} {concurrency:>4} {result['rps']:>9.1f} "
+                f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['errors']:>6}"
+            )
+
+
+async def prepare_database(path: str, rows: int):
+    with patch("app.database.DATABASE_PATH", path):
+        await database.init_database()
+        await fill_table(rows)
+
+
+async def run_inprocess(db_path: str, rows: int, args, results: list):
+    with patch("app.database.DATABASE_PATH", db_path):
+        async with main.app.router.lifespan_context(main.app):
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                await run_endpoints(client, "inprocess", rows, args, results)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def run_uvicorn(workdir: str, rows: int, args, results: list):
+    # The server runs in workdir so its default personas.db is the prepared table
+    port = free_port()
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, WEB_CONCURRENCY=str(args.workers))
+    label = "uvicorn"
+    if args.workers > 1:
+        # Same shared state as the start-prod launcher sets up
+        env["SHARED_STATE_DB"] = os.path.join(workdir, "shared_state.db")
+        label = f"uvicorn/{args.workers}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning",
+         "--workers", str(args.workers)],
+        cwd=workdir,
+        env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=None, limits=limits) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn did not start")
+                await asyncio.sleep(0.1)
+            await run_endpoints(client, label, rows, args, results)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: list, baseline_path: str, threshold: float) -> int:
+    """Print p95 changes against a baseline run; return the number of regressions."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    key = lambda r: (r["transport"], r["rows"], r["endpoint"], r["concurrency"])
+    before = {key(r): r for r in baseline["results"]}
+
+    regressions = 0
+    print(f"\nagainst {baseline_path} (commit {baseline['meta'].get('commit')}):")
+    for result in results:
+        old = before.get(key(result))
+        if not old or not old["p95_ms"]:
+            continue
+        change = result["p95_ms"] / old["p95_ms"] - 1
+        flag = ""
+        if change > threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"  {' '.join(map(str, key(result))):>40}  p95 {old['p95_ms']:.2f} -> {result['p95_ms']:.2f} ms ({change:+.0%}){flag}")
+    return regressions
+
+
+async def main_async(args) -> int:
+    os.environ["STUB_LATENCY"] = str(args.latency)
+    results = []
+
+    print(f"requests={args.requests} stub latency={args.latency * 1000:.0f}ms")
+    print(f"{'transport':>9} {'rows':>7} {'endpoint':>16} {'conc':>4} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>6}")
+    for rows in args.rows:
+        for transport in args.transport:
+            with tempfile.TemporaryDirectory() as workdir:
+                db_path = os.path.join(workdir, "personas.db")
+                await prepare_database(db_path, rows)
+                if transport == "inprocess":
+                    await run_inprocess(db_path, rows, args, results)
+                else:
+                    await run_uvicorn(workdir, rows, args, results)
+
+    profanity = bench_profanity(args.requests * 50)
+    profanity.update(transport="direct", rows=0, endpoint="profanity_filter", concurrency=1)
+    results.append(profanity)
+    print(f"{'direct':>9} {'-':>7} {'profanity_filter':>16} {1:>4} {profanity['rps']:>9.1f} "
+          f"{profanity['p50_ms']:>9.3f} {profanity['p95_ms']:>9.3f} {profanity['p99_ms']:>9.3f} {0:>6}")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nwrote {args.output}")
+
+    if args.baseline:
+        return 1 if compare(results, args.baseline, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transport", nargs="+", choices=["inprocess", "uvicorn"], default=["inprocess"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--rows", type=int, nargs="+", default=[30, 10_000], help="personas table sizes")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per endpoint and level")
+    parser.add_argument("--endpoints", nargs="+", help="only run these endpoints")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub LLM latency in seconds")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="p95 increase counted as a regression")
+    sys.exit(asyncio.run(main_async(parser.parse_args())))
@@ -0,0 +1,152 @@
+import pytest
+import asyncio
+
+from app.admission import AdmissionController, AdmissionRejected, SharedTokenBucket, TokenBucket
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_token_bucket_burst_and_refill():
+    """Test that the bucket allows a burst, then refills at the rate."""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=2, clock=clock)
+    assert bucket.reserve(max_wait=0) == 0
+    assert bucket.reserve(max_wait=0) == 0
+    assert bucket.reserve(max_wait=0) is None
+    assert bucket.time_to_token() == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert bucket.reserve(max_wait=0) == 0
+
+def test_token_bucket_reservation_delay():
+    """Test that a reservation within max_wait returns its delay."""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1, burst=1, clock=clock)
+    bucket.reserve(max_wait=0)
+    assert bucket.reserve(max_wait=5) == pytest.approx(1.0)
+    assert bucket.reserve(max_wait=5) == pytest.approx(2.0)
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    """Test that no more than max_concurrency blocks run at once."""
+    controller = AdmissionController(max_concurrency=2, max_queue=10)
+    running = 0
+    peak = 0
+
+    async def call():
+        nonlocal running, peak
+        async with controller.slot():
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(call() for _ in range(6)))
+    assert peak == 2
+    assert controller.stats()["admitted"] == 6
+    assert controller.stats()["active"] == 0
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_immediately():
+    """Test that requests beyond the queue bound are rejected at once."""
+    controller = AdmissionController(max_concurrency=1, max_queue=1)
+    release = asyncio.Event()
+
+    async def hold():
+        async with controller.slot():
+            await release.wait()
+
+    holder = asyncio.ensure_future(hold())
+    await asyncio.sleep(0)
+    waiter = asyncio.ensure_future(hold())
+    await asyncio.sleep(0)
+    assert controller.stats()["queue_depth"] == 1
+
+    with pytest.raises(AdmissionRejected) as exc_info:
+        async with controller.slot():
+            pass
+    assert exc_info.value.reason == "queue full"
+    assert int(exc_info.value.retry_after_header) >= 1
+
+    release.set()
+    await asyncio.gather(holder, waiter)
+    assert controller.stats()["rejected"] == 1
+
+@pytest.mark.asyncio
+async def test_queue_deadline():
+    """Test that a queued request gives up after queue_timeout."""
+    controller = AdmissionController(max_concurrency=1, queue_timeout=0.01)
+    release = asyncio.Event()
+
+    async def hold():
+        async with controller.slot():
+            await release.wait()
+
+    holder = asyncio.ensure_future(hold())
+    await asyncio.sleep(0)
+    with pytest.raises(AdmissionRejected) as exc_info:
+        async with controller.slot():
+            pass
+    assert exc_info.value.reason == "queue timeout"
+
+    release.set()
+    await holder
+    # The timed-out waiter must not have leaked a permit
+    async with controller.slot():
+        assert controller.stats()["active"] == 1
+
+@pytest.mark.asyncio
+async def test_rate_limit_rejects_beyond_deadline():
+    """Test that the rate limiter rejects when a token is too far away."""
+    controller = AdmissionController(rate=1, burst=1, queue_timeout=0.1)
+    async with controller.slot():
+        pass
+    with pytest.raises(AdmissionRejected) as exc_info:
+        async with controller.slot():
+            pass
+    assert exc_info.value.reason == "rate limited"
+
+def test_shared_token_bucket_is_shared(tmp_path):
+    """Test that buckets on the same file draw from one budget."""
+    clock = FakeClock()
+    path = str(tmp_path / "shared.db")
+    first = SharedTokenBucket(path, rate=1, burst=2, clock=clock)
+    second = SharedTokenBucket(path, rate=1, burst=2, clock=clock)
+    try:
+        assert first.reserve(max_wait=0) == 0
+        assert second.reserve(max_wait=0) == 0
+        assert first.reserve(max_wait=0) is None
+        assert second.time_to_token() == pytest.approx(1.0)
+
+        clock.now += 1
+        assert second.reserve(max_wait=0) == 0
+        assert first.reserve(max_wait=0) is None
+    finally:
+        first.close()
+        second.close()
+
+def test_limits_split_across_workers(monkeypatch, tmp_path):
+    """Test that each worker takes its share of the server-wide limits."""
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    monkeypatch.setenv("CHAT_MAX_CONCURRENCY", "16")
+    monkeypatch.setenv("CHAT_MAX_QUEUE", "10")
+    monkeypatch.setenv("CHAT_RATE_LIMIT", "8")
+    monkeypatch.delenv("CHAT_RATE_BURST", raising=False)
+    monkeypatch.delenv("SHARED_STATE_DB", raising=False)
+
+    controller = AdmissionController.from_env()
+    assert controller.max_concurrency == 4
+    assert controller.max_queue == 3
+    assert controller.bucket.rate == 2
+
+    monkeypatch.setenv("SHARED_STATE_DB", str(tmp_path / "shared.db"))
+    controller = AdmissionController.from_env()
+    assert isinstance(controller.bucket, SharedTokenBucket)
+    assert controller.bucket.rate == 8
+    controller.close()
@@ -1,12 +1,16 @@
 import pytest
 import asyncio
 from fastapi.testclient import TestClient
-from unittest.mock import patch, AsyncMock
+from unittest.mock import patch, AsyncMock, MagicMock
 import tempfile
 import os
+import json
 
 from app.main import app
-from app.database import init_database
+from app.database import init_database, add_persona_listener, remove_persona_listener
+from app.sessions import SessionStore
+from app.dedupe import NearDuplicateIndex
+from app.listing import PersonaListing
 
 @pytest.fixture
 def client():
@@ -44,6 +48,32 @@ def test_health_endpoint(client):
     assert "status" in data
     assert "groq_configured" in data
 
+def test_liveness_and_readiness(client):
+    """Test that liveness always answers and readiness waits for startup."""
+    assert client.get("/health/live").json() == {"status": "alive"}
+    
+    # The test client does not run the lifespan, so startup never finished
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "starting"
+
+def test_lazy_startup_defers_chat_service(temp_db_for_api):
+    """Test that LAZY_STARTUP builds the chat service on the first chat."""
+    env = {"LLM_BACKEND": "stub", "STUB_LATENCY": "0", "PERSONA_SYNC_INTERVAL": "0"}
+    with patch.dict(os.environ, env), \
+         patch('app.database.DATABASE_PATH', temp_db_for_api), \
+         patch('app.main.LAZY_STARTUP', True), \
+         patch('app.main.persona_listing', PersonaListing()), \
+         patch('app.main.duplicate_index', NearDuplicateIndex()):
+        with TestClient(app) as lazy_client:
+            response = lazy_client.get("/health/ready")
+            assert response.status_code == 200
+            assert response.json()["chat_service"] == "deferred"
+            
+            response = lazy_client.post("/chat", json={"message": "Hello", "persona": "A calm lighthouse keeper"})
+            assert response.status_code == 200
+            assert lazy_client.get("/health/ready").json()["chat_service"] == "loaded"
+
 @pytest.mark.asyncio
 async def test_generate_persona_endpoint(client, temp_db_for_api):
     """Test the generate persona endpoint."""
@@ -55,6 +85,37 @@ async def test_generate_persona_endpoint(client, temp_db_for_api):
         assert "description" in data
         assert "is_custom" in data
 
+@pytest.mark.asyncio
+async def test_generate_persona_filtered(client, temp_db_for_api):
+    """Test generating a persona restricted to custom or default ones."""
+    with patch('app.database.DATABASE_PATH', temp_db_for_api):
+        response = client.get("/generate_persona", params={"is_custom": "false"})
+        assert response.status_code == 200
+        assert response.json()["is_custom"] is False
+        
+        response = client.get("/generate_persona", params={"is_custom": "true"})
+        assert response.status_code == 404
+        
+        response = client.get("/generate_persona", params={"custom_weight": 2})
+        assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_generate_persona_serves_preserialized_defaults(client, temp_db_for_api):
+    """Test that default personas are served from their startup-serialized bodies."""
+    from app.database import get_all_personas, load_sampler
+    import aiosqlite
+
+    with patch('app.database.DATABASE_PATH', temp_db_for_api):
+        async with aiosqlite.connect(temp_db_for_api) as db:
+            await load_sampler(db)
+        defaults = [p for p in await get_all_personas() if not p["is_custom"]]
+        bodies = {p["id"]: json.dumps(p).encode() for p in defaults}
+        with patch.dict('app.main.default_persona_bodies', bodies, clear=True):
+            response = client.get("/generate_persona", params={"is_custom": "false"})
+        assert response.status_code == 200
+        assert response.content == bodies[response.json()["id"]]
+        assert response.headers["content-type"] == "application/json"
+
 @pytest.mark.asyncio
 async def test_list_personas_endpoint(client, temp_db_for_api):
     """Test the list personas endpoint."""
@@ -90,6 +151,26 @@ def test_add_persona_invalid(client):
         response = client.post("/add_persona", json=persona_data)
         assert response.status_code == 400
 
+@pytest.mark.asyncio
+async def test_add_persona_near_duplicate(client, temp_db_for_api):
+    """Test that a near-copy of a stored persona is rejected with 409."""
+    index = NearDuplicateIndex(threshold=0.7)
+    add_persona_listener(index.on_persona_changed)
+    try:
+        with patch('app.database.DATABASE_PATH', temp_db_for_api), \
+             patch('app.main.duplicate_index', index), \
+             patch('app.main.chat_service') as mock_service:
+            mock_service.validate_persona.return_value = True
+            
+            response = client.post("/add_persona", json={"description": "A retired sea captain telling long stories"})
+            assert response.status_code == 200
+            
+            response = client.post("/add_persona", json={"description": "A retired sea captain telling long stories!!"})
+            assert response.status_code == 409
+            assert response.json()["detail"].startswith("Too similar")
+    finally:
+        remove_persona_listener(index.on_persona_changed)
+
 @pytest.mark.asyncio
 async def test_chat_endpoint_no_groq(client):
     """Test chat endpoint without Groq configuration."""
@@ -147,3 +228,244 @@ def test_chat_endpoint_empty_persona(client):
         }
         response = client.post("/chat", json=chat_data)
         assert response.status_code == 400
+
+def test_chat_stream_endpoint(client):
+    """Test the streaming chat endpoint emits NDJSON events."""
+    async def fake_stream(**kwargs):
+        yield {"type": "token", "content": "Hello "}
+        yield {"type": "token", "content": "there!"}
+        yield {"type": "done", "filtered": False}
+    
+    mock_service = AsyncMock()
+    mock_service.stream_response = fake_stream
+    
+    with patch('app.main.chat_service', mock_service):
+        chat_data = {
+            "message": "Hello",
+            "persona": "A friendly AI assistant",
+            "mode": "regular"
+        }
+        response = client.post("/chat/stream", json=chat_data)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        events = [json.loads(line) for line in response.text.splitlines()]
+        assert "".join(e["content"] for e in events if e["type"] == "token") == "Hello there!"
+        assert events[-1]["type"] == "done"
+        assert events[-1]["filtered"] is False
+        assert events[-1]["persona"] == "A friendly AI assistant"
+
+def test_chat_stream_endpoint_no_groq(client):
+    """Test streaming chat endpoint without Groq configuration."""
+    with patch('app.main.chat_service', None):
+        chat_data = {"message": "Hello", "persona": "A friendly AI", "mode": "regular"}
+        response = client.post("/chat/stream", json=chat_data)
+        assert response.status_code == 503
+
+def test_chat_endpoint_busy(client):
+    """Test that admission rejections become 503 with Retry-After."""
+    from app.admission import AdmissionRejected
+    
+    mock_service = AsyncMock()
+    mock_service.generate_response.side_effect = AdmissionRejected("queue full", 2.5)
+    
+    with patch('app.main.chat_service', mock_service):
+        chat_data = {"message": "Hello", "persona": "A friendly AI", "mode": "regular"}
+        response = client.post("/chat", json=chat_data)
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "3"
+
+def test_chat_endpoint_upstream_errors(client):
+    """Test that upstream failures come back as error statuses, not replies."""
+    from app.resilience import UpstreamError
+    
+    mock_service = AsyncMock()
+    chat_data = {"message": "Hello", "persona": "A friendly AI", "mode": "regular"}
+    with patch('app.main.chat_service', mock_service):
+        mock_service.generate_response.side_effect = UpstreamError("upstream timed out after 30s", 504)
+        response = client.post("/chat", json=chat_data)
+        assert response.status_code == 504
+        assert "retry-after" not in response.headers
+        
+        mock_service.generate_response.side_effect = UpstreamError("upstream unavailable (circuit open)", 503, 12.2)
+        response = client.post("/chat", json=chat_data)
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "13"
+
+@pytest.mark.asyncio
+async def test_chat_endpoint_by_persona_id(client, temp_db_for_api):
+    """Test chatting with a stored persona referenced by id."""
+    mock_service = AsyncMock()
+    mock_service.generate_response.return_value = ("Arr!", False)
+    
+    with patch('app.database.DATABASE_PATH', temp_db_for_api), patch('app.main.chat_service', mock_service):
+        persona = client.get("/personas").json()[0]
+        response = client.post("/chat", json={"message": "Hello", "persona_id": persona["id"]})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["persona"] == persona["description"]
+        assert data["persona_id"] == persona["id"]
+        assert mock_service.generate_response.call_args.kwargs["persona"] == persona["description"]
+        
+        response = client.post("/chat", json={"message": "Hello", "persona_id": 999999})
+        assert response.status_code == 404
+
+def test_chat_endpoint_missing_persona(client):
+    """Test that a chat request needs a persona or persona_id."""
+    with patch('app.main.chat_service', AsyncMock()):
+        response = client.post("/chat", json={"message": "Hello"})
+        assert response.status_code == 400
+
+def test_deleted_persona_invalidates_prompt_cache():
+    """Test that deleting a persona drops its cached prompts."""
+    from unittest.mock import MagicMock
+    from app.main import on_persona_changed
+    
+    mock_service = MagicMock()
+    with patch('app.main.chat_service', mock_service):
+        on_persona_changed("deleted", {"id": 1, "description": "A doomed persona", "is_custom": True})
+        mock_service.invalidate_persona.assert_called_once_with("A doomed persona")
+
+@pytest.mark.asyncio
+async def test_chat_endpoint_session(client, temp_db_for_api):
+    """Test that a session carries the history between requests."""
+    mock_service = AsyncMock()
+    mock_service.generate_response.return_value = ("Ahoy!", False)
+    
+    with patch('app.database.DATABASE_PATH', temp_db_for_api), \
+            patch('app.main.chat_service', mock_service), \
+            patch('app.main.session_store', SessionStore()):
+        first = client.post("/chat", json={"message": "Hi", "persona": "A pirate"})
+        session_id = first.json()["session_id"]
+        assert session_id
+        
+        second = client.post("/chat", json={"message": "Where to?", "persona": "A pirate", "session_id": session_id})
+        assert second.status_code == 200
+        history = mock_service.generate_response.call_args.kwargs["conversation_history"]
+        assert history == [{"type": "human", "content": "Hi"}, {"type": "ai", "content": "Ahoy!"}]
+        
+        missing = client.post("/chat", json={"message": "Hi", "persona": "A pirate", "session_id": "nope"})
+        assert missing.status_code == 404
+
+def test_chat_batch_endpoint(client):
+    """Test that batch results come back in order with per-item errors."""
+    mock_service = AsyncMock()
+    
+    async def generate_response(user_input, persona, mode, conversation_history):
+        return (f"{persona}: {user_input}", False)
+    
+    mock_service.generate_response.side_effect = generate_response
+    
+    with patch('app.main.chat_service', mock_service):
+        response = client.post("/chat/batch", json={"items": [
+            {"message": "One", "persona": "A pirate"},
+            {"message": "", "persona": "A pirate"},
+            {"message": "Three", "persona": "A robot"}
+        ]})
+        assert response.status_code == 200
+        data = response.json()
+        assert [r["index"] for r in data["results"]] == [0, 1, 2]
+        assert data["results"][0]["result"]["response"] == "A pirate: One"
+        assert data["results"][1]["status"] == 400
+        assert data["results"][1]["error"] == "Message cannot be empty"
+        assert data["results"][2]["result"]["response"] == "A robot: Three"
+        assert (data["succeeded"], data["failed"]) == (2, 1)
+
+def test_chat_batch_stream(client):
+    """Test that a streamed batch yields one NDJSON line per item."""
+    mock_service = AsyncMock()
+    mock_service.generate_response.return_value = ("Ahoy!", False)
+    
+    with patch('app.main.chat_service', mock_service):
+        response = client.post("/chat/batch", json={
+            "stream": True,
+            "items": [{"message": f"Hi {i}", "persona": "A pirate"} for i in range(5)]
+        })
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert sorted(line["index"] for line in lines) == list(range(5))
+        assert all(line["result"]["response"] == "Ahoy!" for line in lines)
+
+def test_chat_batch_limits(client):
+    """Test that empty and oversized batches are rejected."""
+    with patch('app.main.chat_service', AsyncMock()):
+        assert client.post("/chat/batch", json={"items": []}).status_code == 400
+        with patch('app.main.BATCH_MAX_ITEMS', 2):
+            items = [{"message": "Hi", "persona": "A pirate"}] * 3
+            assert client.post("/chat/batch", json={"items": items}).status_code == 413
+
+@pytest.mark.asyncio
+async def test_chat_broadcast_endpoint(client, temp_db_for_api):
+    """Test that a broadcast streams one reply per persona, then done."""
+    mock_service = MagicMock()
+    
+    async def broadcast(user_input, personas, mode, conversation_history):
+        for index in reversed(range(len(personas))):
+            yield {"index": index, "response": f"{personas[index]} says hi", "filtered": False}
+    
+    mock_service.broadcast = broadcast
+    
+    with patch('app.database.DATABASE_PATH', temp_db_for_api), patch('app.main.chat_service', mock_service):
+        response = client.post("/chat/broadcast", json={
+            "message": "Hi",
+            "persona_ids": [1],
+            "personas": ["A custom robot"]
+        })
+        assert response.status_code == 200
+        events = [json.loads(line) for line in response.text.splitlines()]
+        assert [e["type"] for e in events] == ["reply", "reply", "done"]
+        assert events[0]["persona"] == "A custom robot" and events[0]["persona_id"] is None
+        assert events[1]["persona_id"] == 1
+        assert events[1]["response"] == f"{events[1]['persona']} says hi"
+        
+        missing = client.post("/chat/broadcast", json={"message": "Hi", "persona_ids": [99999]})
+        assert missing.status_code == 404
+        assert client.post("/chat/broadcast", json={"message": "Hi"}).status_code == 400
+
+def test_chat_server_timing_and_metrics(client):
+    """Test the Server-Timing header and the Prometheus /metrics endpoint."""
+    mock_service = AsyncMock()
+    mock_service.generate_response.return_value = ("Ahoy!", False)
+    
+    with patch('app.main.chat_service', mock_service):
+        response = client.post("/chat", json={"message": "Hi", "persona": "A pirate"})
+    assert response.status_code == 200
+    assert "parse;dur=" in response.headers["server-timing"]
+    assert "total;dur=" in response.headers["server-timing"]
+    
+    metrics = client.get("/metrics")
+    assert metrics.status_code == 200
+    assert metrics.headers["content-type"].startswith("text/plain")
+    assert 'faceless_stage_seconds_count{stage="parse"}' in metrics.text
+    assert 'faceless_http_request_seconds_count{method="POST",route="/chat",status="200"}' in metrics.text
+
+@pytest.mark.asyncio
+async def test_list_personas_pagination_and_etag(client, temp_db_for_api):
+    """Test cursor pagination headers and 304 on a matching If-None-Match."""
+    with patch('app.database.DATABASE_PATH', temp_db_for_api), patch('app.main.persona_listing', PersonaListing()):
+        first = client.get("/personas", params={"limit": 10})
+        assert first.status_code == 200
+        assert len(first.json()) == 10
+        cursor = first.headers["x-next-cursor"]
+        
+        second = client.get("/personas", params={"limit": 10, "cursor": cursor})
+        assert {p["id"] for p in second.json()}.isdisjoint(p["id"] for p in first.json())
+        
+        cached = client.get("/personas", params={"limit": 10}, headers={"If-None-Match": first.headers["etag"]})
+        assert cached.status_code == 304
+        assert client.get("/personas", params={"cursor": "bogus"}).status_code == 400
+
+@pytest.mark.asyncio
+async def test_import_and_export_personas(client, temp_db_for_api):
+    """Test the bulk import and streamed export endpoints."""
+    with patch('app.database.DATABASE_PATH', temp_db_for_api):
+        body = "description\nA retired pirate turned gardener\nshort\n"
+        response = client.post("/personas/import", content=body, headers={"content-type": "text/csv"})
+        assert response.status_code == 200
+        report = response.json()
+        assert (report["inserted"], report["rejected"]) == (1, 1)
+        
+        export = client.get("/personas/export", params={"is_custom": True})
+        assert export.status_code == 200
+        assert export.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in export.text.splitlines()]
+        assert [r["description"] for r in rows] == ["A retired pirate turned gardener"]
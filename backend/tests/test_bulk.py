@@ -0,0 +1,91 @@
+import pytest
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+from app.bulk import export_personas, import_personas, iter_lines, parse_csv
+from app.cli import export_main, import_main
+from app.database import init_database, get_all_personas, get_random_persona, DEFAULT_PERSONAS
+
+@pytest.fixture
+async def temp_db():
+    """Create a temporary database for testing."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.db') as tmp:
+        temp_db_path = tmp.name
+    
+    with patch('app.database.DATABASE_PATH', temp_db_path):
+        await init_database()
+        yield temp_db_path
+    
+    if os.path.exists(temp_db_path):
+        os.unlink(temp_db_path)
+
+async def collect(aiter):
+    return [item async for item in aiter]
+
+@pytest.mark.asyncio
+async def test_iter_lines_across_chunks():
+    """Test that lines and multi-byte characters split across chunks are rejoined."""
+    data = "first line\r\nsecond café\nthird".encode()
+    chunks = [data[i:i + 3] for i in range(0, len(data), 3)]
+    assert await collect(iter_lines(chunks)) == ["first line", "second café", "third"]
+
+@pytest.mark.asyncio
+async def test_parse_csv_header_and_quoted_newlines():
+    """Test the description column and quoted fields spanning lines."""
+    lines = iter_lines([b'id,description\n1,"A poet who writes\nin two lines"\n2,A plain baker who loves bread\n3\n'])
+    rows = await collect(parse_csv(lines))
+    assert rows == [
+        (2, "A poet who writes\nin two lines", ""),
+        (4, "A plain baker who loves bread", ""),
+        (5, None, "missing description")
+    ]
+
+@pytest.mark.asyncio
+async def test_import_report(temp_db):
+    """Test that valid rows are inserted in batches and the rest reported."""
+    lines = [
+        json.dumps({"description": "A cheerful lighthouse keeper"}),
+        json.dumps("A grumpy dragon who hoards teacups"),
+        json.dumps({"description": "A cheerful lighthouse keeper"}),
+        json.dumps({"description": "Too short"}),
+        "not json",
+        json.dumps({"description": "A wizard dealing in illegal potions"}),
+        json.dumps({"description": DEFAULT_PERSONAS[0]}),
+    ]
+    report = await import_personas(iter_lines([("\n".join(lines)).encode()]), batch_size=1)
+    assert report["rows"] == 7
+    assert report["inserted"] == 2
+    # One duplicate within the file, one already in the table
+    assert report["duplicates"] == 2
+    assert report["rejected"] == 3
+    assert [e["line"] for e in report["errors"]] == [4, 5, 6]
+    assert report["rows_per_second"] > 0
+    
+    descriptions = {p["description"] for p in await get_all_personas()}
+    assert "A grumpy dragon who hoards teacups" in descriptions
+    # The sampler knows about the imported rows
+    assert (await get_random_persona(is_custom=True))["is_custom"] is True
+
+@pytest.mark.asyncio
+async def test_export_round_trip(temp_db):
+    """Test that a CSV export can be imported back as duplicates only."""
+    chunks = await collect(export_personas("csv", chunk_rows=7))
+    assert len(chunks) > 1
+    report = await import_personas(iter_lines(chunks), "csv")
+    assert report["inserted"] == 0
+    assert report["duplicates"] == len(await get_all_personas())
+
+def test_cli_import_and_export(tmp_path):
+    """Test the offline import and export commands."""
+    database = str(tmp_path / "cli.db")
+    source = tmp_path / "personas.csv"
+    source.write_text("description\nA sleepy librarian guarding forgotten books\n")
+    output = tmp_path / "export.jsonl"
+    
+    with patch('app.database.DATABASE_PATH', database):
+        assert import_main([str(source), "--database", database]) == 0
+        assert export_main(["--output", str(output), "--personas", "custom", "--database", database]) == 0
+    exported = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [p["description"] for p in exported] == ["A sleepy librarian guarding forgotten books"]
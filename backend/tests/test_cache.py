@@ -0,0 +1,88 @@
+import pytest
+import os
+import tempfile
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from app.cache import ResponseCache
+
+class FakeClock:
+    """Manually advanced clock for TTL tests."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def temp_cache_path():
+    """Create a temporary path for a persisted cache."""
+    with tempfile.TemporaryDirectory() as tmp:
+        yield os.path.join(tmp, "response_cache.db")
+
+def test_make_key_depends_on_all_messages():
+    """Test that the key changes with the prompt, history or input."""
+    base = [SystemMessage(content="You are a pirate."), HumanMessage(content="Hi")]
+    assert ResponseCache.make_key(base) == ResponseCache.make_key(list(base))
+    assert ResponseCache.make_key(base) != ResponseCache.make_key(
+        [SystemMessage(content="You are a wizard."), HumanMessage(content="Hi")]
+    )
+    assert ResponseCache.make_key(base) != ResponseCache.make_key(
+        [base[0], HumanMessage(content="Hello"), base[1]]
+    )
+
+@pytest.mark.asyncio
+async def test_hit_and_miss_counters():
+    """Test that lookups are counted."""
+    cache = ResponseCache(max_entries=10)
+    assert await cache.get("a") is None
+    await cache.set("a", ("Ahoy!", False))
+    assert await cache.get("a") == ("Ahoy!", False)
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 1
+
+@pytest.mark.asyncio
+async def test_lru_eviction():
+    """Test that the least recently used entry is evicted."""
+    cache = ResponseCache(max_entries=2)
+    await cache.set("a", ("A", False))
+    await cache.set("b", ("B", False))
+    await cache.get("a")
+    await cache.set("c", ("C", False))
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == ("A", False)
+    assert await cache.get("c") == ("C", False)
+
+@pytest.mark.asyncio
+async def test_ttl_expiry():
+    """Test that entries expire after the TTL."""
+    clock = FakeClock()
+    cache = ResponseCache(ttl=60, clock=clock)
+    await cache.set("a", ("A", False))
+    clock.now += 59
+    assert await cache.get("a") == ("A", False)
+    clock.now += 2
+    assert await cache.get("a") is None
+
+@pytest.mark.asyncio
+async def test_disabled_cache():
+    """Test that a zero-sized cache stores nothing."""
+    cache = ResponseCache(max_entries=0)
+    await cache.set("a", ("A", False))
+    assert await cache.get("a") is None
+
+@pytest.mark.asyncio
+async def test_persistence_survives_restart(temp_cache_path):
+    """Test that persisted entries are served by a new cache instance."""
+    cache = ResponseCache(path=temp_cache_path)
+    await cache.set("a", ("Persisted reply", True))
+    await cache.close()
+
+    reopened = ResponseCache(path=temp_cache_path)
+    assert await reopened.get("a") == ("Persisted reply", True)
+    assert reopened.stats()["hits"] == 1
+    await reopened.close()
@@ -0,0 +1,159 @@
+import pytest
+import asyncio
+from unittest.mock import patch
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from app.chat_service import ChatService, StreamingProfanityFilter
+from app.models import ChatMode
+from app.resilience import UpstreamError
+
+class FakeLLM:
+    """Minimal stand-in for ChatGroq that replies with fixed chunks."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def ainvoke(self, messages):
+        return AIMessage(content="".join(self.chunks))
+
+    async def astream(self, messages):
+        for chunk in self.chunks:
+            yield AIMessageChunk(content=chunk)
+
+@pytest.fixture
+def service():
+    """Create a chat service without touching the network."""
+    with patch.dict('os.environ', {'GROQ_API_KEY': 'test-key'}):
+        return ChatService()
+
+def test_streaming_filter_matches_full_filter(service):
+    """Test that words split across chunks are masked like the full text."""
+    text = "Well damn, what the hell is this shit? Oh dammit."
+    expected, _ = service._apply_profanity_filter(text)
+
+    for size in range(1, 8):
+        stream_filter = StreamingProfanityFilter(service._apply_profanity_filter)
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        output = "".join(stream_filter.feed(chunk) for chunk in chunks) + stream_filter.flush()
+        assert output == expected
+        assert stream_filter.filtered is True
+
+def test_streaming_filter_clean_text(service):
+    """Test that clean text streams through unchanged."""
+    stream_filter = StreamingProfanityFilter(service._apply_profanity_filter)
+    output = stream_filter.feed("Good morning, ") + stream_filter.feed("friend!") + stream_filter.flush()
+    assert output == "Good morning, friend!"
+    assert stream_filter.filtered is False
+
+@pytest.mark.asyncio
+async def test_stream_response_regular_mode(service):
+    """Test streamed events in regular mode."""
+    service.llm = FakeLLM(["Ahoy, what the he", "ll are ye ", "doing?"])
+    events = [
+        event async for event in service.stream_response("Hi", "A pirate captain", ChatMode.REGULAR)
+    ]
+
+    text = "".join(e["content"] for e in events if e["type"] == "token")
+    assert text == "Ahoy, what the h**l are ye doing?"
+    assert events[-1] == {"type": "done", "filtered": True}
+
+@pytest.mark.asyncio
+async def test_stream_response_uncensored_mode(service):
+    """Test that uncensored mode streams chunks unfiltered as they arrive."""
+    service.llm = FakeLLM(["What the ", "hell"])
+    events = [
+        event async for event in service.stream_response("Hi", "A pirate captain", ChatMode.UNCENSORED)
+    ]
+
+    assert [e["content"] for e in events if e["type"] == "token"] == ["What the ", "hell"]
+    assert events[-1] == {"type": "done", "filtered": False}
+
+class CountingLLM(FakeLLM):
+    """Fake LLM that counts upstream calls."""
+
+    def __init__(self, chunks):
+        super().__init__(chunks)
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return await super().ainvoke(messages)
+
+@pytest.mark.asyncio
+async def test_generate_response_uses_cache(service):
+    """Test that a repeated request is answered from the cache."""
+    service.llm = CountingLLM(["Ahoy there!"])
+    first = await service.generate_response("Hi", "A pirate captain", ChatMode.REGULAR)
+    second = await service.generate_response("Hi", "A pirate captain", ChatMode.REGULAR)
+    
+    assert first == second == ("Ahoy there!", False)
+    assert service.llm.calls == 1
+    assert service.response_cache.stats()["hits"] == 1
+    
+    # A different mode is a different prompt
+    await service.generate_response("Hi", "A pirate captain", ChatMode.UNCENSORED)
+    assert service.llm.calls == 2
+
+@pytest.mark.asyncio
+async def test_errors_are_not_cached(service):
+    """Test that failed generations are retried rather than cached."""
+    class FailingLLM:
+        async def ainvoke(self, messages):
+            raise RuntimeError("upstream down")
+    
+    service.llm = FailingLLM()
+    with pytest.raises(UpstreamError) as exc_info:
+        await service.generate_response("Hi", "A pirate captain", ChatMode.REGULAR)
+    assert exc_info.value.status == 502
+    assert service.response_cache.stats()["size"] == 0
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_are_coalesced(service):
+    """Test that a burst of identical requests makes one upstream call."""
+    import asyncio
+    
+    class SlowLLM(CountingLLM):
+        async def ainvoke(self, messages):
+            await asyncio.sleep(0.01)
+            return await super().ainvoke(messages)
+    
+    service.llm = SlowLLM(["Ahoy there!"])
+    service.response_cache.max_entries = 0
+    results = await asyncio.gather(*(
+        service.generate_response("Hi", "A pirate captain", ChatMode.REGULAR) for _ in range(10)
+    ))
+    
+    assert results == [("Ahoy there!", False)] * 10
+    assert service.llm.calls == 1
+    assert service.inflight.stats()["shared"] == 9
+
+class PersonaLLM:
+    """Fake LLM whose reply and latency depend on the persona in the system prompt."""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.peak = 0
+        self.running = 0
+
+    async def ainvoke(self, messages):
+        persona = next(p for p in self.delays if p in messages[0].content)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(self.delays[persona])
+        self.running -= 1
+        return AIMessage(content=f"I am {persona}")
+
+@pytest.mark.asyncio
+async def test_broadcast_yields_replies_as_they_complete(service):
+    """Test that every persona answers concurrently, fastest first."""
+    service.llm = PersonaLLM({"A slow robot": 0.05, "A quick pirate": 0.0, "A calm monk": 0.02})
+    personas = ["A slow robot", "A quick pirate", "A calm monk"]
+    history = [{"type": "human", "content": "Hello"}, {"type": "ai", "content": "Hi"}]
+
+    with patch.object(service.history, 'build', wraps=service.history.build) as build:
+        results = [r async for r in service.broadcast("Who are you?", personas, ChatMode.REGULAR, history)]
+
+    assert build.call_count == 1
+    assert service.llm.peak == 3
+    assert [r["index"] for r in results] == [1, 2, 0]
+    assert results[0] == {"index": 1, "response": "I am A quick pirate", "filtered": False}
@@ -1,16 +1,26 @@
 import pytest
 import asyncio
 import os
+import sqlite3
 import tempfile
 from unittest.mock import patch
 
 from app.database import (
     init_database, 
+    open_pool,
+    close_pool,
+    read_connection,
+    add_persona_listener,
+    remove_persona_listener,
+    get_persona,
     get_random_persona, 
     add_custom_persona, 
     get_all_personas,
     delete_persona,
-    DEFAULT_PERSONAS
+    sync_persona_changes,
+    sampler,
+    DEFAULT_PERSONAS,
+    SCHEMA_VERSION
 )
 
 @pytest.fixture
@@ -28,6 +38,13 @@ async def temp_db():
     if os.path.exists(temp_db_path):
         os.unlink(temp_db_path)
 
+@pytest.fixture
+async def pooled_db(temp_db):
+    """Open the connection pool on the temporary database."""
+    await open_pool(readers=2)
+    yield temp_db
+    await close_pool()
+
 @pytest.mark.asyncio
 async def test_init_database(temp_db):
     """Test database initialization."""
@@ -35,6 +52,18 @@ async def test_init_database(temp_db):
     assert len(personas) == len(DEFAULT_PERSONAS)
     assert all(not persona['is_custom'] for persona in personas)
 
+@pytest.mark.asyncio
+async def test_init_database_is_idempotent(temp_db):
+    """Test that initializing an up-to-date database changes nothing."""
+    await add_custom_persona("A persona that survives a restart")
+    await init_database()
+    
+    personas = await get_all_personas()
+    assert len(personas) == len(DEFAULT_PERSONAS) + 1
+    async with read_connection() as db:
+        async with db.execute("PRAGMA user_version") as cursor:
+            assert (await cursor.fetchone())[0] == SCHEMA_VERSION
+
 @pytest.mark.asyncio
 async def test_get_random_persona(temp_db):
     """Test getting a random persona."""
@@ -93,3 +122,110 @@ async def test_get_all_personas(temp_db):
     
     assert len(custom_personas) == 1
     assert len(default_personas) == len(DEFAULT_PERSONAS)
+
+@pytest.mark.asyncio
+async def test_pool_uses_wal_mode(pooled_db):
+    """Test that pooled connections run in WAL mode."""
+    async with read_connection() as db:
+        async with db.execute("PRAGMA journal_mode") as cursor:
+            row = await cursor.fetchone()
+    assert row[0].lower() == "wal"
+
+@pytest.mark.asyncio
+async def test_pooled_crud(pooled_db):
+    """Test persona reads and writes through the pool."""
+    persona = await add_custom_persona("A pooled test persona")
+    personas = await get_all_personas()
+    assert len(personas) == len(DEFAULT_PERSONAS) + 1
+    assert await get_random_persona() is not None
+    assert await delete_persona(persona['id']) is True
+    assert await delete_persona(persona['id']) is False
+
+@pytest.mark.asyncio
+async def test_pool_concurrent_requests(pooled_db):
+    """Test that more concurrent callers than readers are all served."""
+    results = await asyncio.gather(*(get_random_persona() for _ in range(20)))
+    assert all(result is not None for result in results)
+
+@pytest.mark.asyncio
+async def test_pool_writer_recovers_after_error(pooled_db):
+    """Test that a failed write does not poison the shared writer."""
+    await add_custom_persona("A duplicate persona description")
+    with pytest.raises(Exception):
+        await add_custom_persona("A duplicate persona description")
+    persona = await add_custom_persona("Another pooled persona")
+    assert persona['id'] is not None
+
+@pytest.mark.asyncio
+async def test_get_random_persona_filtered(temp_db):
+    """Test drawing only custom or only default personas."""
+    assert await get_random_persona(is_custom=True) is None
+    
+    custom = await add_custom_persona("The only custom persona")
+    for _ in range(10):
+        assert (await get_random_persona(is_custom=True))['id'] == custom['id']
+        assert (await get_random_persona(is_custom=False))['is_custom'] is False
+    
+    await delete_persona(custom['id'])
+    assert await get_random_persona(is_custom=True) is None
+
+@pytest.mark.asyncio
+async def test_get_random_persona_after_external_delete(temp_db):
+    """Test that rows deleted outside this process are never returned."""
+    import aiosqlite
+    
+    async with aiosqlite.connect(temp_db) as db:
+        await db.execute("DELETE FROM personas WHERE id != 1")
+        await db.commit()
+    
+    for _ in range(5):
+        assert (await get_random_persona())['id'] == 1
+
+@pytest.mark.asyncio
+async def test_get_persona(temp_db):
+    """Test fetching a single persona by id."""
+    persona = await add_custom_persona("A persona fetched by id")
+    assert await get_persona(persona['id']) == persona
+    assert await get_persona(999999) is None
+
+@pytest.mark.asyncio
+async def test_persona_listeners(temp_db):
+    """Test that listeners are told about added and deleted personas."""
+    events = []
+    listener = lambda event, persona: events.append((event, persona['description']))
+    add_persona_listener(listener)
+    try:
+        persona = await add_custom_persona("A persona with listeners")
+        await delete_persona(persona['id'])
+        await delete_persona(persona['id'])
+    finally:
+        remove_persona_listener(listener)
+    
+    assert events == [
+        ("added", "A persona with listeners"),
+        ("deleted", "A persona with listeners")
+    ]
+
+@pytest.mark.asyncio
+async def test_sync_persona_changes(temp_db):
+    """Test that writes by another process are picked up, and our own are not."""
+    await add_custom_persona("A persona added by this process")
+    assert await sync_persona_changes() is False
+    
+    events = []
+    listener = lambda event, persona: events.append(event)
+    add_persona_listener(listener)
+    try:
+        # Another worker writing the same file
+        with sqlite3.connect(temp_db) as db:
+            db.execute("INSERT INTO personas (description, is_custom) VALUES ('A persona from elsewhere', TRUE)")
+            db.execute("UPDATE persona_generation SET value = value + 1")
+        
+        assert await sync_persona_changes() is True
+        assert await sync_persona_changes() is False
+    finally:
+        remove_persona_listener(listener)
+    
+    assert events == ["reloaded"]
+    assert await get_random_persona(is_custom=True, custom_weight=1) is not None
+    assert len(sampler) == len(DEFAULT_PERSONAS) + 2
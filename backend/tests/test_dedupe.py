@@ -0,0 +1,96 @@
+import pytest
+import os
+import tempfile
+from unittest.mock import patch
+
+from app.database import (
+    init_database,
+    add_persona_listener,
+    remove_persona_listener,
+    add_custom_persona,
+    bulk_add_custom_personas,
+    delete_persona
+)
+from app.dedupe import NearDuplicateIndex, jaccard, shingles
+from app.validation import INAPPROPRIATE_TERMS, MIN_PERSONA_LENGTH, persona_rejection, validate_persona
+
+PIRATE = "A grumpy old pirate captain who speaks in riddles and loves rum"
+
+@pytest.fixture
+async def index():
+    """A near-duplicate index over a temporary database, kept in step with it."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.db') as tmp:
+        temp_db_path = tmp.name
+    
+    with patch('app.database.DATABASE_PATH', temp_db_path):
+        await init_database()
+        index = NearDuplicateIndex(threshold=0.7)
+        add_persona_listener(index.on_persona_changed)
+        yield index
+        remove_persona_listener(index.on_persona_changed)
+    
+    if os.path.exists(temp_db_path):
+        os.unlink(temp_db_path)
+
+def test_signature_estimates_similarity():
+    """Test that signatures agree with exact shingle similarity."""
+    index = NearDuplicateIndex()
+    a = shingles(PIRATE)
+    b = shingles(PIRATE.replace("grumpy", "cranky"))
+    c = shingles("A cheerful botanist explaining photosynthesis to children")
+    
+    assert index.signature(a) == index.signature(shingles(PIRATE.upper() + "!"))
+    same = sum(x == y for x, y in zip(index.signature(a), index.signature(b))) / index.bins
+    assert abs(same - jaccard(a, b)) < 0.25
+    assert jaccard(a, c) < 0.2
+
+@pytest.mark.asyncio
+async def test_find_near_copy(index):
+    """Test that a reworded copy is found and an unrelated persona is not."""
+    stored = await add_custom_persona(PIRATE)
+    
+    matches = await index.find("A grumpy old pirate captain who talks in riddles and loves rum!")
+    assert [m["id"] for m in matches] == [stored["id"]]
+    assert 0.7 <= matches[0]["similarity"] < 1
+    
+    assert await index.find("A cheerful botanist explaining photosynthesis to children") == []
+    assert index.stats()["loaded"] is True
+
+@pytest.mark.asyncio
+async def test_index_follows_table(index):
+    """Test that adds, deletes and bulk imports are reflected in lookups."""
+    await index.ensure_loaded()
+    stored = await add_custom_persona(PIRATE)
+    assert await index.find(PIRATE)
+    
+    await delete_persona(stored["id"])
+    assert await index.find(PIRATE) == []
+    
+    await bulk_add_custom_personas([PIRATE])
+    assert index.loaded is False
+    assert (await index.find(PIRATE))[0]["similarity"] == 1.0
+
+@pytest.mark.asyncio
+async def test_disabled_index(index):
+    """Test that a threshold of 0 turns detection off without loading."""
+    index.threshold = 0
+    await add_custom_persona(PIRATE)
+    assert await index.find(PIRATE) == []
+    assert index.loaded is False
+
+def test_validation_matches_substring_check():
+    """Test that the compiled matcher agrees with a plain substring scan."""
+    samples = [
+        "A friendly baker",
+        "A skilled carpenter who builds boats",
+        "Somebody who is RACIST and loud",
+        "A weapon collector",
+        "Tiny",
+        "An explicit storyteller"
+    ]
+    for sample in samples:
+        expected = len(sample.strip()) >= MIN_PERSONA_LENGTH and not any(
+            term in sample.lower() for term in INAPPROPRIATE_TERMS
+        )
+        assert validate_persona(sample) is expected
+        assert (persona_rejection(sample) == "") is expected
@@ -0,0 +1,62 @@
+from app.history import HistoryWindow, estimate_tokens, message_tokens
+
+def make_history(contents):
+    """Alternate human and ai turns with the given contents."""
+    return [
+        {"type": "human" if i % 2 == 0 else "ai", "content": content}
+        for i, content in enumerate(contents)
+    ]
+
+def test_estimate_tokens():
+    """Test the estimator on short English text."""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("Hello there, how are you doing today?") == 9
+    assert estimate_tokens("word " * 100) > estimate_tokens("word " * 10)
+
+def test_keeps_newest_messages_within_budget():
+    """Test that the window fills the budget from the newest message back."""
+    history = make_history([f"Message number {i} in the chat." for i in range(30)])
+    per_message = message_tokens(history[0]["content"])
+    window = HistoryWindow(token_budget=per_message * 5)
+
+    messages = window.build(history)
+    assert [m.content for m in messages] == [e["content"] for e in history[-5:]]
+
+def test_long_turns_take_more_budget():
+    """Test that one long turn displaces several short ones."""
+    history = make_history(["Short one."] * 6 + ["A very long answer. " * 100, "Short again."])
+    window = HistoryWindow(
+        token_budget=message_tokens(history[-2]["content"]) + message_tokens(history[-1]["content"])
+    )
+
+    messages = window.build(history)
+    assert [m.content for m in messages] == [history[-2]["content"], history[-1]["content"]]
+
+def test_max_messages_cap():
+    """Test that max_messages still caps a generous budget."""
+    history = make_history(["Hi."] * 20)
+    assert len(HistoryWindow(token_budget=10_000, max_messages=10).build(history)) == 10
+
+def test_ignores_unknown_entries():
+    """Test that entries without a human/ai type are skipped."""
+    history = [{"type": "system", "content": "ignored"}, {"type": "human", "content": "Hello"}]
+    messages = HistoryWindow().build(history)
+    assert [m.type for m in messages] == ["human"]
+
+def test_summary_replaces_dropped_turns():
+    """Test that dropped turns are summarized in a leading system message."""
+    history = make_history([f"Turn {i} talks about topic {i}. More detail follows here." for i in range(40)])
+    window = HistoryWindow(token_budget=200, summarize=True, summary_budget=80)
+
+    messages = window.build(history)
+    assert messages[0].type == "system"
+    assert messages[0].content.startswith("Summary of the earlier conversation:")
+    assert "More detail" not in messages[0].content
+    assert sum(message_tokens(m.content) for m in messages) <= 200
+    assert messages[-1].content == history[-1]["content"]
+
+def test_no_summary_when_everything_fits():
+    """Test that no summary is added when nothing was dropped."""
+    history = make_history(["Hello.", "Ahoy!"])
+    messages = HistoryWindow(token_budget=1000, summarize=True).build(history)
+    assert [m.type for m in messages] == ["human", "ai"]
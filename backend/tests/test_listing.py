@@ -0,0 +1,85 @@
+import pytest
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+from app.database import (
+    init_database,
+    add_persona_listener,
+    remove_persona_listener,
+    add_custom_persona,
+    delete_persona,
+    get_all_personas
+)
+from app.listing import InvalidCursor, PersonaListing
+
+@pytest.fixture
+async def listing():
+    """A persona listing over a temporary database, kept in step with it."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.db') as tmp:
+        temp_db_path = tmp.name
+    
+    with patch('app.database.DATABASE_PATH', temp_db_path):
+        await init_database()
+        listing = PersonaListing()
+        add_persona_listener(listing.on_persona_changed)
+        yield listing
+        remove_persona_listener(listing.on_persona_changed)
+    
+    if os.path.exists(temp_db_path):
+        os.unlink(temp_db_path)
+
+@pytest.mark.asyncio
+async def test_full_listing_matches_database(listing):
+    """Test that the unpaginated listing is the same as get_all_personas."""
+    page = await listing.page()
+    assert json.loads(page.body) == await get_all_personas()
+    assert page.next_cursor is None
+
+@pytest.mark.asyncio
+async def test_keyset_pages_cover_every_row(listing):
+    """Test that following cursors visits every persona exactly once, in order."""
+    for i in range(5):
+        await add_custom_persona(f"Custom persona number {i} with a story")
+    
+    seen = []
+    cursor = None
+    while True:
+        page = await listing.page(cursor=cursor, limit=7)
+        seen += json.loads(page.body)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert seen == await get_all_personas()
+
+@pytest.mark.asyncio
+async def test_filter_and_search(listing):
+    """Test the is_custom filter and case-insensitive search."""
+    await add_custom_persona("A Space Pirate who collects comets")
+    custom = json.loads((await listing.page(is_custom=True)).body)
+    assert [p["description"] for p in custom] == ["A Space Pirate who collects comets"]
+    
+    built_in = json.loads((await listing.page(is_custom=False)).body)
+    assert built_in and not any(p["is_custom"] for p in built_in)
+    
+    found = json.loads((await listing.page(search="space pirate")).body)
+    assert [p["is_custom"] for p in found] == [True]
+
+@pytest.mark.asyncio
+async def test_changes_invalidate_snapshot(listing):
+    """Test that adds and deletes are visible on the next request."""
+    before = await listing.page()
+    persona = await add_custom_persona("A lighthouse keeper who talks to whales")
+    after_add = await listing.page()
+    assert after_add.etag != before.etag
+    assert persona in json.loads(after_add.body)
+    
+    await delete_persona(persona["id"])
+    assert (await listing.page()).etag == before.etag
+
+@pytest.mark.asyncio
+async def test_invalid_cursor(listing):
+    """Test that a malformed cursor is rejected."""
+    with pytest.raises(InvalidCursor):
+        await listing.page(cursor="not-a-cursor")
@@ -0,0 +1,61 @@
+import pytest
+from unittest.mock import patch
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from app.chat_service import ChatService
+from app.llm import RecordReplayLLM, StubLLM, create_llm
+from app.models import ChatMode
+
+MESSAGES = [SystemMessage(content="You are a pirate."), HumanMessage(content="Hi")]
+
+def test_create_llm_from_env():
+    """Test that LLM_BACKEND selects a registered backend."""
+    with patch.dict('os.environ', {'LLM_BACKEND': 'stub', 'STUB_LATENCY': '0', 'STUB_REPLY': 'Beep'}):
+        llm = create_llm()
+    assert isinstance(llm, StubLLM)
+    assert (llm.latency, llm.reply) == (0.0, "Beep")
+
+def test_unknown_backend():
+    """Test that an unknown backend name is rejected."""
+    with pytest.raises(ValueError, match="Unknown LLM backend"):
+        create_llm("nope")
+
+def test_groq_requires_api_key():
+    """Test that the Groq backend still requires GROQ_API_KEY."""
+    with patch.dict('os.environ', {}, clear=True):
+        with pytest.raises(ValueError, match="GROQ_API_KEY"):
+            ChatService()
+
+@pytest.mark.asyncio
+async def test_stub_streams_reply():
+    """Test that the stub streams its reply word by word and counts calls."""
+    llm = StubLLM(latency=0, reply="Ahoy there matey", tokens_per_second=10000)
+    chunks = [chunk.content async for chunk in llm.astream(MESSAGES)]
+    assert chunks == ["Ahoy", " there", " matey"]
+    assert llm.calls == 1
+    assert llm.prompt_tokens > 0
+
+@pytest.mark.asyncio
+async def test_record_then_replay(tmp_path):
+    """Test that recorded replies are replayed offline, by prompt."""
+    path = str(tmp_path / "recording.jsonl")
+    recorder = RecordReplayLLM(path, record=True, inner=StubLLM(latency=0, reply="Yo ho ho"))
+    assert (await recorder.ainvoke(MESSAGES)).content == "Yo ho ho"
+
+    replay = RecordReplayLLM(path)
+    assert (await replay.ainvoke(MESSAGES)).content == "Yo ho ho"
+    assert "".join([c.content async for c in replay.astream(MESSAGES)]) == "Yo ho ho"
+
+    other = [SystemMessage(content="You are a robot."), HumanMessage(content="Hi")]
+    with pytest.raises(LookupError):
+        await replay.ainvoke(other)
+    assert replay.misses == 1
+
+@pytest.mark.asyncio
+async def test_chat_service_with_stub_backend():
+    """Test that the service runs end to end on the stub without GROQ_API_KEY."""
+    with patch.dict('os.environ', {'LLM_BACKEND': 'stub', 'STUB_LATENCY': '0'}, clear=True):
+        service = ChatService()
+    response, filtered = await service.generate_response("Hi", "A pirate captain", ChatMode.REGULAR)
+    assert response == service.llm.reply
+    assert filtered is False
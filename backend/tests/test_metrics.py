@@ -0,0 +1,48 @@
+import pytest
+
+from app.metrics import Counter, Histogram, Registry, record, span, start_request, timed
+
+def test_histogram_renders_cumulative_buckets():
+    """Test the Prometheus text layout of a labelled histogram."""
+    histogram = Histogram("test_seconds", "Test latency.", buckets=(0.1, 1), labelnames=("stage",))
+    histogram.observe(0.05, "a")
+    histogram.observe(0.5, "a")
+    histogram.observe(5, "a")
+    lines = histogram.render()
+    assert lines[:2] == ["# HELP test_seconds Test latency.", "# TYPE test_seconds histogram"]
+    assert 'test_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="a",le="1"} 2' in lines
+    assert 'test_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert 'test_seconds_sum{stage="a"} 5.55' in lines
+    assert 'test_seconds_count{stage="a"} 3' in lines
+
+def test_registry_renders_metrics_and_collectors():
+    """Test that collectors are read at render time and None values skipped."""
+    registry = Registry()
+    counter = registry.register(Counter("test_total", "Things.", labelnames=("kind",)))
+    counter.inc("x", amount=2)
+    registry.add_collector(lambda: [("test_depth", "gauge", "Depth.", 3), ("test_missing", "gauge", "Gone.", None)])
+    text = registry.render()
+    assert 'test_total{kind="x"} 2' in text
+    assert "# TYPE test_depth gauge\ntest_depth 3\n" in text
+    assert "test_missing" not in text
+
+@pytest.mark.asyncio
+async def test_spans_add_up_in_request_timings():
+    """Test that spans and timed calls land in the request's Server-Timing."""
+    @timed("db.lookup")
+    async def lookup():
+        return 42
+
+    timings = start_request()
+    with span("prompt"):
+        pass
+    assert await lookup() == 42
+    record("upstream", 0.25)
+    record("upstream", 0.25)
+
+    header = timings.server_timing()
+    assert header.startswith("prompt;dur=")
+    assert "db.lookup;dur=" in header
+    assert "upstream;dur=500.00" in header
+    assert header.split(", ")[-1].startswith("total;dur=")
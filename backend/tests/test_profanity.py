@@ -0,0 +1,54 @@
+import pytest
+
+from app.profanity import (
+    PROFANITY_WORDS,
+    ProfanityFilter,
+    StreamingProfanityFilter,
+    batch_filter,
+    profanity_filter
+)
+
+def test_masks_whole_words():
+    """Test that matches keep their first and last letter."""
+    text, filtered = profanity_filter.filter("What the hell, Damn it!")
+    assert text == "What the h**l, D**n it!"
+    assert filtered is True
+
+def test_word_boundary_leaves_innocent_words():
+    """Test that words merely containing a filtered word are untouched."""
+    text = "The class said hello to the shell collector in Scunthorpe."
+    assert profanity_filter.filter(text) == (text, False)
+
+def test_word_boundary_masks_inflections():
+    """Test that common inflections of filtered words are masked."""
+    text, filtered = profanity_filter.filter("Those bitches were damned")
+    assert text == "Those b*****s were d****d"
+    assert filtered is True
+
+def test_substring_mode():
+    """Test that substring mode matches inside longer words."""
+    engine = ProfanityFilter(PROFANITY_WORDS, word_boundary=False)
+    text, filtered = engine.filter("hello class")
+    assert text == "h**lo cla*s"
+    assert filtered is True
+
+def test_batch_filter():
+    """Test filtering several texts at once."""
+    assert batch_filter(["all clean", "also clean"]) == [("all clean", False), ("also clean", False)]
+    assert batch_filter(["clean", "oh crap"]) == [("clean", False), ("oh c**p", True)]
+    assert batch_filter([]) == []
+
+@pytest.mark.parametrize("text", [
+    "Well damn, what the hell is this shit? Oh dammit, hello class.",
+    "ass assess asses bass",
+    "crap",
+])
+def test_streaming_filter_matches_full_filter(text):
+    """Test that any chunking of a text gives the same output as the full filter."""
+    expected, was_filtered = profanity_filter.filter(text)
+    for size in range(1, 10):
+        stream_filter = StreamingProfanityFilter()
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        output = "".join(stream_filter.feed(chunk) for chunk in chunks) + stream_filter.flush()
+        assert output == expected
+        assert stream_filter.filtered is was_filtered
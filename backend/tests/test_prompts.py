@@ -0,0 +1,43 @@
+from app.models import ChatMode
+from app.prompts import PromptCache, render_system_prompt
+
+def test_render_system_prompt():
+    """Test that the persona and mode are filled in."""
+    prompt = render_system_prompt("A grumpy wizard", ChatMode.REGULAR)
+    assert prompt.startswith("You are A grumpy wizard.")
+    assert "Mode: regular (family-friendly)" in prompt
+    assert "Mode: uncensored (creative)" in render_system_prompt("A grumpy wizard", ChatMode.UNCENSORED)
+
+def test_cache_returns_same_message():
+    """Test that repeated lookups reuse the rendered message."""
+    cache = PromptCache(max_entries=8)
+    first = cache.get("A grumpy wizard", ChatMode.REGULAR)
+    second = cache.get("A grumpy wizard", ChatMode.REGULAR)
+    assert first is second
+    assert first.content == render_system_prompt("A grumpy wizard", ChatMode.REGULAR)
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_modes_are_cached_separately():
+    """Test that each mode has its own entry."""
+    cache = PromptCache(max_entries=8)
+    regular = cache.get("A grumpy wizard", ChatMode.REGULAR)
+    uncensored = cache.get("A grumpy wizard", ChatMode.UNCENSORED)
+    assert regular.content != uncensored.content
+    assert cache.stats()["size"] == 2
+
+def test_invalidate_drops_all_modes():
+    """Test that invalidating a persona removes it in every mode."""
+    cache = PromptCache(max_entries=8)
+    cache.get("A grumpy wizard", ChatMode.REGULAR)
+    cache.get("A grumpy wizard", ChatMode.UNCENSORED)
+    cache.get("A pirate captain", ChatMode.REGULAR)
+    cache.invalidate("A grumpy wizard")
+    assert cache.stats()["size"] == 1
+
+def test_lru_bound():
+    """Test that the cache never exceeds max_entries."""
+    cache = PromptCache(max_entries=2)
+    for persona in ("A", "B", "C"):
+        cache.get(persona, ChatMode.REGULAR)
+    assert cache.stats()["size"] == 2
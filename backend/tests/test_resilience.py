@@ -0,0 +1,152 @@
+import pytest
+import asyncio
+
+from app.resilience import CircuitBreaker, UpstreamError, UpstreamPolicy, is_retryable
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class StatusError(Exception):
+    """Provider error carrying an HTTP status, like the Groq client's."""
+
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+def flaky(failures, error=lambda: ConnectionError("reset"), result="ok"):
+    """A call failing the first `failures` times, counting attempts."""
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) <= failures:
+            raise error()
+        return result
+    return call, attempts
+
+def test_retryable_errors():
+    """Test which errors are worth another attempt."""
+    assert is_retryable(asyncio.TimeoutError())
+    assert is_retryable(ConnectionError())
+    assert is_retryable(StatusError(429))
+    assert is_retryable(StatusError(503))
+    assert not is_retryable(StatusError(400))
+    assert not is_retryable(ValueError("bad request"))
+
+@pytest.mark.asyncio
+async def test_retries_then_succeeds():
+    """Test that retryable failures are retried after a backoff."""
+    policy = UpstreamPolicy(retries=2, backoff=0.001)
+    call, attempts = flaky(2)
+    assert await policy.call(call) == "ok"
+    assert len(attempts) == 3
+    assert policy.stats()["retries"] == 2
+
+@pytest.mark.asyncio
+async def test_gives_up_with_status():
+    """Test that exhausted and non-retryable failures map to HTTP statuses."""
+    policy = UpstreamPolicy(retries=1, backoff=0.001)
+    call, attempts = flaky(5, error=lambda: StatusError(500))
+    with pytest.raises(UpstreamError) as exc_info:
+        await policy.call(call)
+    assert exc_info.value.status == 502
+    assert len(attempts) == 2
+    
+    call, attempts = flaky(5, error=lambda: StatusError(400))
+    with pytest.raises(UpstreamError):
+        await policy.call(call)
+    assert len(attempts) == 1
+    
+    call, _ = flaky(5, error=lambda: StatusError(429))
+    with pytest.raises(UpstreamError) as exc_info:
+        await policy.call(call)
+    assert exc_info.value.status == 503
+    assert exc_info.value.retry_after_header == "1"
+
+@pytest.mark.asyncio
+async def test_attempt_timeout():
+    """Test that a hung attempt is abandoned after the timeout."""
+    policy = UpstreamPolicy(timeout=0.01, retries=0)
+    
+    async def hang():
+        await asyncio.sleep(10)
+    
+    with pytest.raises(UpstreamError) as exc_info:
+        await policy.call(hang)
+    assert exc_info.value.status == 504
+    assert policy.stats()["timeouts"] == 1
+
+@pytest.mark.asyncio
+async def test_hedged_request_wins():
+    """Test that a slow attempt is hedged and the faster reply is used."""
+    policy = UpstreamPolicy(hedge=True, hedge_after=0.01, hedge_budget=1)
+    delays = [1.0, 0.0]
+    
+    async def call():
+        delay = delays.pop(0)
+        await asyncio.sleep(delay)
+        return delay
+    
+    assert await policy.call(call) == 0.0
+    assert policy.stats()["hedges"] == 1
+    assert policy.stats()["hedge_wins"] == 1
+
+def test_circuit_breaker_opens_and_recovers():
+    """Test closed -> open -> half-open -> closed transitions."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.retry_after() == 10
+    
+    clock.now += 10
+    assert breaker.allow()
+    # Only one probe at a time while half-open
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast():
+    """Test that calls are rejected without going upstream while open."""
+    policy = UpstreamPolicy(retries=0, breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60))
+    call, attempts = flaky(5)
+    with pytest.raises(UpstreamError):
+        await policy.call(call)
+    
+    with pytest.raises(UpstreamError) as exc_info:
+        await policy.call(call)
+    assert exc_info.value.status == 503
+    assert len(attempts) == 1
+    assert policy.stats()["short_circuits"] == 1
+    assert policy.stats()["circuit_open"] == 1
+
+@pytest.mark.asyncio
+async def test_stream_retries_before_first_chunk():
+    """Test that a stream failing to start is retried, then passed through."""
+    policy = UpstreamPolicy(retries=1, backoff=0.001)
+    opened = []
+    
+    async def stream():
+        opened.append(1)
+        if len(opened) == 1:
+            raise ConnectionError("reset")
+        for chunk in ("a", "b"):
+            yield chunk
+    
+    assert [chunk async for chunk in policy.stream(stream)] == ["a", "b"]
+    assert len(opened) == 2
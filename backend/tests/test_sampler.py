@@ -0,0 +1,51 @@
+import pytest
+from collections import Counter
+
+from app.sampler import PersonaSampler
+
+@pytest.fixture
+def sampler():
+    """Create a sampler with 3 default and 2 custom personas."""
+    sampler = PersonaSampler()
+    sampler.load([(1, False), (2, False), (3, False), (4, True), (5, True)])
+    return sampler
+
+def test_load_and_count(sampler):
+    """Test counting loaded personas."""
+    assert sampler.loaded is True
+    assert len(sampler) == 5
+    assert sampler.count(False) == 3
+    assert sampler.count(True) == 2
+
+def test_empty_sampler():
+    """Test that an empty sampler draws nothing."""
+    sampler = PersonaSampler()
+    sampler.load([])
+    assert sampler.sample() is None
+    assert sampler.sample(is_custom=True) is None
+
+def test_filtered_sampling(sampler):
+    """Test drawing only defaults or only customs."""
+    assert {sampler.sample(is_custom=False) for _ in range(200)} == {1, 2, 3}
+    assert {sampler.sample(is_custom=True) for _ in range(200)} == {4, 5}
+
+def test_add_and_remove(sampler):
+    """Test that adds and removes are reflected in draws."""
+    sampler.add(6, is_custom=True)
+    sampler.remove(4)
+    assert sampler.count(True) == 2
+    assert {sampler.sample(is_custom=True) for _ in range(200)} == {5, 6}
+
+    sampler.remove(5)
+    sampler.remove(6)
+    assert sampler.count(True) == 0
+    assert sampler.sample(is_custom=True) is None
+    assert sampler.sample() in {1, 2, 3}
+
+def test_weighted_sampling(sampler):
+    """Test that custom_weight controls the custom/default split."""
+    draws = Counter(sampler.sample(custom_weight=1.0) for _ in range(200))
+    assert set(draws) <= {4, 5}
+
+    draws = Counter(sampler.sample(custom_weight=0.0) for _ in range(200))
+    assert set(draws) <= {1, 2, 3}
@@ -0,0 +1,91 @@
+import pytest
+from unittest.mock import patch
+
+from app.chat_service import ChatService
+from app.models import ChatMode
+from app.semantic_cache import SemanticCache, embed
+
+PIRATE = "A pirate captain"
+
+def similarity(a: str, b: str) -> float:
+    x, y = embed(a), embed(b)
+    return sum(value * y.get(index, 0.0) for index, value in x.items())
+
+def test_embed_similarity():
+    """Test that rewordings score high and different messages low."""
+    assert similarity("Hi there!", "hi there") == pytest.approx(1.0)
+    assert similarity("How are you?", "how are you doing?") > 0.85
+    assert similarity("I love you", "I hate you") < 0.8
+    assert embed("?!") == {}
+
+def test_near_identical_messages_hit():
+    """Test lookups per persona and mode against the threshold."""
+    cache = SemanticCache(threshold=0.85)
+    cache.set(PIRATE, ChatMode.REGULAR, "How are you?", ("Shipshape!", False))
+    
+    assert cache.get(PIRATE, ChatMode.REGULAR, "how are you doing?") == ("Shipshape!", False)
+    assert cache.get(PIRATE, ChatMode.REGULAR, "Who are you?") is None
+    assert cache.get(PIRATE, ChatMode.UNCENSORED, "How are you?") is None
+    assert cache.get("A chef", ChatMode.REGULAR, "How are you?") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 3
+
+def test_numbers_must_match():
+    """Test that messages differing only in numbers never share a reply."""
+    cache = SemanticCache(threshold=0.5)
+    cache.set(PIRATE, ChatMode.REGULAR, "what is 2+2", ("Four, matey", False))
+    assert cache.get(PIRATE, ChatMode.REGULAR, "what is 2+3") is None
+    assert cache.get(PIRATE, ChatMode.REGULAR, "What is 2 + 2?") == ("Four, matey", False)
+
+def test_memory_is_bounded():
+    """Test eviction of least recently used entries and (persona, mode) pairs."""
+    cache = SemanticCache(threshold=0.95, max_entries=2, max_keys=2)
+    cache.set(PIRATE, ChatMode.REGULAR, "hello", ("a", False))
+    cache.set(PIRATE, ChatMode.REGULAR, "good morning", ("b", False))
+    assert cache.get(PIRATE, ChatMode.REGULAR, "hello") == ("a", False)
+    cache.set(PIRATE, ChatMode.REGULAR, "farewell", ("c", False))
+    # "good morning" was the least recently used
+    assert cache.get(PIRATE, ChatMode.REGULAR, "good morning") is None
+    assert cache.get(PIRATE, ChatMode.REGULAR, "hello") == ("a", False)
+    
+    cache.set("A chef", ChatMode.REGULAR, "hello", ("d", False))
+    cache.set("A poet", ChatMode.REGULAR, "hello", ("e", False))
+    assert cache.get(PIRATE, ChatMode.REGULAR, "hello") is None
+    assert cache.stats()["keys"] == 2
+    assert cache.stats()["size"] == 2
+    assert cache.stats()["evictions"] == 3
+
+def test_entries_expire():
+    """Test that entries are not served after the TTL."""
+    now = [1000.0]
+    cache = SemanticCache(threshold=0.9, ttl=60, clock=lambda: now[0])
+    cache.set(PIRATE, ChatMode.REGULAR, "hello", ("Ahoy!", False))
+    now[0] += 61
+    assert cache.get(PIRATE, ChatMode.REGULAR, "hello!") is None
+    assert cache.stats()["size"] == 0
+
+@pytest.mark.asyncio
+async def test_chat_service_answers_reworded_openers():
+    """Test that a reworded first message skips the upstream call, a later turn does not."""
+    class CountingLLM:
+        calls = 0
+        
+        async def ainvoke(self, messages):
+            from langchain_core.messages import AIMessage
+            self.calls += 1
+            return AIMessage(content="Ahoy there!")
+    
+    with patch.dict('os.environ', {'GROQ_API_KEY': 'test-key'}):
+        service = ChatService(llm=CountingLLM(), semantic_cache=SemanticCache(threshold=0.85))
+    
+    assert await service.generate_response("Hello there!", PIRATE, ChatMode.REGULAR) == ("Ahoy there!", False)
+    assert await service.generate_response("hello there", PIRATE, ChatMode.REGULAR) == ("Ahoy there!", False)
+    assert service.llm.calls == 1
+    assert service.semantic_cache.stats()["hits"] == 1
+    
+    history = [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Ahoy!"}]
+    await service.generate_response("hello there", PIRATE, ChatMode.REGULAR, history)
+    assert service.llm.calls == 2
+    
+    service.invalidate_persona(PIRATE)
+    assert service.semantic_cache.stats()["size"] == 0
@@ -0,0 +1,35 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from app import serialization
+from app.models import ChatResponse
+from app.serialization import FastJSONResponse, dumps, model_response
+
+PAYLOAD = {"id": 7, "description": "Une bibliothécaire — calme", "is_custom": False, "score": 0.5, "tags": [None]}
+
+def test_dumps_matches_compact_stdlib():
+    """Test that dumps produces compact UTF-8 JSON with or without orjson."""
+    expected = json.dumps(PAYLOAD, separators=(",", ":"), ensure_ascii=False).encode()
+    assert dumps(PAYLOAD) == expected
+    with patch.object(serialization, "orjson", None):
+        assert dumps(PAYLOAD) == expected
+
+def test_stdlib_fallback_rejects_nan():
+    """Test that the fallback refuses NaN like Starlette's JSONResponse."""
+    with patch.object(serialization, "orjson", None):
+        with pytest.raises(ValueError):
+            dumps({"x": float("nan")})
+
+def test_responses():
+    """Test the default response class and model responses."""
+    response = FastJSONResponse({"status": "ok"})
+    assert response.body == b'{"status":"ok"}'
+    assert response.headers["content-type"] == "application/json"
+    
+    reply = ChatResponse(response="Hi", persona="A pirate", mode="normal")
+    response = model_response(reply, headers={"X-Test": "1"})
+    assert json.loads(response.body) == reply.model_dump()
+    assert response.headers["x-test"] == "1"
+    assert response.headers["content-length"] == str(len(response.body))
@@ -0,0 +1,91 @@
+import pytest
+import os
+import tempfile
+from unittest.mock import patch
+
+from app.database import init_database, read_connection
+from app.sessions import SessionStore
+
+@pytest.fixture
+async def temp_db():
+    """Create a temporary database for testing."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.db') as tmp:
+        temp_db_path = tmp.name
+    
+    with patch('app.database.DATABASE_PATH', temp_db_path):
+        await init_database()
+        yield temp_db_path
+    
+    if os.path.exists(temp_db_path):
+        os.unlink(temp_db_path)
+
+def turn(message, reply):
+    return [{"type": "human", "content": message}, {"type": "ai", "content": reply}]
+
+@pytest.mark.asyncio
+async def test_unknown_session(temp_db):
+    """Test that an unknown session has no history."""
+    store = SessionStore()
+    assert await store.get_history("missing") is None
+
+@pytest.mark.asyncio
+async def test_append_and_reload(temp_db):
+    """Test that appended turns are returned in order, also from the database."""
+    store = SessionStore()
+    session_id = store.new_id()
+    await store.append(session_id, turn("Hi", "Ahoy"))
+    await store.append(session_id, turn("Where to?", "The sea"))
+    expected = turn("Hi", "Ahoy") + turn("Where to?", "The sea")
+    assert await store.get_history(session_id) == expected
+
+    # A fresh store has nothing hot and must read the database
+    cold = SessionStore()
+    assert await cold.get_history(session_id) == expected
+
+@pytest.mark.asyncio
+async def test_hot_sessions_are_bounded(temp_db):
+    """Test that the in-memory LRU keeps at most hot_sessions sessions."""
+    store = SessionStore(hot_sessions=2)
+    ids = [store.new_id() for _ in range(3)]
+    for session_id in ids:
+        await store.append(session_id, turn("Hi", "Ahoy"))
+    assert list(store._hot) == ids[1:]
+    assert await store.get_history(ids[0]) == turn("Hi", "Ahoy")
+
+@pytest.mark.asyncio
+async def test_expire(temp_db):
+    """Test that idle sessions are deleted with their messages."""
+    store = SessionStore(ttl=-1)
+    session_id = store.new_id()
+    await store.append(session_id, turn("Hi", "Ahoy"))
+    assert await store.expire() == 1
+    assert await store.get_history(session_id) is None
+    async with read_connection() as db:
+        async with db.execute("SELECT COUNT(*) FROM session_messages") as cursor:
+            assert (await cursor.fetchone())[0] == 0
+
+@pytest.mark.asyncio
+async def test_compact_keeps_recent_messages(temp_db):
+    """Test that compaction keeps only the last keep_messages per session."""
+    store = SessionStore(keep_messages=4)
+    session_id = store.new_id()
+    for i in range(5):
+        await store.append(session_id, turn(f"q{i}", f"a{i}"))
+    assert await store.compact() == 6
+    assert await SessionStore(keep_messages=4).get_history(session_id) == turn("q3", "a3") + turn("q4", "a4")
+
+@pytest.mark.asyncio
+async def test_shared_store_sees_other_workers(temp_db):
+    """Test that a shared store does not serve history another worker extended."""
+    first = SessionStore(shared=True)
+    second = SessionStore(shared=True)
+    session_id = first.new_id()
+    await first.append(session_id, turn("Hi", "Ahoy"))
+    assert await second.get_history(session_id) == turn("Hi", "Ahoy")
+    
+    await second.append(session_id, turn("Where to?", "The sea"))
+    expected = turn("Hi", "Ahoy") + turn("Where to?", "The sea")
+    assert await first.get_history(session_id) == expected
+    
+    await first.append(session_id, turn("Why?", "Treasure"))
+    assert await second.get_history(session_id) == expected + turn("Why?", "Treasure")
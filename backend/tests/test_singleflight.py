@@ -0,0 +1,97 @@
+import pytest
+import asyncio
+
+from app.singleflight import SingleFlight
+
+class SlowCall:
+    """Upstream stand-in that blocks until released and counts calls."""
+
+    def __init__(self, result="reply"):
+        self.result = result
+        self.calls = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_call():
+    """Test that identical concurrent calls run upstream once."""
+    flight = SingleFlight()
+    upstream = SlowCall()
+    waiters = [asyncio.ensure_future(flight.do("key", upstream)) for _ in range(5)]
+    await asyncio.sleep(0)
+    upstream.release.set()
+
+    assert await asyncio.gather(*waiters) == ["reply"] * 5
+    assert upstream.calls == 1
+    assert flight.stats() == {"in_flight": 0, "started": 1, "shared": 4}
+
+@pytest.mark.asyncio
+async def test_different_keys_do_not_share():
+    """Test that different keys start separate calls."""
+    flight = SingleFlight()
+    upstream = SlowCall()
+    waiters = [asyncio.ensure_future(flight.do(key, upstream)) for key in ("a", "b")]
+    await asyncio.sleep(0)
+    upstream.release.set()
+
+    await asyncio.gather(*waiters)
+    assert upstream.calls == 2
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter():
+    """Test that an upstream failure is raised to all callers."""
+    flight = SingleFlight()
+    upstream = SlowCall(result=RuntimeError("upstream down"))
+    waiters = [asyncio.ensure_future(flight.do("key", upstream)) for _ in range(3)]
+    await asyncio.sleep(0)
+    upstream.release.set()
+
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_others():
+    """Test that one caller disconnecting leaves the shared call running."""
+    flight = SingleFlight()
+    upstream = SlowCall()
+    leader = asyncio.ensure_future(flight.do("key", upstream))
+    follower = asyncio.ensure_future(flight.do("key", upstream))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    upstream.release.set()
+
+    assert await follower == "reply"
+    assert leader.cancelled()
+    assert upstream.cancelled is False
+
+@pytest.mark.asyncio
+async def test_last_waiter_cancelling_stops_the_call():
+    """Test that the upstream call is cancelled once nobody waits for it."""
+    flight = SingleFlight()
+    upstream = SlowCall()
+    waiter = asyncio.ensure_future(flight.do("key", upstream))
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert upstream.cancelled is True
+    assert flight.stats()["in_flight"] == 0
+
+    # A later caller starts a fresh call
+    upstream.release.set()
+    assert await flight.do("key", upstream) == "reply"
+    assert upstream.calls == 2
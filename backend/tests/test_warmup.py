@@ -0,0 +1,159 @@
+import pytest
+import asyncio
+import os
+import tempfile
+from unittest.mock import patch
+from langchain_core.messages import AIMessage
+
+from app.chat_service import ChatService
+from app.database import init_database, DEFAULT_PERSONAS
+from app.models import ChatMode
+from app.resilience import UpstreamError
+from app.warmup import OpeningPool, is_greeting
+
+PIRATE = "A pirate captain"
+
+class FakeGenerator:
+    """Numbered replies, optionally failing."""
+
+    def __init__(self, fail: bool = False):
+        self.calls = 0
+        self.fail = fail
+
+    async def __call__(self, persona, mode, message):
+        self.calls += 1
+        if self.fail:
+            raise UpstreamError("upstream down")
+        return f"{persona} says ahoy #{self.calls}", False
+
+@pytest.fixture
+async def temp_db():
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.db') as tmp:
+        temp_db_path = tmp.name
+    
+    with patch('app.database.DATABASE_PATH', temp_db_path):
+        await init_database()
+        yield temp_db_path
+    
+    if os.path.exists(temp_db_path):
+        os.unlink(temp_db_path)
+
+def test_is_greeting():
+    """Test which first messages the pool answers."""
+    assert is_greeting("Hello!")
+    assert is_greeting("  hey there :)")
+    assert is_greeting("Good morning.")
+    assert not is_greeting("Hello, what is the capital of France?")
+    assert not is_greeting("")
+
+@pytest.mark.asyncio
+async def test_pool_serves_each_reply_once():
+    """Test refilling, consuming and running dry."""
+    generate = FakeGenerator()
+    pool = OpeningPool(generate, personas=1, depth=2)
+    pool.warm([PIRATE])
+    await pool.refill()
+    assert generate.calls == 2
+    
+    assert pool.take(PIRATE, ChatMode.REGULAR, "What's your ship called?") is None
+    assert pool.take(PIRATE, ChatMode.UNCENSORED, "hi") is None
+    assert pool.take("A chef", ChatMode.REGULAR, "hi") is None
+    first = pool.take(PIRATE, ChatMode.REGULAR, "Hi!")
+    second = pool.take(PIRATE, ChatMode.REGULAR, "hello there")
+    assert first != second
+    assert pool.take(PIRATE, ChatMode.REGULAR, "hey") is None
+    
+    stats = pool.stats()
+    assert stats["served"] == 2
+    assert stats["misses"] == 1
+    assert stats["consumed_per_minute"] == 2
+    assert stats["size"] == 0
+    
+    await pool.refill()
+    assert pool.stats()["fill_ratio"] == 1.0
+
+@pytest.mark.asyncio
+async def test_stale_replies_are_replaced():
+    """Test that replies older than max_age are dropped and regenerated."""
+    now = [1000.0]
+    generate = FakeGenerator()
+    pool = OpeningPool(generate, personas=1, depth=1, max_age=60, clock=lambda: now[0])
+    pool.warm([PIRATE])
+    await pool.refill()
+    assert pool.stats()["oldest_age"] == 0
+    
+    now[0] += 30
+    assert pool.stats()["oldest_age"] == 30
+    now[0] += 31
+    assert pool.take(PIRATE, ChatMode.REGULAR, "hi") is None
+    assert pool.stats()["expired"] == 1
+    
+    await pool.refill()
+    assert pool.take(PIRATE, ChatMode.REGULAR, "hi") == (f"{PIRATE} says ahoy #2", False)
+
+@pytest.mark.asyncio
+async def test_failed_generations_are_retried_later():
+    """Test that upstream errors leave the pool short without raising."""
+    generate = FakeGenerator(fail=True)
+    pool = OpeningPool(generate, personas=1, depth=2)
+    pool.warm([PIRATE])
+    await pool.refill()
+    assert pool.stats()["failures"] == 2
+    assert pool.stats()["size"] == 0
+    
+    generate.fail = False
+    await pool.refill()
+    assert pool.stats()["size"] == 2
+
+@pytest.mark.asyncio
+async def test_run_warms_top_defaults_and_refills(temp_db):
+    """Test the background job: prompts rendered, pools filled and refilled after use."""
+    generate = FakeGenerator()
+    prepared = []
+    pool = OpeningPool(generate, lambda persona, mode: prepared.append((persona, mode)), personas=3, depth=1)
+    
+    async def filled(expected):
+        for _ in range(100):
+            if pool.stats()["size"] == expected:
+                return True
+            await asyncio.sleep(0.01)
+        return False
+    
+    with patch('app.database.DATABASE_PATH', temp_db):
+        job = asyncio.create_task(pool.run(interval=60))
+        try:
+            assert await filled(3)
+            assert [persona for persona, _ in prepared] == DEFAULT_PERSONAS[:3]
+            assert pool.take(DEFAULT_PERSONAS[0], ChatMode.REGULAR, "Hello") is not None
+            # Consumption wakes the job well before the interval
+            assert await filled(3)
+            assert generate.calls == 4
+        finally:
+            job.cancel()
+
+@pytest.mark.asyncio
+async def test_chat_service_answers_greetings_from_pool():
+    """Test that a first-turn greeting is served from the pool without an upstream call."""
+    class CountingLLM:
+        calls = 0
+        
+        async def ainvoke(self, messages):
+            self.calls += 1
+            return AIMessage(content=f"Ahoy #{self.calls}!")
+    
+    with patch.dict('os.environ', {'GROQ_API_KEY': 'test-key'}):
+        service = ChatService(llm=CountingLLM())
+    service.openings = OpeningPool(service.pregenerate, personas=1, depth=1)
+    service.openings.warm([PIRATE])
+    await service.openings.refill()
+    assert service.llm.calls == 1
+    
+    assert await service.generate_response("Hello!", PIRATE, ChatMode.REGULAR) == ("Ahoy #1!", False)
+    assert service.llm.calls == 1
+    
+    # Pooled replies are not cached: the next greeting goes upstream
+    assert await service.generate_response("Hello!", PIRATE, ChatMode.REGULAR) == ("Ahoy #2!", False)
+    
+    await service.openings.refill()
+    events = [e async for e in service.stream_response("hey", PIRATE, ChatMode.REGULAR)]
+    assert events == [{"type": "token", "content": "Ahoy #3!"}, {"type": "done", "filtered": False}]
@@ -0,0 +1,141 @@
+import pytest
+import asyncio
+import os
+import sqlite3
+import tempfile
+from unittest.mock import patch
+
+from app import database
+from app.database import (
+    init_database,
+    add_persona_listener,
+    remove_persona_listener,
+    add_custom_persona,
+    delete_persona,
+    get_persona,
+    start_write_queue,
+    stop_write_queue
+)
+from app.writer import WriteQueue, WriteQueueFull
+
+class RecordingApply:
+    """Doubles each value, fails on negatives, and records batch sizes."""
+
+    def __init__(self):
+        self.batches = []
+        self.gate = None
+
+    async def __call__(self, operations):
+        if self.gate:
+            await self.gate.wait()
+        self.batches.append(len(operations))
+        await asyncio.sleep(0)
+        return [ValueError(value) if value < 0 else value * 2 for _, value in operations]
+
+@pytest.fixture
+async def temp_db():
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.db') as tmp:
+        temp_db_path = tmp.name
+    
+    with patch('app.database.DATABASE_PATH', temp_db_path):
+        await init_database()
+        yield temp_db_path
+        await stop_write_queue()
+    
+    if os.path.exists(temp_db_path):
+        os.unlink(temp_db_path)
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_share_batches():
+    """Test that queued operations are applied together and answered individually."""
+    apply = RecordingApply()
+    queue = WriteQueue(apply)
+    queue.start()
+    try:
+        results = await asyncio.gather(*(queue.submit("op", i) for i in range(50)))
+    finally:
+        await queue.close()
+    
+    assert results == [i * 2 for i in range(50)]
+    assert sum(apply.batches) == 50
+    assert len(apply.batches) < 50
+    assert queue.stats()["largest_batch"] == max(apply.batches)
+
+@pytest.mark.asyncio
+async def test_failed_operation_only_fails_its_caller():
+    """Test that a per-operation error reaches only that caller."""
+    queue = WriteQueue(RecordingApply())
+    queue.start()
+    try:
+        results = await asyncio.gather(
+            queue.submit("op", 1), queue.submit("op", -1), queue.submit("op", 2), return_exceptions=True
+        )
+    finally:
+        await queue.close()
+    
+    assert results[0] == 2 and results[2] == 4
+    assert isinstance(results[1], ValueError)
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_writes():
+    """Test backpressure: submits fail fast once the queue stays full."""
+    apply = RecordingApply()
+    apply.gate = asyncio.Event()
+    queue = WriteQueue(apply, max_queue=2, max_batch=1, enqueue_timeout=0.05)
+    queue.start()
+    try:
+        writes = [asyncio.create_task(queue.submit("op", i)) for i in range(3)]
+        await asyncio.sleep(0.01)
+        # One is being applied and two fill the queue
+        with pytest.raises(WriteQueueFull) as exc_info:
+            await queue.submit("op", 3)
+        assert exc_info.value.retry_after_header == "1"
+        assert queue.stats()["rejected"] == 1
+        
+        apply.gate.set()
+        assert await asyncio.gather(*writes) == [0, 2, 4]
+    finally:
+        await queue.close()
+
+@pytest.mark.asyncio
+async def test_close_drains_queue():
+    """Test that closing applies writes that were already queued."""
+    queue = WriteQueue(RecordingApply())
+    queue.start()
+    writes = [asyncio.create_task(queue.submit("op", i)) for i in range(10)]
+    await asyncio.sleep(0)
+    await queue.close()
+    assert await asyncio.gather(*writes) == [i * 2 for i in range(10)]
+    assert queue.stats()["running"] is False
+
+@pytest.mark.asyncio
+async def test_persona_writes_through_queue(temp_db):
+    """Test grouped persona inserts and deletes against the database."""
+    events = []
+    listener = lambda event, persona: events.append(event)
+    add_persona_listener(listener)
+    try:
+        queue = await start_write_queue(WriteQueue(database._apply_persona_writes))
+        existing = await add_custom_persona("A persona that will be deleted shortly")
+        
+        results = await asyncio.gather(
+            *(add_custom_persona(f"A concurrent persona number {i} with a story") for i in range(100)),
+            add_custom_persona("A concurrent persona number 0 with a story"),
+            delete_persona(existing["id"]),
+            delete_persona(1),
+            return_exceptions=True
+        )
+    finally:
+        remove_persona_listener(listener)
+    
+    added = results[:100]
+    assert len({persona["id"] for persona in added}) == 100
+    assert isinstance(results[100], sqlite3.IntegrityError)
+    assert results[101] is True
+    # Default personas cannot be deleted
+    assert results[102] is False
+    
+    assert await get_persona(added[42]["id"]) == added[42]
+    assert await get_persona(existing["id"]) is None
+    assert events.count("added") == 101 and events.count("deleted") == 1
+    assert queue.stats()["batches"] < 102